@@ -4,6 +4,7 @@ from flask_migrate import Migrate
 from flask_login import LoginManager
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
 import config as config_module
 
 # Initialize extensions
@@ -19,6 +20,10 @@ def create_app(config_name='default'):
     # Load configuration
     app.config.from_object(config_module.config[config_name])
 
+    # Take the client address from X-Forwarded-For when behind trusted proxies
+    if app.config.get('PROXY_FIX_X_FOR'):
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['PROXY_FIX_X_FOR'])
+
     # Initialize extensions with app
     db.init_app(app)
     migrate.init_app(app, db)
@@ -44,6 +49,28 @@ def create_app(config_name='default'):
     app.register_blueprint(addresses.bp)
     app.register_blueprint(uploads.bp)
 
+    # Token bucket rate limits for login, suggestions and coupon checks
+    from app.utils.rate_limit import rate_limiter
+    rate_limiter.init_app(app)
+
+    # Bcrypt cost and the bounded hashing pool
+    from app.services.password_hasher import password_hasher
+    password_hasher.init_app(app)
+
+    # Size the background payment finalization pool
+    from app.services.payment_simulator import PaymentSimulator
+    PaymentSimulator.init_app(app)
+
+    # Email delivery transport and the background outbox sender
+    from app.services.email_service import EmailService
+    from app.services.email_sender import email_sender
+    EmailService.init_app(app)
+    email_sender.init_app(app)
+
+    # In-memory search suggestion index (built in the background on first use)
+    from app.services.suggestion_index import suggestion_index
+    suggestion_index.init_app(app)
+
     # Create upload folder if it doesn't exist
     import os
     from app.config.upload_config import UPLOAD_FOLDER, PRODUCT_UPLOAD_FOLDER
@@ -5,6 +5,9 @@ from app.models.order import Order, OrderItem
 from app.models.payment import Payment
 from app.models.wishlist import Wishlist
 from app.models.coupon import Coupon
+from app.models.idempotency import IdempotencyKey
+from app.models.email_outbox import EmailOutbox
+from app.models.sales_rollup import DailySales, ProductDailySales
 
 __all__ = [
     'User',
@@ -18,5 +21,9 @@ __all__ = [
     'OrderItem',
     'Payment',
     'Wishlist',
-    'Coupon'
+    'Coupon',
+    'IdempotencyKey',
+    'EmailOutbox',
+    'DailySales',
+    'ProductDailySales'
 ]
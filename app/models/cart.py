@@ -1,5 +1,8 @@
 from datetime import datetime
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload, selectinload
 from app import db
+from app.models.product import Product
 
 
 class Cart(db.Model):
@@ -22,14 +25,41 @@ class Cart(db.Model):
         """Calculate cart subtotal"""
         return sum(item.product.price * item.quantity for item in self.items)
 
+    @classmethod
+    def load_for_user(cls, user_id):
+        """
+        Load a user's cart with its items, their products and categories
+        (two queries in total, however many lines the cart has)
+        """
+        return cls.query.options(
+            selectinload(cls.items).joinedload(CartItem.product).joinedload(Product.category)
+        ).filter_by(user_id=user_id).populate_existing().first()
+
+    @staticmethod
+    def totals(cart_id):
+        """Get (total_items, subtotal) for a cart with a single aggregate query"""
+        total_items, subtotal = db.session.query(
+            func.coalesce(func.sum(CartItem.quantity), 0),
+            func.coalesce(func.sum(CartItem.quantity * Product.price), 0)
+        ).join(Product, CartItem.product_id == Product.id).filter(CartItem.cart_id == cart_id).one()
+        return int(total_items), subtotal
+
     def to_dict(self):
-        """Convert cart object to dictionary"""
+        """Convert cart object to dictionary, computing totals in the same pass over items"""
+        items = []
+        total_items = 0
+        subtotal = 0
+        for item in self.items:
+            total_items += item.quantity
+            subtotal += item.subtotal
+            items.append(item.to_dict())
+
         return {
             'id': self.id,
             'user_id': self.user_id,
-            'total_items': self.total_items,
-            'subtotal': float(self.subtotal),
-            'items': [item.to_dict() for item in self.items],
+            'total_items': total_items,
+            'subtotal': float(subtotal),
+            'items': items,
             'created_at': self.created_at.isoformat()
         }
 
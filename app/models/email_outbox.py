@@ -0,0 +1,104 @@
+import uuid
+from datetime import datetime, timedelta
+from app import db
+
+
+class EmailOutbox(db.Model):
+    """
+    Emails waiting to be delivered. Rows are written in the same transaction
+    as the change they announce, so an email goes out if and only if that
+    change was committed, and delivery happens in the background.
+    """
+    __tablename__ = 'email_outbox'
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)  # order_confirmation, order_shipped, ...
+    to_email = db.Column(db.String(120), nullable=False)
+    payload = db.Column(db.JSON, nullable=False)  # Snapshot of everything the template needs
+    status = db.Column(db.String(20), default='pending', nullable=False)  # pending, sending, sent, failed
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)  # Lease expiry while sending
+    locked_by = db.Column(db.String(36))  # Claim token of the sender holding the row
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        # Sender poll: due rows in order
+        db.Index('ix_email_outbox_status_next_attempt_at', 'status', 'next_attempt_at'),
+    )
+
+    @classmethod
+    def enqueue(cls, kind, to_email, payload):
+        """Add an email to the caller's transaction (not committed here)"""
+        message = cls(kind=kind, to_email=to_email, payload=payload, next_attempt_at=datetime.utcnow())
+        db.session.add(message)
+        return message
+
+    @classmethod
+    def claim_due(cls, limit, lease_seconds):
+        """
+        Claim up to `limit` due messages for delivery. Claimed rows are leased
+        for `lease_seconds`; if the sender dies, they become due again after
+        that. Safe to run from several processes at once.
+        Returns: list of claimed messages (committed)
+        """
+        now = datetime.utcnow()
+        due = db.session.query(cls.id).filter(
+            cls.status.in_(['pending', 'sending']),
+            cls.next_attempt_at <= now
+        ).order_by(cls.next_attempt_at.asc(), cls.id.asc()).limit(limit).all()
+        if not due:
+            db.session.rollback()
+            return []
+
+        token = uuid.uuid4().hex
+        cls.query.filter(
+            cls.id.in_([row.id for row in due]),
+            cls.status.in_(['pending', 'sending']),
+            cls.next_attempt_at <= now
+        ).update({
+            'status': 'sending',
+            'locked_by': token,
+            'next_attempt_at': now + timedelta(seconds=lease_seconds)
+        }, synchronize_session=False)
+        db.session.commit()
+
+        return cls.query.filter_by(locked_by=token, status='sending').order_by(cls.id.asc()).all()
+
+    @classmethod
+    def mark_sent(cls, message_id, token):
+        cls.query.filter_by(id=message_id, locked_by=token).update({
+            'status': 'sent',
+            'attempts': cls.attempts + 1,
+            'locked_by': None,
+            'last_error': None,
+            'sent_at': datetime.utcnow()
+        }, synchronize_session=False)
+        db.session.commit()
+
+    @classmethod
+    def mark_failed(cls, message_id, token, error, retry_in=None):
+        """Record a failed attempt; retry after `retry_in` seconds, or give up if None"""
+        values = {
+            'attempts': cls.attempts + 1,
+            'locked_by': None,
+            'last_error': error
+        }
+        if retry_in is None:
+            values['status'] = 'failed'
+        else:
+            values['status'] = 'pending'
+            values['next_attempt_at'] = datetime.utcnow() + timedelta(seconds=retry_in)
+
+        cls.query.filter_by(id=message_id, locked_by=token).update(values, synchronize_session=False)
+        db.session.commit()
+
+    @classmethod
+    def counts(cls):
+        """Number of messages per status"""
+        rows = db.session.query(cls.status, db.func.count(cls.id)).group_by(cls.status).all()
+        return {status: count for status, count in rows}
+
+    def __repr__(self):
+        return f'<EmailOutbox {self.id} {self.kind} to {self.to_email} ({self.status})>'
@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError
+from app import db
+
+
+class IdempotencyKey(db.Model):
+    __tablename__ = 'idempotency_keys'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    endpoint = db.Column(db.String(100), nullable=False)
+    key = db.Column(db.String(255), nullable=False)
+    request_hash = db.Column(db.String(64), nullable=False)  # SHA-256 of the request body
+    status_code = db.Column(db.Integer)  # Null while the first request is still running
+    response_body = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    claimed_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)  # Start of the running request's lease
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    # One stored response per user, endpoint and client-supplied key
+    __table_args__ = (db.UniqueConstraint('user_id', 'endpoint', 'key', name='unique_idempotency_key'),)
+
+    @classmethod
+    def claim(cls, user_id, endpoint, key, request_hash, ttl_seconds, lease_seconds=60):
+        """
+        Reserve a key before running the request it guards. A claim whose
+        request has not finished within `lease_seconds` (e.g. the worker
+        died) is taken over by the next request with the same body.
+        Returns: (record, created) - created is False if the key was already taken
+        """
+        now = datetime.utcnow()
+
+        # An expired record no longer protects anything, let the key be reused
+        cls.query.filter(
+            cls.user_id == user_id,
+            cls.endpoint == endpoint,
+            cls.key == key,
+            cls.expires_at < now
+        ).delete(synchronize_session=False)
+
+        record = cls(
+            user_id=user_id,
+            endpoint=endpoint,
+            key=key,
+            request_hash=request_hash,
+            claimed_at=now,
+            expires_at=now + timedelta(seconds=ttl_seconds)
+        )
+        db.session.add(record)
+        try:
+            db.session.commit()
+            return record, True
+        except IntegrityError:
+            db.session.rollback()
+
+        # Conditional UPDATE, so only one retry can take over an abandoned claim
+        taken_over = cls.query.filter(
+            cls.user_id == user_id,
+            cls.endpoint == endpoint,
+            cls.key == key,
+            cls.request_hash == request_hash,
+            cls.status_code.is_(None),
+            cls.claimed_at < now - timedelta(seconds=lease_seconds)
+        ).update({'claimed_at': now}, synchronize_session=False)
+        db.session.commit()
+
+        existing = cls.query.filter_by(user_id=user_id, endpoint=endpoint, key=key).first()
+        return existing, bool(taken_over) and existing is not None
+
+    @classmethod
+    def complete(cls, record_id, status_code, response_body):
+        """Store the response so retries can be answered from it"""
+        cls.query.filter_by(id=record_id).update({
+            'status_code': status_code,
+            'response_body': response_body
+        }, synchronize_session=False)
+        db.session.commit()
+
+    @classmethod
+    def release(cls, record_id):
+        """Drop a claim whose request failed, so a retry runs it again"""
+        db.session.rollback()
+        cls.query.filter_by(id=record_id).delete(synchronize_session=False)
+        db.session.commit()
+
+    @classmethod
+    def purge_expired(cls):
+        """Delete expired records. Returns the number removed"""
+        removed = cls.query.filter(cls.expires_at < datetime.utcnow()).delete(synchronize_session=False)
+        db.session.commit()
+        return removed
+
+    def __repr__(self):
+        return f'<IdempotencyKey {self.endpoint} {self.key}>'
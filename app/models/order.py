@@ -1,4 +1,5 @@
 from datetime import datetime
+from sqlalchemy.orm import joinedload, selectinload
 from app import db
 
 
@@ -19,11 +20,26 @@ class Order(db.Model):
     payment = db.relationship('Payment', backref='order', uselist=False, cascade='all, delete-orphan')
     shipping_address = db.relationship('Address', foreign_keys=[shipping_address_id])
 
+    # (sort_key, id) indexes backing keyset pagination of order listings
+    __table_args__ = (
+        db.Index('ix_orders_created_at_id', 'created_at', 'id'),
+        db.Index('ix_orders_user_id_created_at_id', 'user_id', 'created_at', 'id'),
+    )
+
     @property
     def total_items(self):
         """Get total number of items in order"""
         return sum(item.quantity for item in self.items)
 
+    @classmethod
+    def load_with_details(cls, order_id):
+        """Load an order with everything to_dict() needs in a fixed number of queries"""
+        return cls.query.options(
+            selectinload(cls.items).joinedload(OrderItem.product),
+            joinedload(cls.shipping_address),
+            joinedload(cls.payment)
+        ).filter_by(id=order_id).populate_existing().first()
+
     def to_dict(self):
         """Convert order object to dictionary"""
         return {
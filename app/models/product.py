@@ -1,4 +1,6 @@
 from datetime import datetime
+from sqlalchemy import DDL, case, event, func, select
+from sqlalchemy.ext.hybrid import hybrid_property
 from app import db
 
 
@@ -31,12 +33,16 @@ class Product(db.Model):
     __tablename__ = 'products'
 
     id = db.Column(db.Integer, primary_key=True)
+    sku = db.Column(db.String(64), unique=True)  # Optional stock keeping unit; the bulk import upsert key
     name = db.Column(db.String(255), nullable=False)
     description = db.Column(db.Text)
     price = db.Column(db.Numeric(10, 2), nullable=False)
     category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), nullable=False)
     stock_quantity = db.Column(db.Integer, default=0, nullable=False)
     image_url = db.Column(db.String(255))
+    # Denormalized review aggregates, maintained on review write
+    rating_sum = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    rating_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -45,22 +51,75 @@ class Product(db.Model):
     cart_items = db.relationship('CartItem', backref='product', lazy=True)
     order_items = db.relationship('OrderItem', backref='product', lazy=True)
 
-    @property
+    # (sort_key, id) indexes backing keyset pagination of product listings
+    __table_args__ = (
+        db.Index('ix_products_created_at_id', 'created_at', 'id'),
+        db.Index('ix_products_price_id', 'price', 'id'),
+        # Prefix lookups for search suggestions
+        db.Index('ix_products_name', 'name'),
+        # Full-text search on MySQL; SQLite uses the products_fts table below
+        db.Index('ix_products_name_description_fulltext', 'name', 'description',
+                 mysql_prefix='FULLTEXT').ddl_if(dialect='mysql'),
+    )
+
+    @hybrid_property
     def average_rating(self):
-        """Calculate average rating from reviews"""
-        if not self.reviews:
+        """Average rating from the stored review aggregates"""
+        if not self.rating_count:
             return 0
-        return sum(review.rating for review in self.reviews) / len(self.reviews)
+        return self.rating_sum / self.rating_count
+
+    @average_rating.expression
+    def average_rating(cls):
+        return case(
+            (cls.rating_count > 0, cls.rating_sum * 1.0 / cls.rating_count),
+            else_=0
+        )
 
     @property
     def review_count(self):
         """Get total number of reviews"""
-        return len(self.reviews)
+        return self.rating_count or 0
+
+    @classmethod
+    def update_rating_aggregates(cls, product_id, rating_delta, count_delta):
+        """
+        Adjust the stored review aggregates in the current transaction.
+        Uses an in-place UPDATE so concurrent review writes don't lose counts.
+        """
+        db.session.query(cls).filter(cls.id == product_id).update({
+            cls.rating_sum: cls.rating_sum + rating_delta,
+            cls.rating_count: cls.rating_count + count_delta
+        }, synchronize_session=False)
+
+    @classmethod
+    def recompute_rating_aggregates(cls):
+        """
+        Rebuild rating_sum/rating_count for every product from the reviews table.
+        Returns the number of products whose stored aggregates had drifted.
+        """
+        review_sum = select(func.coalesce(func.sum(Review.rating), 0)) \
+            .where(Review.product_id == cls.id).scalar_subquery()
+        review_count = select(func.count(Review.id)) \
+            .where(Review.product_id == cls.id).scalar_subquery()
+
+        drifted = db.session.query(cls).filter(
+            (cls.rating_sum != review_sum) | (cls.rating_count != review_count)
+        ).count()
+
+        db.session.query(cls).update({
+            cls.rating_sum: review_sum,
+            cls.rating_count: review_count
+        }, synchronize_session=False)
+        db.session.commit()
+
+        return drifted
 
     def to_dict(self):
         """Convert product object to dictionary"""
         return {
             'id': self.id,
+            'sku': self.sku,
             'name': self.name,
             'description': self.description,
             'price': float(self.price),
@@ -78,6 +137,31 @@ class Product(db.Model):
         return f'<Product {self.name}>'
 
 
+# FTS5 index for product search on SQLite (see app/services/search_service.py),
+# kept in sync by triggers so every write path (admin routes, imports,
+# scripts, seed data, plain ORM code) is indexed
+PRODUCTS_FTS_DDL = (
+    'CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(name, description)',
+    """CREATE TRIGGER IF NOT EXISTS products_fts_insert AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts (rowid, name, description) VALUES (new.id, new.name, COALESCE(new.description, ''));
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_update AFTER UPDATE OF id, name, description ON products BEGIN
+        DELETE FROM products_fts WHERE rowid = old.id;
+        INSERT INTO products_fts (rowid, name, description) VALUES (new.id, new.name, COALESCE(new.description, ''));
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_delete AFTER DELETE ON products BEGIN
+        DELETE FROM products_fts WHERE rowid = old.id;
+    END"""
+)
+
+for statement in PRODUCTS_FTS_DDL:
+    event.listen(Product.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+event.listen(
+    Product.__table__, 'before_drop',
+    DDL('DROP TABLE IF EXISTS products_fts').execute_if(dialect='sqlite')
+)
+
+
 class Review(db.Model):
     __tablename__ = 'reviews'
 
@@ -88,6 +172,11 @@ class Review(db.Model):
     comment = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    # (sort_key, id) index backing keyset pagination of the admin review listing
+    __table_args__ = (
+        db.Index('ix_reviews_created_at_id', 'created_at', 'id'),
+    )
+
     def to_dict(self):
         """Convert review object to dictionary"""
         return {
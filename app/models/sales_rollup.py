@@ -0,0 +1,108 @@
+from datetime import datetime
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from app import db
+
+# Rows per INSERT, keeping statements well under bound parameter limits
+UPSERT_BATCH_SIZE = 1000
+
+
+def _upsert_increments(model, key_columns, counters, rows):
+    """
+    Add each row's counters onto the row with the same key, inserting it if
+    missing, as one atomic statement (INSERT ... ON DUPLICATE KEY / ON
+    CONFLICT), so concurrent writers to the same day never lose an update.
+    """
+    if not rows:
+        return
+
+    table = model.__table__
+    now = datetime.utcnow()
+    for row in rows:
+        for name in counters:
+            row.setdefault(name, 0)
+        row['updated_at'] = now
+
+    if len(rows) > UPSERT_BATCH_SIZE:
+        for i in range(0, len(rows), UPSERT_BATCH_SIZE):
+            _upsert_increments(model, key_columns, counters, rows[i:i + UPSERT_BATCH_SIZE])
+        return
+
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'mysql':
+        stmt = mysql.insert(table).values(rows)
+        changes = {name: table.c[name] + stmt.inserted[name] for name in counters}
+        changes['updated_at'] = stmt.inserted.updated_at
+        db.session.execute(stmt.on_duplicate_key_update(changes))
+    elif dialect in ('sqlite', 'postgresql'):
+        insert = sqlite.insert if dialect == 'sqlite' else postgresql.insert
+        stmt = insert(table).values(rows)
+        changes = {name: table.c[name] + stmt.excluded[name] for name in counters}
+        changes['updated_at'] = stmt.excluded.updated_at
+        db.session.execute(stmt.on_conflict_do_update(index_elements=key_columns, set_=changes))
+    else:
+        for row in rows:
+            key = {name: row[name] for name in key_columns}
+            updated = db.session.query(model).filter_by(**key).update(
+                {name: getattr(model, name) + row[name] for name in counters},
+                synchronize_session=False
+            )
+            if not updated:
+                db.session.execute(table.insert().values(row))
+
+
+class DailySales(db.Model):
+    """
+    Per-day order totals, keyed by the day the order was placed and kept
+    current as orders are placed, paid, cancelled and refunded.
+    Cancelled orders move from orders/units/gross_revenue to cancelled_orders.
+    """
+    __tablename__ = 'daily_sales'
+
+    day = db.Column(db.Date, primary_key=True)
+    orders = db.Column(db.Integer, default=0, nullable=False)
+    cancelled_orders = db.Column(db.Integer, default=0, nullable=False)
+    units = db.Column(db.Integer, default=0, nullable=False)
+    gross_revenue = db.Column(db.Numeric(12, 2), default=0, nullable=False)  # Placed, not cancelled
+    paid_revenue = db.Column(db.Numeric(12, 2), default=0, nullable=False)  # Payment captured, refunded or not
+    refunded_amount = db.Column(db.Numeric(12, 2), default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    COUNTERS = ('orders', 'cancelled_orders', 'units', 'gross_revenue', 'paid_revenue', 'refunded_amount')
+
+    @classmethod
+    def add(cls, rows):
+        """Add counter deltas ({'day': ..., 'orders': 1, ...}) in the caller's transaction"""
+        _upsert_increments(cls, ['day'], cls.COUNTERS, rows)
+
+    def to_dict(self):
+        return {
+            'day': self.day.isoformat(),
+            'orders': self.orders,
+            'cancelled_orders': self.cancelled_orders,
+            'units': self.units,
+            'gross_revenue': float(self.gross_revenue),
+            'paid_revenue': float(self.paid_revenue),
+            'refunded_amount': float(self.refunded_amount)
+        }
+
+
+class ProductDailySales(db.Model):
+    """Units and revenue per product per day, for orders that are not cancelled"""
+    __tablename__ = 'product_daily_sales'
+
+    day = db.Column(db.Date, primary_key=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), primary_key=True)
+    category_id = db.Column(db.Integer, nullable=True)  # Product's category when the row was first written
+    units = db.Column(db.Integer, default=0, nullable=False)
+    revenue = db.Column(db.Numeric(12, 2), default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    COUNTERS = ('units', 'revenue')
+
+    # Category breakdown over a date range; the primary key serves day ranges
+    __table_args__ = (db.Index('ix_product_daily_sales_category_id_day', 'category_id', 'day'),)
+
+    @classmethod
+    def add(cls, rows):
+        """Add unit/revenue deltas ({'day', 'product_id', 'category_id', 'units', 'revenue'})"""
+        _upsert_increments(cls, ['day', 'product_id'], cls.COUNTERS, rows)
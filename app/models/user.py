@@ -1,7 +1,7 @@
 from datetime import datetime
 from app import db
 from flask_login import UserMixin
-import bcrypt
+from app.services.password_hasher import password_hasher
 
 
 class User(UserMixin, db.Model):
@@ -13,6 +13,7 @@ class User(UserMixin, db.Model):
     first_name = db.Column(db.String(50), nullable=False)
     last_name = db.Column(db.String(50), nullable=False)
     role = db.Column(db.String(20), default='user', nullable=False)  # 'user' or 'admin'
+    token_version = db.Column(db.Integer, default=0, server_default='0', nullable=False)  # Bumped to revoke issued JWTs
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     # Relationships
@@ -22,12 +23,34 @@ class User(UserMixin, db.Model):
     reviews = db.relationship('Review', backref='user', lazy=True, cascade='all, delete-orphan')
 
     def set_password(self, password):
-        """Hash and set the password"""
-        self.password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        """
+        Hash and set the password
+        Raises: HasherBusyError if the hashing pool is saturated
+        """
+        self.password_hash = password_hasher.hash(password)
 
     def check_password(self, password):
-        """Check if the provided password matches the hash"""
-        return bcrypt.checkpw(password.encode('utf-8'), self.password_hash.encode('utf-8'))
+        """
+        Check if the provided password matches the hash
+        Raises: HasherBusyError if the hashing pool is saturated
+        """
+        return password_hasher.verify(password, self.password_hash)
+
+    def password_needs_rehash(self):
+        """True if the stored hash uses a different bcrypt cost than configured"""
+        return password_hasher.needs_rehash(self.password_hash)
+
+    def token_claims(self):
+        """Claims embedded in this user's access tokens (read by admin_required)"""
+        return {'role': self.role, 'tv': self.token_version}
+
+    @classmethod
+    def bump_token_version(cls, user_id):
+        """Invalidate the user's issued tokens (in the caller's transaction)"""
+        cls.query.filter_by(id=user_id).update(
+            {'token_version': cls.token_version + 1},
+            synchronize_session=False
+        )
 
     def to_dict(self):
         """Convert user object to dictionary"""
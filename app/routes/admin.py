@@ -1,13 +1,21 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
 from flask_jwt_extended import jwt_required
-from sqlalchemy import func
+from sqlalchemy.orm import joinedload
 from app import db
 from app.models import Product, Category, Order, User, Payment, Review
-from app.utils.decorators import admin_required
+from app.services.dashboard_stats import DashboardStats
+from app.services.export_service import DataExport, ExportError
+from app.services.inventory_service import InventoryService, InsufficientStockError
+from app.services.product_bulk_update import BulkProductUpdate, InvalidBulkUpdateError, ProductsNotFoundError
+from app.services.product_import import ImportFormatError, ProductImporter, read_rows
+from app.services.sales_rollup import SalesRollup
+from app.services.suggestion_index import suggestion_index
+from app.utils.decorators import admin_required, forget_token_version, revoke_user_tokens
 from app.utils.validators import validate_required_fields
+from app.utils.pagination import keyset_paginate, InvalidCursorError
 from app.utils.image_utils import save_product_image, delete_product_image, get_image_url
 from decimal import Decimal
-from datetime import datetime, timedelta
+from datetime import datetime
 
 bp = Blueprint('admin', __name__, url_prefix='/api/admin')
 
@@ -17,57 +25,74 @@ bp = Blueprint('admin', __name__, url_prefix='/api/admin')
 @bp.route('/dashboard/stats', methods=['GET'])
 @admin_required
 def get_dashboard_stats():
-    """Get overall dashboard statistics"""
+    """Get overall dashboard statistics (cached for DASHBOARD_CACHE_TTL seconds)"""
     try:
-        # Total counts
-        total_users = User.query.filter_by(role='user').count()
-        total_products = Product.query.count()
-        total_orders = Order.query.count()
-
-        # Revenue stats
-        completed_orders = Order.query.filter_by(payment_status='completed').all()
-        total_revenue = sum(float(order.total_amount) for order in completed_orders)
-
-        # Recent orders (last 30 days)
-        thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-        recent_orders = Order.query.filter(Order.created_at >= thirty_days_ago).count()
-
-        # Order status breakdown
-        pending_orders = Order.query.filter_by(status='pending').count()
-        processing_orders = Order.query.filter_by(status='processing').count()
-        shipped_orders = Order.query.filter_by(status='shipped').count()
-        delivered_orders = Order.query.filter_by(status='delivered').count()
-
-        # Low stock products
-        low_stock = Product.query.filter(Product.stock_quantity < 10).count()
-
-        # Top selling products (by order items)
-        from app.models import OrderItem
-        top_products = db.session.query(
-            Product.name,
-            func.sum(OrderItem.quantity).label('total_sold')
-        ).join(OrderItem).group_by(Product.id).order_by(func.sum(OrderItem.quantity).desc()).limit(5).all()
+        return jsonify(DashboardStats.get()), 200
 
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/analytics/sales', methods=['GET'])
+@admin_required
+def get_sales_series():
+    """
+    Daily orders, units and revenue from the sales rollup
+    Query params: start, end (YYYY-MM-DD, default: the last 30 days)
+    """
+    try:
+        start, end = SalesRollup.parse_range(request.args.get('start'), request.args.get('end'))
+        return jsonify(SalesRollup.sales_series(start, end)), 200
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/analytics/top-products', methods=['GET'])
+@admin_required
+def get_top_products():
+    """
+    Best selling products from the sales rollup
+    Query params: start, end (YYYY-MM-DD), limit (default 10), sort_by (units or revenue)
+    """
+    try:
+        start, end = SalesRollup.parse_range(request.args.get('start'), request.args.get('end'))
+        limit = min(max(request.args.get('limit', 10, type=int), 1), 100)
+        sort_by = request.args.get('sort_by', 'units')
+        if sort_by not in ('units', 'revenue'):
+            return jsonify({'error': 'sort_by must be units or revenue'}), 400
+
+        return jsonify({
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'products': SalesRollup.top_products(start, end, limit, sort_by)
+        }), 200
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/analytics/categories', methods=['GET'])
+@admin_required
+def get_category_sales():
+    """
+    Units and revenue per category from the sales rollup
+    Query params: start, end (YYYY-MM-DD)
+    """
+    try:
+        start, end = SalesRollup.parse_range(request.args.get('start'), request.args.get('end'))
         return jsonify({
-            'overview': {
-                'total_users': total_users,
-                'total_products': total_products,
-                'total_orders': total_orders,
-                'total_revenue': total_revenue,
-                'recent_orders_30d': recent_orders
-            },
-            'orders': {
-                'pending': pending_orders,
-                'processing': processing_orders,
-                'shipped': shipped_orders,
-                'delivered': delivered_orders
-            },
-            'inventory': {
-                'low_stock_count': low_stock
-            },
-            'top_products': [{'name': p[0], 'sold': int(p[1])} for p in top_products]
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'categories': SalesRollup.category_sales(start, end)
         }), 200
 
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -114,6 +139,7 @@ def create_product():
 
         db.session.add(product)
         db.session.commit()
+        suggestion_index.add(product)
 
         return jsonify({
             'message': 'Product created successfully',
@@ -125,6 +151,105 @@ def create_product():
         return jsonify({'error': str(e)}), 500
 
 
+@bp.route('/products/import', methods=['POST'])
+@admin_required
+def import_products():
+    """
+    Create or update products in bulk from CSV or JSON lines
+    Body: a multipart `file` field, or the raw CSV / NDJSON document
+    Query params:
+        - format: csv or ndjson (default: from the file extension or Content-Type)
+        - create_categories: 1 to create unknown category names instead of rejecting the row
+        - dry_run: 1 to validate only
+    Requests are limited to MAX_CONTENT_LENGTH; use scripts/import_products.py for larger catalogs.
+    """
+    try:
+        if 'file' in request.files:
+            upload = request.files['file']
+            stream, name, content_type = upload.stream, upload.filename or '', upload.mimetype
+        else:
+            stream, name, content_type = request.stream, '', request.mimetype
+
+        fmt = request.args.get('format')
+        if not fmt:
+            is_csv = name.lower().endswith('.csv') or content_type == 'text/csv'
+            fmt = 'csv' if is_csv else 'ndjson'
+
+        importer = ProductImporter(
+            batch_size=current_app.config['PRODUCT_IMPORT_BATCH_SIZE'],
+            max_errors=current_app.config['PRODUCT_IMPORT_MAX_ERRORS'],
+            create_categories=request.args.get('create_categories') in ('1', 'true'),
+            dry_run=request.args.get('dry_run') in ('1', 'true')
+        )
+        report = importer.run(read_rows(stream, fmt))
+
+        status = 200 if report['created'] or report['updated'] or not report['failed'] else 422
+        return jsonify(report), status
+
+    except ImportFormatError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/products/bulk-update', methods=['POST'])
+@admin_required
+def bulk_update_products():
+    """
+    Change prices and stock for many products in one transaction
+    Body: {
+        "updates": [
+            {"id": 1, "price": 19.99},
+            {"id": 2, "stock_quantity": 40},
+            {"id": 3, "stock_delta": -5, "price": 7.5}
+        ]
+    }
+    All updates apply or none do.
+    """
+    try:
+        data = request.get_json()
+        items = data.get('updates') if isinstance(data, dict) else data
+        changes = BulkProductUpdate.validate(items, current_app.config['BULK_UPDATE_MAX_ITEMS'])
+
+        updated = BulkProductUpdate.apply(changes)
+        db.session.commit()
+
+        # Refresh what caches product prices and stock levels in this process
+        if changes['prices']:
+            suggestion_index.update_prices(changes['prices'])
+        DashboardStats.invalidate()
+
+        return jsonify({
+            'message': 'Products updated successfully',
+            'updated': updated,
+            'price_updates': len(changes['prices']),
+            'stock_updates': len(changes['stock']) + len(changes['deltas'])
+        }), 200
+
+    except InvalidBulkUpdateError as e:
+        return jsonify({'error': str(e), 'details': e.details}), 400
+    except ProductsNotFoundError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e), 'product_ids': e.product_ids}), 404
+    except InsufficientStockError as e:
+        db.session.rollback()
+        shortfall = InventoryService.find_shortfall(e.quantities)
+        if not shortfall:
+            return jsonify({'error': 'Insufficient stock, please try again'}), 409
+
+        product_id, product_name, requested, available = shortfall
+        return jsonify({
+            'error': f'Not enough stock to remove {requested} of {product_name}',
+            'product_id': product_id,
+            'requested': requested,
+            'available': available
+        }), 409
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
 @bp.route('/products/<int:product_id>', methods=['PUT'])
 @admin_required
 def update_product(product_id):
@@ -171,6 +296,9 @@ def update_product(product_id):
 
         db.session.commit()
 
+        if 'name' in data or 'price' in data:
+            suggestion_index.add(product)
+
         return jsonify({
             'message': 'Product updated successfully',
             'product': product.to_dict()
@@ -197,6 +325,7 @@ def delete_product(product_id):
 
         db.session.delete(product)
         db.session.commit()
+        suggestion_index.remove(product_id)
 
         return jsonify({'message': 'Product deleted successfully'}), 200
 
@@ -211,7 +340,8 @@ def get_low_stock_products():
     """Get products with low stock"""
     try:
         threshold = request.args.get('threshold', 10, type=int)
-        products = Product.query.filter(Product.stock_quantity < threshold).all()
+        products = Product.query.options(joinedload(Product.category)) \
+            .filter(Product.stock_quantity < threshold).all()
 
         return jsonify({
             'products': [p.to_dict() for p in products],
@@ -222,6 +352,35 @@ def get_low_stock_products():
         return jsonify({'error': str(e)}), 500
 
 
+# ==================== Search Index Management ====================
+
+@bp.route('/search/suggestion-index', methods=['GET'])
+@admin_required
+def get_suggestion_index_stats():
+    """Get size and freshness of this worker's suggestion index"""
+    try:
+        return jsonify(suggestion_index.stats()), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/search/suggestion-index/rebuild', methods=['POST'])
+@admin_required
+def rebuild_suggestion_index():
+    """Rebuild this worker's suggestion index from the database"""
+    try:
+        suggestion_index.rebuild()
+
+        return jsonify({
+            'message': 'Suggestion index rebuilt',
+            'stats': suggestion_index.stats()
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 # ==================== Category Management ====================
 
 @bp.route('/categories', methods=['POST'])
@@ -328,6 +487,22 @@ def get_all_orders():
         if payment_status:
             query = query.filter_by(payment_status=payment_status)
 
+        # Keyset pagination when a cursor is supplied
+        cursor = request.args.get('cursor')
+        if cursor is not None:
+            orders, next_cursor = keyset_paginate(
+                query, Order.created_at, Order.id, cursor, per_page,
+                scope='admin_orders:created_at:desc'
+            )
+
+            return jsonify({
+                'orders': [order.to_dict() for order in orders],
+                'pagination': {
+                    'per_page': per_page,
+                    'next_cursor': next_cursor
+                }
+            }), 200
+
         orders = query.paginate(page=page, per_page=per_page, error_out=False)
 
         return jsonify({
@@ -340,6 +515,38 @@ def get_all_orders():
             }
         }), 200
 
+    except InvalidCursorError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+# ==================== Exports ====================
+
+@bp.route('/export/<dataset>', methods=['GET'])
+@admin_required
+def export_dataset(dataset):
+    """
+    Stream every matching row of orders, users or products
+    Query params:
+        - format: csv (default) or ndjson
+        - start, end: YYYY-MM-DD creation date range (inclusive)
+        - orders: status, payment_status, user_id; users: role; products: category_id
+          (comma separated values match any)
+    """
+    try:
+        fmt = request.args.get('format', 'csv')
+        names, query = DataExport.build(dataset, fmt, request.args)
+
+        filename = f"{dataset}-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.{fmt}"
+        return Response(
+            stream_with_context(DataExport.stream(names, query, fmt)),
+            mimetype=DataExport.FORMATS[fmt],
+            headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+        )
+
+    except ExportError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -405,9 +612,11 @@ def toggle_user_role(user_id):
         if not user:
             return jsonify({'error': 'User not found'}), 404
 
-        # Toggle role
+        # Toggle role and revoke tokens carrying the old role claim
         user.role = 'admin' if user.role == 'user' else 'user'
+        revoke_user_tokens(user.id)
         db.session.commit()
+        forget_token_version(user.id)
 
         return jsonify({
             'message': f'User role updated to {user.role}',
@@ -429,6 +638,22 @@ def get_all_reviews():
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
 
+        # Keyset pagination when a cursor is supplied
+        cursor = request.args.get('cursor')
+        if cursor is not None:
+            reviews, next_cursor = keyset_paginate(
+                Review.query, Review.created_at, Review.id, cursor, per_page,
+                scope='admin_reviews:created_at:desc'
+            )
+
+            return jsonify({
+                'reviews': [review.to_dict() for review in reviews],
+                'pagination': {
+                    'per_page': per_page,
+                    'next_cursor': next_cursor
+                }
+            }), 200
+
         reviews = Review.query.order_by(Review.created_at.desc()).paginate(
             page=page, per_page=per_page, error_out=False
         )
@@ -443,6 +668,8 @@ def get_all_reviews():
             }
         }), 200
 
+    except InvalidCursorError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -456,6 +683,7 @@ def delete_review(review_id):
         if not review:
             return jsonify({'error': 'Review not found'}), 404
 
+        Product.update_rating_aggregates(review.product_id, -review.rating, -1)
         db.session.delete(review)
         db.session.commit()
 
@@ -1,13 +1,21 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt, get_jwt_identity
 from app import db
 from app.models import User, Cart
+from app.services.password_hasher import HasherBusyError
 from app.utils.validators import validate_email_format, validate_password_strength, validate_required_fields
 from datetime import timedelta
 
 bp = Blueprint('auth', __name__, url_prefix='/api/auth')
 
 
+def busy_response():
+    """429 for when the password hashing pool is saturated"""
+    response = jsonify({'error': 'Too many login attempts in progress, please retry shortly'})
+    response.headers['Retry-After'] = '1'
+    return response, 429
+
+
 @bp.route('/register', methods=['POST'])
 def register():
     """Register a new user"""
@@ -60,9 +68,10 @@ def register():
         # Create access token
         access_token = create_access_token(
             identity=user.id,
+            additional_claims=user.token_claims(),
             expires_delta=timedelta(hours=24)
         )
-        refresh_token = create_refresh_token(identity=user.id)
+        refresh_token = create_refresh_token(identity=user.id, additional_claims={'tv': user.token_version})
 
         return jsonify({
             'message': 'User registered successfully',
@@ -71,6 +80,9 @@ def register():
             'refresh_token': refresh_token
         }), 201
 
+    except HasherBusyError:
+        db.session.rollback()
+        return busy_response()
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -98,12 +110,22 @@ def login():
         if not user or not user.check_password(data['password']):
             return jsonify({'error': 'Invalid email or password'}), 401
 
+        # Upgrade the stored hash if the configured bcrypt cost changed
+        if user.password_needs_rehash():
+            try:
+                user.set_password(data['password'])
+                db.session.commit()
+            except Exception:
+                # Not worth failing the login over; try again next time
+                db.session.rollback()
+
         # Create access tokens
         access_token = create_access_token(
             identity=user.id,
+            additional_claims=user.token_claims(),
             expires_delta=timedelta(hours=24)
         )
-        refresh_token = create_refresh_token(identity=user.id)
+        refresh_token = create_refresh_token(identity=user.id, additional_claims={'tv': user.token_version})
 
         return jsonify({
             'message': 'Login successful',
@@ -112,6 +134,8 @@ def login():
             'refresh_token': refresh_token
         }), 200
 
+    except HasherBusyError:
+        return busy_response()
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -122,8 +146,15 @@ def refresh():
     """Refresh access token"""
     try:
         current_user_id = get_jwt_identity()
+
+        # Pick up the current role; tokens issued before a role change are revoked
+        user = User.query.get(current_user_id)
+        if not user or get_jwt().get('tv', user.token_version) != user.token_version:
+            return jsonify({'error': 'Token has been revoked, please log in again'}), 401
+
         access_token = create_access_token(
             identity=current_user_id,
+            additional_claims=user.token_claims(),
             expires_delta=timedelta(hours=24)
         )
 
@@ -194,6 +225,9 @@ def change_password():
             'message': 'Password changed successfully'
         }), 200
 
+    except HasherBusyError:
+        db.session.rollback()
+        return busy_response()
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -12,7 +12,7 @@ def get_cart():
     """Get current user's cart"""
     try:
         current_user_id = get_jwt_identity()
-        cart = Cart.query.filter_by(user_id=current_user_id).first()
+        cart = Cart.load_for_user(current_user_id)
 
         if not cart:
             # Create cart if it doesn't exist
@@ -96,7 +96,7 @@ def add_to_cart():
 
         return jsonify({
             'message': 'Item added to cart',
-            'cart': cart.to_dict()
+            'cart': Cart.load_for_user(current_user_id).to_dict()
         }), 200
 
     except Exception as e:
@@ -142,7 +142,7 @@ def update_cart_item(item_id):
 
         return jsonify({
             'message': 'Cart updated',
-            'cart': cart_item.cart.to_dict()
+            'cart': Cart.load_for_user(current_user_id).to_dict()
         }), 200
 
     except Exception as e:
@@ -166,13 +166,12 @@ def remove_from_cart(item_id):
         if cart_item.cart.user_id != current_user_id:
             return jsonify({'error': 'Unauthorized'}), 403
 
-        cart = cart_item.cart
         db.session.delete(cart_item)
         db.session.commit()
 
         return jsonify({
             'message': 'Item removed from cart',
-            'cart': cart.to_dict()
+            'cart': Cart.load_for_user(current_user_id).to_dict()
         }), 200
 
     except Exception as e:
@@ -197,7 +196,7 @@ def clear_cart():
 
         return jsonify({
             'message': 'Cart cleared',
-            'cart': cart.to_dict()
+            'cart': Cart.load_for_user(current_user_id).to_dict()
         }), 200
 
     except Exception as e:
@@ -216,9 +215,11 @@ def get_cart_count():
         if not cart:
             return jsonify({'count': 0}), 200
 
+        total_items, subtotal = Cart.totals(cart.id)
+
         return jsonify({
-            'count': cart.total_items,
-            'subtotal': float(cart.subtotal)
+            'count': total_items,
+            'subtotal': float(subtotal)
         }), 200
 
     except Exception as e:
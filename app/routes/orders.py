@@ -1,8 +1,14 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy import insert
 from app import db
 from app.models import Order, OrderItem, Cart, CartItem, Product, Address, User
 from app.services.email_service import EmailService
+from app.services.email_sender import email_sender
+from app.services.inventory_service import InventoryService, InsufficientStockError
+from app.services.sales_rollup import SalesRollup
+from app.utils.decorators import admin_required, idempotent
+from app.utils.pagination import keyset_paginate, InvalidCursorError
 from decimal import Decimal
 
 bp = Blueprint('orders', __name__, url_prefix='/api/orders')
@@ -10,6 +16,7 @@ bp = Blueprint('orders', __name__, url_prefix='/api/orders')
 
 @bp.route('/checkout', methods=['POST'])
 @jwt_required()
+@idempotent
 def checkout():
     """Create order from cart"""
     try:
@@ -28,22 +35,29 @@ def checkout():
             return jsonify({'error': 'Invalid shipping address'}), 400
 
         # Get user's cart
-        cart = Cart.query.filter_by(user_id=current_user_id).first()
+        cart = Cart.load_for_user(current_user_id)
         if not cart or not cart.items:
             return jsonify({'error': 'Cart is empty'}), 400
 
-        # Validate stock for all items
-        for cart_item in cart.items:
-            if cart_item.product.stock_quantity < cart_item.quantity:
-                return jsonify({
-                    'error': f'Insufficient stock for {cart_item.product.name}',
-                    'product': cart_item.product.name,
-                    'requested': cart_item.quantity,
-                    'available': cart_item.product.stock_quantity
-                }), 400
+        # Reserve stock for all items atomically; fails if any line is short
+        quantities = {cart_item.product_id: cart_item.quantity for cart_item in cart.items}
+        InventoryService.reserve_stock(quantities)
 
-        # Calculate total
-        total_amount = cart.subtotal
+        # Build order lines and the total in one pass over the loaded cart
+        order_lines = []
+        rollup_lines = []
+        email_items = []
+        total_amount = Decimal('0')
+        for cart_item in cart.items:
+            price = cart_item.product.price
+            total_amount += price * cart_item.quantity
+            order_lines.append({
+                'product_id': cart_item.product_id,
+                'quantity': cart_item.quantity,
+                'price_at_purchase': price
+            })
+            rollup_lines.append((cart_item.product_id, cart_item.product.category_id, cart_item.quantity, price))
+            email_items.append((cart_item.product.name, cart_item.quantity, price * cart_item.quantity))
 
         # Create order
         order = Order(
@@ -56,33 +70,48 @@ def checkout():
         db.session.add(order)
         db.session.flush()  # Get order ID
 
-        # Create order items and reduce stock
-        for cart_item in cart.items:
-            order_item = OrderItem(
-                order_id=order.id,
-                product_id=cart_item.product_id,
-                quantity=cart_item.quantity,
-                price_at_purchase=cart_item.product.price
-            )
-            db.session.add(order_item)
-
-            # Reduce stock
-            cart_item.product.stock_quantity -= cart_item.quantity
+        # Create order items with a single bulk INSERT
+        for line in order_lines:
+            line['order_id'] = order.id
+        db.session.execute(insert(OrderItem), order_lines)
 
         # Clear cart
         CartItem.query.filter_by(cart_id=cart.id).delete()
 
-        db.session.commit()
+        SalesRollup.record_order_change(
+            order.id, order.created_at, total_amount, None, (order.status, order.payment_status), lines=rollup_lines
+        )
 
-        # Send order confirmation email
+        # Queue order confirmation email; it is only sent if the order commits
         user = User.query.get(current_user_id)
-        EmailService.send_order_confirmation(user.email, order)
+        EmailService.queue_order_confirmation(user.email, EmailService.order_snapshot(order, email_items))
+
+        order_id = order.id
+        db.session.commit()
+        email_sender.wake()
+
+        # Reload with items, products, address and payment in a fixed number of queries
+        order = Order.load_with_details(order_id)
 
         return jsonify({
             'message': 'Order created successfully',
             'order': order.to_dict()
         }), 201
 
+    except InsufficientStockError as e:
+        db.session.rollback()
+        shortfall = InventoryService.find_shortfall(e.quantities)
+        if not shortfall:
+            return jsonify({'error': 'Insufficient stock, please try again'}), 409
+
+        product_id, product_name, requested, available = shortfall
+        return jsonify({
+            'error': f'Insufficient stock for {product_name}',
+            'product': product_name,
+            'product_id': product_id,
+            'requested': requested,
+            'available': available
+        }), 409
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -107,6 +136,22 @@ def get_orders():
         if status:
             orders_query = orders_query.filter_by(status=status)
 
+        # Keyset pagination when a cursor is supplied
+        cursor = request.args.get('cursor')
+        if cursor is not None:
+            orders, next_cursor = keyset_paginate(
+                orders_query, Order.created_at, Order.id, cursor, per_page,
+                scope='orders:created_at:desc'
+            )
+
+            return jsonify({
+                'orders': [order.to_dict() for order in orders],
+                'pagination': {
+                    'per_page': per_page,
+                    'next_cursor': next_cursor
+                }
+            }), 200
+
         # Paginate
         orders = orders_query.paginate(page=page, per_page=per_page, error_out=False)
 
@@ -120,6 +165,8 @@ def get_orders():
             }
         }), 200
 
+    except InvalidCursorError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -152,7 +199,9 @@ def cancel_order(order_id):
     try:
         current_user_id = get_jwt_identity()
 
-        order = Order.query.get(order_id)
+        # Lock the order so a payment finalized meanwhile waits for this cancel
+        # (and then sees it) instead of both working from the same old status
+        order = db.session.get(Order, order_id, with_for_update=True)
         if not order:
             return jsonify({'error': 'Order not found'}), 404
 
@@ -165,10 +214,13 @@ def cancel_order(order_id):
             return jsonify({'error': f'Cannot cancel order with status: {order.status}'}), 400
 
         # Restore stock
-        for item in order.items:
-            item.product.stock_quantity += item.quantity
+        InventoryService.release_order_stock(order.id)
 
         # Update order status
+        SalesRollup.record_order_change(
+            order.id, order.created_at, order.total_amount,
+            (order.status, order.payment_status), ('cancelled', 'failed')
+        )
         order.status = 'cancelled'
         order.payment_status = 'failed'
 
@@ -185,19 +237,14 @@ def cancel_order(order_id):
 
 
 @bp.route('/<int:order_id>/status', methods=['PUT'])
-@jwt_required()
+@admin_required
 def update_order_status(order_id):
     """Update order status (admin or system use)"""
     try:
-        current_user_id = get_jwt_identity()
         data = request.get_json()
 
-        # Check if user is admin
-        user = User.query.get(current_user_id)
-        if not user or user.role != 'admin':
-            return jsonify({'error': 'Admin access required'}), 403
-
-        order = Order.query.get(order_id)
+        # Locked until commit, like cancel_order
+        order = db.session.get(Order, order_id, with_for_update=True)
         if not order:
             return jsonify({'error': 'Order not found'}), 404
 
@@ -213,14 +260,22 @@ def update_order_status(order_id):
 
         old_status = order.status
         order.status = new_status
-        db.session.commit()
+        SalesRollup.record_order_change(
+            order.id, order.created_at, order.total_amount,
+            (old_status, order.payment_status), (new_status, order.payment_status)
+        )
+
+        # Queue email notification based on status change, in the same transaction
+        if new_status != old_status and new_status in ['shipped', 'delivered']:
+            user = User.query.get(order.user_id)
+            snapshot = EmailService.order_snapshot(order, items=[])
+            if new_status == 'shipped':
+                EmailService.queue_order_shipped(user.email, snapshot)
+            else:
+                EmailService.queue_order_delivered(user.email, snapshot)
 
-        # Send email notification based on status change
-        user = User.query.get(order.user_id)
-        if new_status == 'shipped' and old_status != 'shipped':
-            EmailService.send_order_shipped(user.email, order)
-        elif new_status == 'delivered' and old_status != 'delivered':
-            EmailService.send_order_delivered(user.email, order)
+        db.session.commit()
+        email_sender.wake()
 
         return jsonify({
             'message': 'Order status updated',
@@ -1,16 +1,23 @@
 """Payment routes"""
+import math
+import time
 from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
 from app.models import Payment, Order, User
 from app.services.payment_simulator import PaymentSimulator
-from app.utils.decorators import admin_required
+from app.services.payment_notifier import TooManyWaitersError, payment_notifier
+from app.services.inventory_service import InventoryService
+from app.services.sales_rollup import SalesRollup
+from app.services.task_queue import QueueFullError
+from app.utils.decorators import admin_required, idempotent
 
 bp = Blueprint('payments', __name__, url_prefix='/api/payments')
 
 
 @bp.route('/initiate', methods=['POST'])
 @jwt_required()
+@idempotent
 def initiate_payment():
     """
     Initiate payment for an order
@@ -84,12 +91,19 @@ def initiate_payment():
         db.session.commit()
 
         # Simulate async webhook processing
-        PaymentSimulator.simulate_webhook_callback(
-            payment.id,
-            '/api/payments/webhook',
-            payment,
-            db
-        )
+        try:
+            PaymentSimulator.simulate_webhook_callback(
+                payment.id,
+                '/api/payments/webhook'
+            )
+        except QueueFullError:
+            # Payment stays 'processing'; retrying re-queues it
+            response = jsonify({
+                'error': 'Payment processing is busy, please retry shortly',
+                'transaction_id': transaction_id
+            })
+            response.headers['Retry-After'] = '1'
+            return response, 503
 
         return jsonify({
             'message': message,
@@ -125,6 +139,70 @@ def check_payment_status(transaction_id):
         return jsonify({'error': str(e)}), 500
 
 
+@bp.route('/status/<transaction_id>/wait', methods=['GET'])
+@jwt_required()
+def wait_for_payment_status(transaction_id):
+    """
+    Long-poll for a payment status change
+    Query params:
+        - status: the status the client already has (default: processing)
+        - timeout: seconds to wait, capped at PAYMENT_STATUS_MAX_WAIT (default: the cap)
+    Returns as soon as the payment's status differs from `status`, or with
+    the unchanged payment once the timeout expires, so the client can simply
+    call again. Past PAYMENT_STATUS_MAX_WAITERS parked requests in this
+    process, new ones get 429 with a Retry-After header.
+    """
+    try:
+        current_user_id = get_jwt_identity()
+        known_status = request.args.get('status', 'processing')
+
+        max_wait = current_app.config.get('PAYMENT_STATUS_MAX_WAIT', 25)
+        recheck_interval = current_app.config.get('PAYMENT_STATUS_RECHECK_INTERVAL', 5)
+        max_waiters = current_app.config.get('PAYMENT_STATUS_MAX_WAITERS', 500)
+        try:
+            timeout = min(max(float(request.args.get('timeout', max_wait)), 0), max_wait)
+        except ValueError:
+            return jsonify({'error': 'timeout must be a number'}), 400
+
+        deadline = time.monotonic() + timeout
+
+        # Each parked request holds a server thread; shed load past the cap
+        try:
+            subscription = payment_notifier.subscribe(transaction_id, max_waiters=max_waiters)
+        except TooManyWaitersError:
+            response = jsonify({'error': 'Too many requests waiting for payment updates, please retry shortly'})
+            response.headers['Retry-After'] = str(max(1, math.ceil(recheck_interval)))
+            return response, 429
+
+        # Subscribed before the first read so a change in between isn't missed
+        with subscription:
+            payment = Payment.query.filter_by(transaction_id=transaction_id).first()
+            if not payment:
+                return jsonify({'error': 'Payment not found'}), 404
+
+            # Verify user owns the order
+            if payment.order.user_id != current_user_id:
+                return jsonify({'error': 'Unauthorized'}), 403
+
+            while payment.status == known_status:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+
+                # Don't hold a DB connection while parked
+                db.session.close()
+
+                # Woken immediately by this process's payment worker; the
+                # periodic re-read picks up changes made by other processes
+                subscription.wait(min(remaining, recheck_interval))
+                payment = Payment.query.filter_by(transaction_id=transaction_id).first()
+
+        return jsonify(payment.to_dict()), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @bp.route('/order/<int:order_id>', methods=['GET'])
 @jwt_required()
 def get_order_payment(order_id):
@@ -164,8 +242,8 @@ def refund_payment(payment_id):
     try:
         data = request.get_json()
 
-        # Get payment
-        payment = Payment.query.get(payment_id)
+        # Get payment, locked so concurrent refunds of it run one after the other
+        payment = db.session.get(Payment, payment_id, with_for_update=True)
         if not payment:
             return jsonify({'error': 'Payment not found'}), 404
 
@@ -191,15 +269,21 @@ def refund_payment(payment_id):
         payment.status = 'refunded'
 
         # Update order status
-        order = payment.order
+        order = db.session.get(Order, payment.order_id, with_for_update=True)
+        was_cancelled = order.status == 'cancelled'
+        SalesRollup.record_order_change(
+            order.id, order.created_at, order.total_amount,
+            (order.status, order.payment_status), ('cancelled', 'refunded'), refunded_amount=refund_amount
+        )
         order.status = 'cancelled'
         order.payment_status = 'refunded'
 
-        # Restore stock
-        for item in order.items:
-            item.product.stock_quantity += item.quantity
+        # Restore stock, unless cancelling the order already did
+        if not was_cancelled:
+            InventoryService.release_order_stock(order.id)
 
         db.session.commit()
+        payment_notifier.publish(payment.transaction_id)
 
         return jsonify({
             'message': message,
@@ -212,6 +296,20 @@ def refund_payment(payment_id):
         return jsonify({'error': str(e)}), 500
 
 
+@bp.route('/queue/stats', methods=['GET'])
+@admin_required
+def get_payment_queue_stats():
+    """Get depth and throughput of this worker's payment finalization queue (admin only)"""
+    try:
+        stats = PaymentSimulator.executor.metrics()
+        stats['simulator'] = PaymentSimulator.settings()
+        stats['status_waiters'] = payment_notifier.waiting()
+        return jsonify(stats), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @bp.route('/methods', methods=['GET'])
 def get_payment_methods():
     """Get list of supported payment methods"""
@@ -1,9 +1,13 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from sqlalchemy import or_, and_
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload
 from app import db
 from app.models import Product, Category, Review, User
+from app.services.search_service import ProductSearch
+from app.services.suggestion_index import suggestion_index
 from app.utils.decorators import admin_required
+from app.utils.pagination import keyset_paginate, InvalidCursorError
 
 bp = Blueprint('products', __name__, url_prefix='/api/products')
 
@@ -19,9 +23,11 @@ def get_products():
     - min_price: Minimum price filter
     - max_price: Maximum price filter
     - search: Search in product name and description
-    - sort_by: Sort field (price, name, rating, created_at)
+    - sort_by: Sort field (price, name, rating, created_at, relevance)
     - order: Sort order (asc, desc)
     - min_rating: Minimum average rating
+    - cursor: Opt into keyset pagination (empty for the first page, then the
+      returned next_cursor); page is ignored and no total is computed
     """
     try:
         # Pagination parameters
@@ -29,8 +35,8 @@ def get_products():
         per_page = request.args.get('per_page', 12, type=int)
         per_page = min(per_page, 100)  # Max 100 items per page
 
-        # Build query
-        query = Product.query
+        # Build query (category is joined so serialization doesn't lazy load it per row)
+        query = Product.query.options(joinedload(Product.category))
 
         # Category filter
         category_id = request.args.get('category_id', type=int)
@@ -45,48 +51,68 @@ def get_products():
         if max_price is not None:
             query = query.filter(Product.price <= max_price)
 
-        # Search filter
+        # Search filter (full-text index where available)
         search = request.args.get('search', '').strip()
+        relevance = None
         if search:
-            search_pattern = f'%{search}%'
-            query = query.filter(
-                or_(
-                    Product.name.ilike(search_pattern),
-                    Product.description.ilike(search_pattern)
-                )
-            )
+            query, relevance = ProductSearch.filter_query(query, search)
 
         # Stock filter (only show in-stock by default)
         show_out_of_stock = request.args.get('show_out_of_stock', 'false').lower() == 'true'
         if not show_out_of_stock:
             query = query.filter(Product.stock_quantity > 0)
 
-        # Get all products for rating filter (need to compute average)
-        products_list = query.all()
+        # Average rating comes from the denormalized aggregate columns so
+        # filtering, sorting and pagination all run in SQL
+        min_rating = request.args.get('min_rating', type=float)
+        sort_by = request.args.get('sort_by', 'created_at')
+        order = request.args.get('order', 'desc')
 
         # Apply rating filter if specified
-        min_rating = request.args.get('min_rating', type=float)
         if min_rating is not None:
-            products_list = [p for p in products_list if p.average_rating >= min_rating]
+            query = query.filter(Product.average_rating >= min_rating)
 
         # Sorting
-        sort_by = request.args.get('sort_by', 'created_at')
-        order = request.args.get('order', 'desc')
-
         if sort_by == 'price':
-            products_list.sort(key=lambda x: float(x.price), reverse=(order == 'desc'))
+            sort_column = Product.price
         elif sort_by == 'name':
-            products_list.sort(key=lambda x: x.name.lower(), reverse=(order == 'desc'))
+            sort_column = func.lower(Product.name)
         elif sort_by == 'rating':
-            products_list.sort(key=lambda x: x.average_rating, reverse=(order == 'desc'))
+            sort_column = Product.average_rating
+        elif sort_by == 'relevance' and relevance is not None:
+            sort_column = relevance
         else:  # created_at or default
-            products_list.sort(key=lambda x: x.created_at, reverse=(order == 'desc'))
+            sort_by = 'created_at'
+            sort_column = Product.created_at
+
+        # Keyset pagination: seek past the cursor instead of counting and offsetting
+        cursor = request.args.get('cursor')
+        if cursor is not None:
+            if sort_by == 'relevance':
+                return jsonify({'error': 'Cursor pagination is not supported for relevance sorting'}), 400
+
+            paginated_products, next_cursor = keyset_paginate(
+                query, sort_column, Product.id, cursor, per_page,
+                descending=(order == 'desc'),
+                scope=f'products:{sort_by}:{order}'
+            )
 
-        # Manual pagination
-        total = len(products_list)
-        start = (page - 1) * per_page
-        end = start + per_page
-        paginated_products = products_list[start:end]
+            return jsonify({
+                'products': [product.to_dict() for product in paginated_products],
+                'pagination': {
+                    'per_page': per_page,
+                    'next_cursor': next_cursor
+                }
+            }), 200
+
+        sort_column = sort_column.desc() if order == 'desc' else sort_column.asc()
+
+        # Pagination in SQL; id keeps the ordering of ties stable across pages
+        total = query.order_by(None).count()
+        paginated_products = query.order_by(sort_column, Product.id.asc()) \
+            .offset((max(page, 1) - 1) * per_page) \
+            .limit(per_page) \
+            .all()
 
         return jsonify({
             'products': [product.to_dict() for product in paginated_products],
@@ -98,6 +124,8 @@ def get_products():
             }
         }), 200
 
+    except InvalidCursorError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -147,7 +175,9 @@ def get_category(category_id):
             return jsonify({'error': 'Category not found'}), 404
 
         category_data = category.to_dict()
-        category_data['products'] = [product.to_dict() for product in category.products]
+        products = Product.query.options(joinedload(Product.category)) \
+            .filter_by(category_id=category_id).all()
+        category_data['products'] = [product.to_dict() for product in products]
         category_data['subcategories'] = [sub.to_dict() for sub in category.subcategories]
 
         return jsonify(category_data), 200
@@ -217,6 +247,7 @@ def add_product_review(product_id):
         )
 
         db.session.add(review)
+        Product.update_rating_aggregates(product_id, rating, 1)
         db.session.commit()
 
         return jsonify({
@@ -238,13 +269,12 @@ def search_suggestions():
         if not query or len(query) < 2:
             return jsonify({'suggestions': []}), 200
 
-        # Search in product names
-        search_pattern = f'%{query}%'
-        products = Product.query.filter(
-            Product.name.ilike(search_pattern)
-        ).limit(10).all()
-
-        suggestions = [{'id': p.id, 'name': p.name, 'price': float(p.price)} for p in products]
+        # Served from the in-memory prefix index; database prefix search if disabled
+        if current_app.config.get('SUGGESTION_INDEX_ENABLED', True):
+            suggestions = suggestion_index.suggest(query, limit=10)
+        else:
+            products = ProductSearch.suggest(query, limit=10)
+            suggestions = [{'id': p.id, 'name': p.name, 'price': float(p.price)} for p in products]
 
         return jsonify({'suggestions': suggestions}), 200
 
@@ -1,6 +1,7 @@
 """Wishlist routes"""
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy.orm import joinedload
 from app import db
 from app.models import Wishlist, Product
 
@@ -14,7 +15,9 @@ def get_wishlist():
     try:
         current_user_id = get_jwt_identity()
 
-        wishlist_items = Wishlist.query.filter_by(user_id=current_user_id).all()
+        wishlist_items = Wishlist.query.options(
+            joinedload(Wishlist.product).joinedload(Product.category)
+        ).filter_by(user_id=current_user_id).all()
 
         return jsonify({
             'wishlist': [item.to_dict() for item in wishlist_items],
@@ -0,0 +1,88 @@
+"""Admin dashboard statistics from grouped aggregate queries"""
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import case, func, select
+
+from app import db
+from app.models import Order, OrderItem, Product, User
+from app.utils.cache import TTLCache
+
+# Single entry: the last computed dashboard, kept for DASHBOARD_CACHE_TTL seconds
+dashboard_cache = TTLCache(ttl=30, maxsize=1)
+
+
+class DashboardStats:
+    """
+    Builds the admin dashboard in two statements: one pass over orders with
+    conditional counts and a SQL SUM (users, products and low stock ride
+    along as scalar subqueries), then the top sellers. Results are cached
+    briefly since the numbers only need to be roughly current.
+    """
+
+    CACHE_KEY = 'dashboard'
+    ORDER_STATUSES = ('pending', 'processing', 'shipped', 'delivered')
+    LOW_STOCK_THRESHOLD = 10
+    RECENT_DAYS = 30
+    TOP_PRODUCTS = 5
+
+    @staticmethod
+    def _count_where(condition):
+        return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+    @classmethod
+    def compute(cls):
+        """Run the aggregate queries; returns the dashboard JSON payload"""
+        recent_cutoff = datetime.utcnow() - timedelta(days=cls.RECENT_DAYS)
+
+        totals = db.session.execute(
+            select(
+                func.count(Order.id).label('total_orders'),
+                func.coalesce(func.sum(
+                    case((Order.payment_status == 'completed', Order.total_amount), else_=0)
+                ), 0).label('total_revenue'),
+                cls._count_where(Order.created_at >= recent_cutoff).label('recent_orders'),
+                *[cls._count_where(Order.status == status).label(status) for status in cls.ORDER_STATUSES],
+                select(func.count(User.id)).where(User.role == 'user').scalar_subquery().label('total_users'),
+                select(func.count(Product.id)).scalar_subquery().label('total_products'),
+                select(func.count(Product.id)).where(
+                    Product.stock_quantity < cls.LOW_STOCK_THRESHOLD
+                ).scalar_subquery().label('low_stock')
+            ).select_from(Order)
+        ).one()
+
+        total_sold = func.sum(OrderItem.quantity)
+        top_products = db.session.execute(
+            select(Product.name, total_sold)
+            .join(OrderItem, OrderItem.product_id == Product.id)
+            .group_by(Product.id, Product.name)
+            .order_by(total_sold.desc())
+            .limit(cls.TOP_PRODUCTS)
+        ).all()
+
+        return {
+            'overview': {
+                'total_users': totals.total_users,
+                'total_products': totals.total_products,
+                'total_orders': totals.total_orders,
+                'total_revenue': float(totals.total_revenue),
+                'recent_orders_30d': int(totals.recent_orders)
+            },
+            'orders': {status: int(getattr(totals, status)) for status in cls.ORDER_STATUSES},
+            'inventory': {
+                'low_stock_count': totals.low_stock
+            },
+            'top_products': [{'name': name, 'sold': int(sold)} for name, sold in top_products]
+        }
+
+    @classmethod
+    def get(cls):
+        """The dashboard payload, served from cache when fresh"""
+        return dashboard_cache.get_or_set(
+            cls.CACHE_KEY, cls.compute, ttl=current_app.config.get('DASHBOARD_CACHE_TTL', 30)
+        )
+
+    @classmethod
+    def invalidate(cls):
+        """Drop the cached dashboard so the next request recomputes it"""
+        dashboard_cache.invalidate(cls.CACHE_KEY)
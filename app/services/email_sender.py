@@ -0,0 +1,161 @@
+"""Background delivery of the email outbox"""
+from threading import Event, Thread
+from flask import current_app
+from app.services.task_queue import BoundedExecutor
+
+
+class EmailSender:
+    """
+    Delivers EmailOutbox rows on a bounded worker pool. A poller thread
+    claims due messages in batches and renders each batch up front, a kind
+    at a time; failed deliveries are retried with
+    exponential backoff until EMAIL_MAX_ATTEMPTS is reached. Each process
+    running the sender claims its own rows, so several can run side by side.
+    """
+
+    def __init__(self):
+        self.executor = BoundedExecutor('email-sender')
+        self.batch_size = 50
+        self.poll_interval = 2.0
+        self.max_attempts = 5
+        self.retry_base = 30.0
+        self.retry_max = 3600.0
+        self.lease_seconds = 300
+        self._wake = Event()
+        self._stop = Event()
+        self._thread = None
+
+    def init_app(self, app):
+        """
+        Configure from app settings. The poller is not started here, so
+        importing the app (shells, scripts, forking servers) spawns no
+        threads; run.py or scripts/run_email_worker.py starts it.
+        """
+        self.batch_size = app.config.get('EMAIL_BATCH_SIZE', 50)
+        self.poll_interval = app.config.get('EMAIL_POLL_INTERVAL', 2.0)
+        self.max_attempts = app.config.get('EMAIL_MAX_ATTEMPTS', 5)
+        self.retry_base = app.config.get('EMAIL_RETRY_BASE', 30.0)
+        self.retry_max = app.config.get('EMAIL_RETRY_MAX', 3600.0)
+        self.lease_seconds = app.config.get('EMAIL_LEASE_SECONDS', 300)
+        self.executor.configure(
+            max_workers=app.config.get('EMAIL_WORKERS', 4),
+            max_queue_size=self.batch_size
+        )
+
+    def start(self, app):
+        """Run the poller on a daemon thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = Thread(target=self.run_forever, args=(app,), name='email-outbox-poller', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.executor.shutdown(timeout)
+
+    def wake(self):
+        """Deliver newly committed messages now instead of at the next poll"""
+        self._wake.set()
+
+    def run_forever(self, app):
+        """Poll until stopped (used by the poller thread and the standalone worker)"""
+        while not self._stop.is_set():
+            try:
+                with app.app_context():
+                    stats = self.process_due()
+            except Exception as e:
+                app.logger.warning(f'Email outbox poll failed: {e}')
+                stats = None
+
+            # A full batch means more are probably waiting
+            if stats and stats['claimed'] >= self.batch_size:
+                continue
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+    def process_due(self):
+        """
+        Claim and deliver one batch of due messages (needs an app context)
+        Returns: {'claimed', 'sent', 'retrying', 'failed'}
+        """
+        from app import db
+        from app.models import EmailOutbox
+
+        app = current_app._get_current_object()
+        messages = EmailOutbox.claim_due(self.batch_size, self.lease_seconds)
+        jobs = [
+            (message.id, message.locked_by, message.kind, message.to_email, message.payload, message.attempts)
+            for message in messages
+        ]
+        # Delivery runs in worker threads with their own sessions
+        db.session.close()
+
+        stats = {'claimed': len(jobs), 'sent': 0, 'retrying': 0, 'failed': 0}
+        rendered = self._render(jobs)
+        futures = [
+            self.executor.submit(self._deliver, app, message_id, token, to_email, attempts, rendered[message_id])
+            for message_id, token, kind, to_email, payload, attempts in jobs
+        ]
+        for future in futures:
+            stats[future.result()] += 1
+        return stats
+
+    @staticmethod
+    def _render(jobs):
+        """
+        Render claimed messages, a whole kind at a time
+        Returns: {message_id: (subject, body, html_body) or the rendering exception}
+        """
+        from app.services.email_service import EmailService
+
+        by_kind = {}
+        for message_id, token, kind, to_email, payload, attempts in jobs:
+            by_kind.setdefault(kind, []).append((message_id, payload))
+
+        rendered = {}
+        for kind, entries in by_kind.items():
+            try:
+                results = EmailService.render_batch(kind, [payload for _, payload in entries])
+                rendered.update(zip([message_id for message_id, _ in entries], results))
+            except Exception:
+                # Find the bad ones without failing the rest of the batch
+                for message_id, payload in entries:
+                    try:
+                        rendered[message_id] = EmailService.render(kind, payload)
+                    except Exception as e:
+                        rendered[message_id] = e
+        return rendered
+
+    def _retry_delay(self, attempts):
+        return min(self.retry_base * (2 ** (attempts - 1)), self.retry_max)
+
+    def _deliver(self, app, message_id, token, to_email, attempts, rendered):
+        from app.models import EmailOutbox
+        from app.services.email_service import EmailService
+
+        with app.app_context():
+            if isinstance(rendered, Exception):
+                # A payload that can't be rendered won't render next time either
+                EmailOutbox.mark_failed(message_id, token, f'Rendering failed: {rendered!r}')
+                return 'failed'
+
+            try:
+                EmailService.transport.send(to_email, *rendered)
+            except Exception as e:
+                attempts += 1
+                if attempts >= self.max_attempts:
+                    EmailOutbox.mark_failed(message_id, token, str(e))
+                    app.logger.error(f'Giving up on email {message_id} after {attempts} attempts: {e}')
+                    return 'failed'
+                EmailOutbox.mark_failed(message_id, token, str(e), retry_in=self._retry_delay(attempts))
+                return 'retrying'
+
+            EmailOutbox.mark_sent(message_id, token)
+            return 'sent'
+
+
+email_sender = EmailSender()
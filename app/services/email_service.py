@@ -1,18 +1,32 @@
 """Email notification service (simulation)"""
-from datetime import datetime
+from app.services.email_templates import TEMPLATES
+from app.services.email_transport import ConsoleTransport, create_transport
 
 
 class EmailService:
     """
     Email service for sending notifications
     In production, this would integrate with services like SendGrid, Mailgun, or AWS SES
-    For now, it simulates email sending and logs to console
+    Delivery goes through a pluggable transport (console, SMTP or in-memory).
+
+    Order emails are not sent inline: queue_* methods add them to the
+    EmailOutbox in the caller's transaction and the background EmailSender
+    delivers them. Templates (app/services/email_templates.py) are compiled
+    once and render from plain snapshots (see order_snapshot), so delivery
+    never needs to touch the ORM.
     """
 
-    @staticmethod
-    def send_email(to_email, subject, body, html_body=None):
+    transport = ConsoleTransport()
+
+    @classmethod
+    def init_app(cls, app):
+        """Select the delivery transport from app config"""
+        cls.transport = create_transport(app.config)
+
+    @classmethod
+    def send_email(cls, to_email, subject, body, html_body=None):
         """
-        Send email (simulated)
+        Send email through the configured transport
 
         Args:
             to_email: Recipient email address
@@ -23,158 +37,109 @@ class EmailService:
         Returns:
             (success: bool, message: str)
         """
-        print(f"\n{'='*60}")
-        print(f"📧 EMAIL SENT")
-        print(f"{'='*60}")
-        print(f"To: {to_email}")
-        print(f"Subject: {subject}")
-        print(f"Time: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')}")
-        print(f"\nBody:\n{body}")
-        if html_body:
-            print(f"\nHTML Body:\n{html_body}")
-        print(f"{'='*60}\n")
-
-        return True, "Email sent successfully (simulated)"
-
-    @staticmethod
-    def send_order_confirmation(user_email, order):
-        """Send order confirmation email"""
-        subject = f"Order Confirmation - Order #{order.id}"
-
-        body = f"""
-Dear Customer,
-
-Thank you for your order!
-
-Order Details:
-- Order ID: #{order.id}
-- Total Amount: ${order.total_amount}
-- Status: {order.status}
-- Payment Status: {order.payment_status}
-
-Items:
-"""
-        for item in order.items:
-            body += f"- {item.product.name} x {item.quantity} = ${item.subtotal}\n"
-
-        body += f"""
-We'll send you another email when your order ships.
-
-Thank you for shopping with us!
-
-Best regards,
-E-Commerce Team
-"""
+        try:
+            cls.transport.send(to_email, subject, body, html_body)
+        except Exception as e:
+            return False, f"Email delivery failed: {e}"
 
-        return EmailService.send_email(user_email, subject, body)
+        return True, "Email sent successfully"
 
     @staticmethod
-    def send_order_shipped(user_email, order):
-        """Send order shipped notification"""
-        subject = f"Order Shipped - Order #{order.id}"
-
-        body = f"""
-Dear Customer,
-
-Great news! Your order has been shipped.
-
-Order ID: #{order.id}
-Total: ${order.total_amount}
-
-Your order is on its way and should arrive soon.
-
-Track your order in your account dashboard.
-
-Best regards,
-E-Commerce Team
-"""
-
-        return EmailService.send_email(user_email, subject, body)
+    def order_snapshot(order, items=None):
+        """
+        Everything the order templates need, as JSON-safe values
+        items: [(product_name, quantity, subtotal)]; defaults to walking order.items
+        """
+        if items is None:
+            items = [(item.product.name, item.quantity, item.subtotal) for item in order.items]
+
+        return {
+            'order_id': order.id,
+            'total_amount': str(order.total_amount),
+            'status': order.status,
+            'payment_status': order.payment_status,
+            'items': [
+                {'name': name, 'quantity': quantity, 'subtotal': str(subtotal)}
+                for name, quantity, subtotal in items
+            ]
+        }
+
+    @classmethod
+    def queue(cls, kind, to_email, payload):
+        """Add an email to the outbox in the caller's transaction"""
+        from app.models import EmailOutbox
+
+        if kind not in TEMPLATES:
+            raise ValueError(f'Unknown email kind {kind!r}')
+        return EmailOutbox.enqueue(kind, to_email, payload)
 
     @staticmethod
-    def send_order_delivered(user_email, order):
-        """Send order delivered notification"""
-        subject = f"Order Delivered - Order #{order.id}"
-
-        body = f"""
-Dear Customer,
-
-Your order has been delivered!
-
-Order ID: #{order.id}
-Total: ${order.total_amount}
-
-We hope you enjoy your purchase. Please leave a review if you're satisfied!
-
-Best regards,
-E-Commerce Team
-"""
-
-        return EmailService.send_email(user_email, subject, body)
+    def render(kind, payload):
+        """Returns: (subject, body, html_body)"""
+        return TEMPLATES[kind].render(payload)
 
     @staticmethod
-    def send_password_reset(user_email, reset_token):
+    def render_batch(kind, payloads):
+        """Render many emails of one kind at once. Returns: [(subject, body, html_body)]"""
+        return TEMPLATES[kind].render_batch(payloads)
+
+    @classmethod
+    def deliver(cls, kind, to_email, payload):
+        """Render and send an outbox message; raises if the transport fails"""
+        subject, body, html_body = cls.render(kind, payload)
+        cls.transport.send(to_email, subject, body, html_body)
+
+    @classmethod
+    def send_templated(cls, kind, to_email, payload):
+        """Render and send immediately, bypassing the outbox"""
+        subject, body, html_body = cls.render(kind, payload)
+        return cls.send_email(to_email, subject, body, html_body)
+
+    @classmethod
+    def queue_order_confirmation(cls, user_email, snapshot):
+        """Queue order confirmation email"""
+        return cls.queue('order_confirmation', user_email, snapshot)
+
+    @classmethod
+    def queue_order_shipped(cls, user_email, snapshot):
+        """Queue order shipped notification"""
+        return cls.queue('order_shipped', user_email, snapshot)
+
+    @classmethod
+    def queue_order_delivered(cls, user_email, snapshot):
+        """Queue order delivered notification"""
+        return cls.queue('order_delivered', user_email, snapshot)
+
+    @classmethod
+    def send_order_confirmation(cls, user_email, order):
+        """Send order confirmation email immediately"""
+        return cls.send_templated('order_confirmation', user_email, cls.order_snapshot(order))
+
+    @classmethod
+    def send_order_shipped(cls, user_email, order):
+        """Send order shipped notification immediately"""
+        return cls.send_templated('order_shipped', user_email, cls.order_snapshot(order, items=[]))
+
+    @classmethod
+    def send_order_delivered(cls, user_email, order):
+        """Send order delivered notification immediately"""
+        return cls.send_templated('order_delivered', user_email, cls.order_snapshot(order, items=[]))
+
+    @classmethod
+    def send_password_reset(cls, user_email, reset_token):
         """Send password reset email"""
-        subject = "Password Reset Request"
-
-        body = f"""
-Dear Customer,
-
-We received a request to reset your password.
-
-Reset Token: {reset_token}
+        return cls.send_templated('password_reset', user_email, {'reset_token': reset_token})
 
-If you didn't request this, please ignore this email.
-
-This link will expire in 1 hour.
-
-Best regards,
-E-Commerce Team
-"""
-
-        return EmailService.send_email(user_email, subject, body)
-
-    @staticmethod
-    def send_welcome_email(user_email, user_name):
+    @classmethod
+    def send_welcome_email(cls, user_email, user_name):
         """Send welcome email to new users"""
-        subject = "Welcome to Our E-Commerce Store!"
-
-        body = f"""
-Dear {user_name},
+        return cls.send_templated('welcome', user_email, {'user_name': user_name})
 
-Welcome to our e-commerce platform!
-
-Thank you for creating an account. We're excited to have you as part of our community.
-
-Start shopping now and enjoy:
-- Free shipping on orders over $50
-- Exclusive deals for members
-- Easy returns and exchanges
-
-Happy shopping!
-
-Best regards,
-E-Commerce Team
-"""
-
-        return EmailService.send_email(user_email, subject, body)
-
-    @staticmethod
-    def send_low_stock_alert(admin_email, product):
+    @classmethod
+    def send_low_stock_alert(cls, admin_email, product):
         """Send low stock alert to admin"""
-        subject = f"Low Stock Alert - {product.name}"
-
-        body = f"""
-Low Stock Alert!
-
-Product: {product.name}
-Product ID: {product.id}
-Current Stock: {product.stock_quantity}
-
-Please restock this product soon.
-
-Best regards,
-Inventory Management System
-"""
-
-        return EmailService.send_email(admin_email, subject, body)
+        return cls.send_templated('low_stock_alert', admin_email, {
+            'product_name': product.name,
+            'product_id': product.id,
+            'stock_quantity': product.stock_quantity
+        })
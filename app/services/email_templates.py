@@ -0,0 +1,273 @@
+"""Precompiled email templates (plain text + HTML)"""
+from html import escape
+from string import Template
+
+
+HTML_LAYOUT = """<!DOCTYPE html>
+<html>
+<body style="font-family: Arial, sans-serif; color: #333;">
+<h2>$$title</h2>
+$content
+<p>Best regards,<br>$$signature</p>
+</body>
+</html>
+"""
+
+
+def compile_template(text, html=False, raw_fields=()):
+    """
+    Compile $-placeholder template text (string.Template syntax) into a
+    function of a values dict. The text is split into literal and placeholder
+    segments once, here; a render is then a single str.format call with no
+    regex matching or per-call parsing. With html=True, values are
+    HTML-escaped (by `escape`, given per render), except `raw_fields`, which
+    hold already-rendered HTML.
+    """
+    pieces = []
+    fields = []  # (placeholder name, escape the value)
+    position = 0
+    for match in Template.pattern.finditer(text):
+        literal = text[position:match.start()]
+        position = match.end()
+        if match.group('escaped') is not None:
+            literal += '$'
+        elif match.group('invalid') is not None:
+            raise ValueError(f'Invalid placeholder in email template at position {match.start()}')
+        pieces.append(literal.replace('{', '{{').replace('}', '}}'))
+        name = match.group('named') or match.group('braced')
+        if name:
+            pieces.append('{}')
+            fields.append((name, html and name not in raw_fields))
+    pieces.append(text[position:].replace('{', '{{').replace('}', '}}'))
+    layout = ''.join(pieces)
+
+    def render(values, escape=escape):
+        return layout.format(*[
+            escape(str(values[name])) if escaped else values[name] for name, escaped in fields
+        ])
+    return render
+
+
+class EmailTemplate:
+    """
+    Subject, text and HTML templates for one kind of email, compiled once at
+    import. Repeated sections (order items) have their own row templates and
+    are joined in a single pass, so rendering is linear in the number of items.
+    Payload values are HTML-escaped for the HTML part only.
+    """
+
+    def __init__(self, subject, text, html_content, signature='E-Commerce Team',
+                 item_text=None, item_html=None):
+        self.subject = compile_template(subject)
+        self.text = compile_template(text)
+        # Wrap the content in the shared layout now rather than on every render
+        self.html = compile_template(
+            Template(HTML_LAYOUT).substitute(content=html_content),
+            html=True,
+            raw_fields=('title', 'items')
+        )
+        self.signature = signature
+        self.item_text = compile_template(item_text) if item_text else None
+        self.item_html = compile_template(item_html, html=True) if item_html else None
+
+    def render(self, payload, escape=escape):
+        """Returns: (subject, body, html_body)"""
+        values = dict(payload)
+        values.setdefault('signature', self.signature)
+        subject = self.subject(values)
+
+        html_values = values
+        if self.item_text is not None:
+            items = payload.get('items', ())
+            html_values = dict(values)
+            values['items'] = ''.join(map(self.item_text, items))
+            html_values['items'] = ''.join(self.item_html(item, escape) for item in items)
+        html_values['title'] = escape(subject)
+
+        return subject, self.text(values), self.html(html_values, escape)
+
+    def render_batch(self, payloads):
+        """
+        Render many payloads (e.g. the notices for a bulk "shipped" update)
+        Returns: [(subject, body, html_body)]
+        Values that recur across the batch (statuses, product names, the
+        signature) are HTML-escaped once for the whole batch.
+        """
+        escaped = {}
+
+        def escape_once(text):
+            result = escaped.get(text)
+            if result is None:
+                result = escaped[text] = escape(text)
+            return result
+
+        return [self.render(payload, escape_once) for payload in payloads]
+
+
+ORDER_ITEM_TEXT = '- $name x $quantity = $$$subtotal\n'
+ORDER_ITEM_HTML = '<tr><td>$name</td><td>$quantity</td><td>$$$subtotal</td></tr>\n'
+
+
+TEMPLATES = {
+    'order_confirmation': EmailTemplate(
+        subject='Order Confirmation - Order #$order_id',
+        text="""
+Dear Customer,
+
+Thank you for your order!
+
+Order Details:
+- Order ID: #$order_id
+- Total Amount: $$$total_amount
+- Status: $status
+- Payment Status: $payment_status
+
+Items:
+$items
+We'll send you another email when your order ships.
+
+Thank you for shopping with us!
+
+Best regards,
+$signature
+""",
+        html_content="""<p>Dear Customer,</p>
+<p>Thank you for your order!</p>
+<ul>
+<li>Order ID: #$order_id</li>
+<li>Total Amount: $$$total_amount</li>
+<li>Status: $status</li>
+<li>Payment Status: $payment_status</li>
+</ul>
+<table>
+<tr><th>Item</th><th>Qty</th><th>Subtotal</th></tr>
+$items</table>
+<p>We'll send you another email when your order ships.</p>
+<p>Thank you for shopping with us!</p>""",
+        item_text=ORDER_ITEM_TEXT,
+        item_html=ORDER_ITEM_HTML
+    ),
+
+    'order_shipped': EmailTemplate(
+        subject='Order Shipped - Order #$order_id',
+        text="""
+Dear Customer,
+
+Great news! Your order has been shipped.
+
+Order ID: #$order_id
+Total: $$$total_amount
+
+Your order is on its way and should arrive soon.
+
+Track your order in your account dashboard.
+
+Best regards,
+$signature
+""",
+        html_content="""<p>Dear Customer,</p>
+<p>Great news! Your order has been shipped.</p>
+<p>Order ID: #$order_id<br>Total: $$$total_amount</p>
+<p>Your order is on its way and should arrive soon.</p>
+<p>Track your order in your account dashboard.</p>"""
+    ),
+
+    'order_delivered': EmailTemplate(
+        subject='Order Delivered - Order #$order_id',
+        text="""
+Dear Customer,
+
+Your order has been delivered!
+
+Order ID: #$order_id
+Total: $$$total_amount
+
+We hope you enjoy your purchase. Please leave a review if you're satisfied!
+
+Best regards,
+$signature
+""",
+        html_content="""<p>Dear Customer,</p>
+<p>Your order has been delivered!</p>
+<p>Order ID: #$order_id<br>Total: $$$total_amount</p>
+<p>We hope you enjoy your purchase. Please leave a review if you're satisfied!</p>"""
+    ),
+
+    'password_reset': EmailTemplate(
+        subject='Password Reset Request',
+        text="""
+Dear Customer,
+
+We received a request to reset your password.
+
+Reset Token: $reset_token
+
+If you didn't request this, please ignore this email.
+
+This link will expire in 1 hour.
+
+Best regards,
+$signature
+""",
+        html_content="""<p>Dear Customer,</p>
+<p>We received a request to reset your password.</p>
+<p>Reset Token: <code>$reset_token</code></p>
+<p>If you didn't request this, please ignore this email.</p>
+<p>This link will expire in 1 hour.</p>"""
+    ),
+
+    'welcome': EmailTemplate(
+        subject='Welcome to Our E-Commerce Store!',
+        text="""
+Dear $user_name,
+
+Welcome to our e-commerce platform!
+
+Thank you for creating an account. We're excited to have you as part of our community.
+
+Start shopping now and enjoy:
+- Free shipping on orders over $$50
+- Exclusive deals for members
+- Easy returns and exchanges
+
+Happy shopping!
+
+Best regards,
+$signature
+""",
+        html_content="""<p>Dear $user_name,</p>
+<p>Welcome to our e-commerce platform!</p>
+<p>Thank you for creating an account. We're excited to have you as part of our community.</p>
+<p>Start shopping now and enjoy:</p>
+<ul>
+<li>Free shipping on orders over $$50</li>
+<li>Exclusive deals for members</li>
+<li>Easy returns and exchanges</li>
+</ul>
+<p>Happy shopping!</p>"""
+    ),
+
+    'low_stock_alert': EmailTemplate(
+        subject='Low Stock Alert - $product_name',
+        text="""
+Low Stock Alert!
+
+Product: $product_name
+Product ID: $product_id
+Current Stock: $stock_quantity
+
+Please restock this product soon.
+
+Best regards,
+$signature
+""",
+        html_content="""<p><strong>Low Stock Alert!</strong></p>
+<ul>
+<li>Product: $product_name</li>
+<li>Product ID: $product_id</li>
+<li>Current Stock: $stock_quantity</li>
+</ul>
+<p>Please restock this product soon.</p>""",
+        signature='Inventory Management System'
+    )
+}
@@ -0,0 +1,94 @@
+"""Email delivery transports"""
+import smtplib
+from datetime import datetime
+from email.message import EmailMessage
+from threading import Lock
+
+
+class ConsoleTransport:
+    """Prints emails to stdout (development)"""
+
+    def send(self, to_email, subject, body, html_body=None):
+        print(f"\n{'='*60}")
+        print(f"📧 EMAIL SENT")
+        print(f"{'='*60}")
+        print(f"To: {to_email}")
+        print(f"Subject: {subject}")
+        print(f"Time: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')}")
+        print(f"\nBody:\n{body}")
+        if html_body:
+            print(f"\nHTML Body:\n{html_body}")
+        print(f"{'='*60}\n")
+
+
+class MemoryTransport:
+    """Keeps sent emails in a list (tests)"""
+
+    def __init__(self):
+        self._lock = Lock()
+        self.outbox = []
+
+    def send(self, to_email, subject, body, html_body=None):
+        with self._lock:
+            self.outbox.append({
+                'to': to_email,
+                'subject': subject,
+                'body': body,
+                'html_body': html_body
+            })
+
+    def clear(self):
+        with self._lock:
+            self.outbox = []
+
+
+class SMTPTransport:
+    """
+    Sends through an SMTP server. Pointed at a local debugging server
+    (e.g. `python -m aiosmtpd -n -l localhost:1025`) it doubles as a
+    stand-in for a real provider.
+    """
+
+    def __init__(self, host, port, sender, username=None, password=None, use_tls=False, timeout=10):
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.timeout = timeout
+
+    def send(self, to_email, subject, body, html_body=None):
+        message = EmailMessage()
+        message['From'] = self.sender
+        message['To'] = to_email
+        message['Subject'] = subject
+        message.set_content(body)
+        if html_body:
+            message.add_alternative(html_body, subtype='html')
+
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+            if self.use_tls:
+                smtp.starttls()
+            if self.username:
+                smtp.login(self.username, self.password)
+            smtp.send_message(message)
+
+
+def create_transport(config):
+    """Build the transport selected by EMAIL_TRANSPORT"""
+    name = config.get('EMAIL_TRANSPORT', 'console')
+    if name == 'console':
+        return ConsoleTransport()
+    if name == 'memory':
+        return MemoryTransport()
+    if name == 'smtp':
+        return SMTPTransport(
+            config.get('SMTP_HOST', 'localhost'),
+            config.get('SMTP_PORT', 25),
+            config.get('EMAIL_FROM', 'no-reply@example.com'),
+            username=config.get('SMTP_USERNAME'),
+            password=config.get('SMTP_PASSWORD'),
+            use_tls=config.get('SMTP_USE_TLS', False)
+        )
+    raise ValueError(f'Unknown EMAIL_TRANSPORT {name!r}. Supported: console, memory, smtp')
@@ -0,0 +1,94 @@
+"""Inventory (stock level) service"""
+from sqlalchemy import bindparam, update
+from app import db
+from app.models import Product, OrderItem
+
+
+class InsufficientStockError(Exception):
+    """Raised when a stock reservation cannot be satisfied"""
+
+    def __init__(self, quantities):
+        super().__init__('Insufficient stock')
+        self.quantities = quantities
+
+
+class InventoryService:
+    """
+    Race-free stock updates. Stock is changed with conditional in-place
+    UPDATE statements rather than read-modify-write in Python, so
+    concurrent checkouts can never oversell.
+    """
+
+    @staticmethod
+    def _lines(quantities):
+        # Touch rows in primary key order so concurrent transactions lock them
+        # in the same order and can't deadlock each other
+        return [{'b_id': product_id, 'b_qty': qty} for product_id, qty in sorted(quantities.items())]
+
+    @classmethod
+    def reserve_stock(cls, quantities):
+        """
+        Decrement stock for every product in one batched statement, in the
+        caller's transaction.
+
+        Args:
+            quantities: {product_id: quantity}
+
+        Raises:
+            InsufficientStockError: if any product lacks stock. Some rows may
+            already have been decremented, so the caller must roll back.
+        """
+        if not quantities:
+            return
+
+        products = Product.__table__
+        stmt = update(products).where(
+            products.c.id == bindparam('b_id'),
+            products.c.stock_quantity >= bindparam('b_qty')
+        ).values(stock_quantity=products.c.stock_quantity - bindparam('b_qty'))
+
+        result = db.session.execute(stmt, cls._lines(quantities))
+        if result.rowcount != len(quantities):
+            raise InsufficientStockError(quantities)
+
+    @classmethod
+    def release_stock(cls, quantities):
+        """Return stock (cancellations, failed payments, refunds) in one batched statement"""
+        if not quantities:
+            return
+
+        products = Product.__table__
+        stmt = update(products).where(
+            products.c.id == bindparam('b_id')
+        ).values(stock_quantity=products.c.stock_quantity + bindparam('b_qty'))
+
+        db.session.execute(stmt, cls._lines(quantities))
+
+    @classmethod
+    def release_order_stock(cls, order_id):
+        """Return the stock held by an order's items"""
+        quantities = {}
+        rows = db.session.query(OrderItem.product_id, OrderItem.quantity) \
+            .filter(OrderItem.order_id == order_id).all()
+        for product_id, quantity in rows:
+            quantities[product_id] = quantities.get(product_id, 0) + quantity
+
+        cls.release_stock(quantities)
+
+    @staticmethod
+    def find_shortfall(quantities):
+        """
+        Find the first product that can't cover its requested quantity
+        Returns: (product_id, product_name, requested, available) or None
+        """
+        rows = db.session.query(Product.id, Product.name, Product.stock_quantity) \
+            .filter(Product.id.in_(quantities.keys())).all()
+        stock = {product_id: (name, available) for product_id, name, available in rows}
+
+        for product_id, requested in sorted(quantities.items()):
+            # Products that no longer exist count as having no stock
+            name, available = stock.get(product_id, (None, 0))
+            if available < requested:
+                return product_id, name, requested, available
+
+        return None
@@ -0,0 +1,101 @@
+"""Bounded bcrypt hashing off the request threads"""
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from threading import BoundedSemaphore, Lock
+
+import bcrypt
+
+
+class HasherBusyError(Exception):
+    """Raised when too many hash operations are already queued"""
+
+
+def _hash(password, rounds):
+    # Module-level so process pool workers can unpickle it
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds)).decode('utf-8')
+
+
+def _check(password, hashed):
+    return bcrypt.checkpw(password, hashed)
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a small dedicated pool (processes by default) so a login
+    storm can use at most `workers` cores instead of every request thread.
+    At most `max_pending` more operations may wait for a worker; beyond
+    that, callers wait up to `admission_timeout` seconds for a slot and then
+    get HasherBusyError, which the auth routes turn into 429.
+
+    executor: 'process', 'thread' or 'inline' (no pool, no admission control)
+    """
+
+    EXECUTORS = ('process', 'thread', 'inline')
+
+    def __init__(self):
+        self.rounds = 12
+        self.workers = 2
+        self.max_pending = 8
+        self.admission_timeout = 0.5
+        self.executor_kind = 'inline'
+        self._pool = None
+        self._pool_lock = Lock()
+        self._slots = None
+
+    def init_app(self, app):
+        """Configure from app settings; the pool itself starts on first use"""
+        executor_kind = app.config.get('BCRYPT_EXECUTOR', 'process')
+        if executor_kind not in self.EXECUTORS:
+            raise ValueError(f'Unknown BCRYPT_EXECUTOR {executor_kind!r}. Supported: {", ".join(self.EXECUTORS)}')
+
+        self.shutdown()
+        self.rounds = app.config.get('BCRYPT_ROUNDS', 12)
+        self.workers = app.config.get('BCRYPT_WORKERS') or max(1, (os.cpu_count() or 2) // 2)
+        self.max_pending = app.config.get('BCRYPT_MAX_PENDING', 8)
+        self.admission_timeout = app.config.get('BCRYPT_ADMISSION_TIMEOUT', 0.5)
+        self.executor_kind = executor_kind
+        self._slots = BoundedSemaphore(self.workers + self.max_pending)
+
+    def _get_pool(self):
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    if self.executor_kind == 'process':
+                        self._pool = ProcessPoolExecutor(max_workers=self.workers)
+                    else:
+                        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='bcrypt')
+        return self._pool
+
+    def _run(self, fn, *args):
+        if self.executor_kind == 'inline':
+            return fn(*args)
+
+        if not self._slots.acquire(timeout=self.admission_timeout):
+            raise HasherBusyError('Too many password operations in progress')
+        try:
+            return self._get_pool().submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        """bcrypt hash of password at the configured cost"""
+        return self._run(_hash, password.encode('utf-8'), self.rounds)
+
+    def verify(self, password, hashed):
+        return self._run(_check, password.encode('utf-8'), hashed.encode('utf-8'))
+
+    def needs_rehash(self, hashed):
+        """True if the hash was made with a different cost than the configured one"""
+        try:
+            return int(hashed.split('$')[2]) != self.rounds
+        except (IndexError, ValueError):
+            return True
+
+    def shutdown(self):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+
+password_hasher = PasswordHasher()
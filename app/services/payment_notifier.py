@@ -0,0 +1,86 @@
+"""In-process wake-ups for requests waiting on a payment status change"""
+from threading import Event, Lock
+
+
+class TooManyWaitersError(Exception):
+    """Raised when subscribing would park more requests than allowed"""
+
+
+class Subscription:
+    """A registration to be woken when a transaction's status changes"""
+
+    def __init__(self, notifier, transaction_id):
+        self._notifier = notifier
+        self.transaction_id = transaction_id
+        self.event = Event()
+
+    def wait(self, timeout):
+        """Block until notified or timeout; returns True if notified"""
+        woken = self.event.wait(timeout)
+        # Re-arm so the next wait blocks again
+        self.event.clear()
+        return woken
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self._notifier._unsubscribe(self)
+
+
+class PaymentNotifier:
+    """
+    Lets long-poll requests park until the finalization worker publishes a
+    change for their transaction. Only requests in the same process as the
+    worker are woken; waiters must still re-check the database when their
+    wait times out, which covers changes made by other processes.
+
+    Subscribe before reading the current status, so a change published in
+    between is not missed:
+
+        with payment_notifier.subscribe(transaction_id) as subscription:
+            ...read status...
+            subscription.wait(timeout)
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._subscriptions = {}  # transaction_id -> set of Subscription, only while someone is waiting
+        self._waiting = 0
+
+    def subscribe(self, transaction_id, max_waiters=None):
+        """
+        Register to be woken for transaction_id
+        Raises: TooManyWaitersError if max_waiters subscriptions are already parked
+        """
+        subscription = Subscription(self, transaction_id)
+        with self._lock:
+            if max_waiters is not None and self._waiting >= max_waiters:
+                raise TooManyWaitersError('Too many requests waiting for payment updates')
+            self._subscriptions.setdefault(transaction_id, set()).add(subscription)
+            self._waiting += 1
+        return subscription
+
+    def _unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.transaction_id)
+            if subscriptions is not None and subscription in subscriptions:
+                subscriptions.discard(subscription)
+                self._waiting -= 1
+                if not subscriptions:
+                    del self._subscriptions[subscription.transaction_id]
+
+    def publish(self, transaction_id):
+        """Wake everyone waiting on this transaction (call after committing the change)"""
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(transaction_id, ()))
+        for subscription in subscriptions:
+            subscription.event.set()
+
+    def waiting(self):
+        """Number of parked subscriptions, for monitoring"""
+        with self._lock:
+            return self._waiting
+
+
+payment_notifier = PaymentNotifier()
@@ -3,7 +3,50 @@ import random
 import string
 import time
 from datetime import datetime
-from threading import Thread
+from flask import current_app
+from app.services.payment_notifier import payment_notifier
+from app.services.task_queue import BoundedExecutor
+
+
+class LatencyModel:
+    """Draws simulated gateway processing delays, in seconds"""
+
+    DISTRIBUTIONS = ('none', 'fixed', 'uniform', 'normal', 'exponential')
+
+    def __init__(self, distribution='uniform', low=1.0, high=3.0, mean=2.0, stddev=0.5):
+        if distribution not in self.DISTRIBUTIONS:
+            raise ValueError(
+                f'Unknown latency distribution {distribution!r}. Supported: {", ".join(self.DISTRIBUTIONS)}'
+            )
+        if low < 0 or high < low or mean < 0 or stddev < 0:
+            raise ValueError('Latency bounds must be non-negative with min <= max')
+
+        self.distribution = distribution
+        self.low = low
+        self.high = high
+        self.mean = mean
+        self.stddev = stddev
+
+    def sample(self, rng):
+        if self.distribution == 'none':
+            return 0.0
+        if self.distribution == 'fixed':
+            return self.mean
+        if self.distribution == 'uniform':
+            return rng.uniform(self.low, self.high)
+        if self.distribution == 'normal':
+            return max(0.0, rng.gauss(self.mean, self.stddev))
+        # exponential
+        return rng.expovariate(1 / self.mean) if self.mean else 0.0
+
+    def to_dict(self):
+        return {
+            'distribution': self.distribution,
+            'min': self.low,
+            'max': self.high,
+            'mean': self.mean,
+            'stddev': self.stddev
+        }
 
 
 class PaymentSimulator:
@@ -25,6 +68,103 @@ class PaymentSimulator:
     # Supported payment methods
     PAYMENT_METHODS = ['credit_card', 'debit_card', 'paypal', 'bank_transfer']
 
+    # Probability that a non-test payment (or a refund) succeeds
+    DEFAULT_SUCCESS_RATES = {
+        'credit_card': 0.9,
+        'debit_card': 0.9,
+        'paypal': 0.95,
+        'refund': 0.95
+    }
+
+    # Bounded pool that finalizes payments in the background
+    executor = BoundedExecutor('payment-worker')
+
+    # Timing and outcome model (see configure)
+    _UNSET = object()
+    latency = LatencyModel()
+    success_rates = dict(DEFAULT_SUCCESS_RATES)
+    seed = None
+    rng = random.Random()
+
+    @classmethod
+    def init_app(cls, app):
+        """Size the finalization pool and set up the simulation model from app config"""
+        cls.executor.configure(
+            max_workers=app.config.get('PAYMENT_WORKERS', 8),
+            max_queue_size=app.config.get('PAYMENT_QUEUE_SIZE', 1000),
+            submit_timeout=app.config.get('PAYMENT_QUEUE_TIMEOUT', 0)
+        )
+        cls.executor.register_shutdown(app.config.get('PAYMENT_DRAIN_TIMEOUT', 30))
+
+        seed = app.config.get('PAYMENT_SIM_SEED')
+        cls.configure(
+            latency=LatencyModel(
+                app.config.get('PAYMENT_SIM_LATENCY', 'uniform'),
+                low=app.config.get('PAYMENT_SIM_LATENCY_MIN', 1.0),
+                high=app.config.get('PAYMENT_SIM_LATENCY_MAX', 3.0),
+                mean=app.config.get('PAYMENT_SIM_LATENCY_MEAN', 2.0),
+                stddev=app.config.get('PAYMENT_SIM_LATENCY_STDDEV', 0.5)
+            ),
+            success_rates=cls.parse_success_rates(app.config.get('PAYMENT_SIM_SUCCESS_RATES')),
+            seed=int(seed) if seed not in (None, '') else None
+        )
+
+    @classmethod
+    def configure(cls, latency=None, success_rates=None, seed=_UNSET):
+        """
+        Change the simulation model; aspects not passed are left as they are
+        latency: LatencyModel; success_rates: overrides for DEFAULT_SUCCESS_RATES
+        ({} for the defaults); seed: makes outcomes and delays reproducible
+        (None for a random seed)
+        """
+        if latency is not None:
+            cls.latency = latency
+        if success_rates is not None:
+            rates = dict(cls.DEFAULT_SUCCESS_RATES)
+            rates.update(success_rates)
+            cls.success_rates = rates
+        if seed is not cls._UNSET:
+            cls.seed = seed
+            cls.rng = random.Random(seed)
+
+    @classmethod
+    def _rng(cls, transaction_id):
+        """
+        Random source for one transaction. With a seed, each transaction gets
+        its own generator derived from the seed and its id, so outcomes don't
+        depend on the order worker threads happen to run in.
+        """
+        if cls.seed is None:
+            return cls.rng
+        return random.Random(f'{cls.seed}:{transaction_id}')
+
+    @staticmethod
+    def parse_success_rates(value):
+        """Parse "method=rate,..." (or a dict) into {method: rate}"""
+        if not value:
+            return {}
+        if isinstance(value, dict):
+            items = value.items()
+        else:
+            items = (part.split('=', 1) for part in value.split(',') if part.strip())
+
+        rates = {}
+        for method, rate in items:
+            rate = float(rate)
+            if not 0 <= rate <= 1:
+                raise ValueError(f'Success rate for {method.strip()} must be between 0 and 1')
+            rates[method.strip()] = rate
+        return rates
+
+    @classmethod
+    def settings(cls):
+        """Current simulation model, for diagnostics"""
+        return {
+            'latency': cls.latency.to_dict(),
+            'success_rates': dict(cls.success_rates),
+            'seed': cls.seed
+        }
+
     @staticmethod
     def generate_transaction_id():
         """Generate unique transaction ID"""
@@ -129,9 +269,12 @@ class PaymentSimulator:
         This determines the final status based on test cards or payment method
         Returns: (final_status, message)
         """
-        # Simulate processing delay (1-3 seconds)
-        processing_time = random.uniform(1, 3)
-        time.sleep(processing_time)
+        rng = cls._rng(transaction_id)
+
+        # Simulate processing delay
+        processing_time = cls.latency.sample(rng)
+        if processing_time > 0:
+            time.sleep(processing_time)
 
         # For card payments, check test card number
         if payment_method in ['credit_card', 'debit_card'] and card_details:
@@ -142,8 +285,8 @@ class PaymentSimulator:
                 result = cls.TEST_CARDS[card_number]
                 return result['status'], result['message']
 
-            # For non-test cards, simulate 90% success rate
-            if random.random() < 0.9:
+            # For non-test cards, use the configured success rate
+            if rng.random() < cls.success_rates[payment_method]:
                 return 'completed', 'Payment successful'
             else:
                 failure_reasons = [
@@ -151,11 +294,11 @@ class PaymentSimulator:
                     'Transaction limit exceeded',
                     'Suspicious activity detected'
                 ]
-                return 'failed', random.choice(failure_reasons)
+                return 'failed', rng.choice(failure_reasons)
 
-        # For PayPal, simulate 95% success rate
+        # For PayPal, use the configured success rate
         elif payment_method == 'paypal':
-            if random.random() < 0.95:
+            if rng.random() < cls.success_rates['paypal']:
                 return 'completed', 'PayPal payment successful'
             else:
                 return 'failed', 'PayPal authentication failed'
@@ -168,43 +311,104 @@ class PaymentSimulator:
         return 'completed', 'Payment successful'
 
     @classmethod
-    def simulate_webhook_callback(cls, payment_id, callback_url, payment_obj, db):
+    def simulate_webhook_callback(cls, payment_id, callback_url, app=None):
         """
         Simulate async webhook callback after payment processing
-        Runs in background thread
+        Runs on the bounded payment worker pool
+        Raises: QueueFullError if the pool's backlog is full
         """
-        def webhook_task():
-            from app.models import Order
+        # Worker threads get their own app context (and so their own session)
+        app = app or current_app._get_current_object()
+        cls.executor.submit(cls._finalize_payment, app, payment_id)
 
-            # Process the payment
-            final_status, message = cls.process_payment(
-                payment_obj.transaction_id,
-                float(payment_obj.amount),
-                payment_obj.payment_method,
-                {}  # Card details not stored for security
-            )
-
-            # Update payment status
-            payment_obj.status = final_status
-
-            # Update order payment status
-            order = Order.query.get(payment_obj.order_id)
-            if order:
-                order.payment_status = final_status
-                if final_status == 'completed':
-                    order.status = 'processing'  # Move order to processing
-                elif final_status == 'failed':
-                    order.status = 'cancelled'
-                    # Restore stock on failed payment
-                    for item in order.items:
-                        item.product.stock_quantity += item.quantity
+    @classmethod
+    def _finalize_payment(cls, app, payment_id):
+        """Background task: process a payment and record the outcome"""
+        from app import db
+        from app.models import Payment
+
+        with app.app_context():
+            try:
+                payment = db.session.get(Payment, payment_id)
+                if not payment or payment.status != 'processing':
+                    return
+
+                transaction_id = payment.transaction_id
+                amount = float(payment.amount)
+                payment_method = payment.payment_method
+
+                # Return the connection to the pool while the gateway "processes"
+                db.session.close()
+
+                final_status, message = cls.process_payment(
+                    transaction_id,
+                    amount,
+                    payment_method,
+                    {}  # Card details not stored for security
+                )
+
+                updated = cls.apply_payment_result(payment_id, final_status)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+
+            if updated:
+                # Wake long-poll requests waiting on this payment
+                payment_notifier.publish(transaction_id)
 
-            db.session.commit()
+    @staticmethod
+    def apply_payment_result(payment_id, final_status):
+        """
+        Record a payment outcome on the payment and its order, in the
+        caller's transaction. Only payments still 'processing' are updated,
+        so a payment can't be finalized twice.
+        Returns: True if the payment was updated
+        """
+        from app import db
+        from app.models import Payment, Order
+        from app.services.inventory_service import InventoryService
+        from app.services.sales_rollup import SalesRollup
+
+        if final_status == 'processing':
+            return False
+
+        updated = Payment.query.filter(
+            Payment.id == payment_id,
+            Payment.status == 'processing'
+        ).update({'status': final_status}, synchronize_session=False)
+        if not updated:
+            return False
+
+        # Update order payment status. The order row stays locked until commit,
+        # so a concurrent cancel can't change the state the rollup moves it from
+        order_id, placed_at, total_amount, old_status, old_payment_status = db.session.query(
+            Order.id, Order.created_at, Order.total_amount, Order.status, Order.payment_status
+        ).join(Payment, Payment.order_id == Order.id).filter(Payment.id == payment_id).with_for_update().one()
+        order_values = {'payment_status': final_status}
+        if final_status == 'completed':
+            order_values['status'] = 'processing'  # Move order to processing
+        elif final_status == 'failed':
+            order_values['status'] = 'cancelled'
+
+        # An order cancelled while the gateway was busy has already given its
+        # stock back and must stay cancelled; only the outcome is recorded
+        moved = Order.query.filter(Order.id == order_id, Order.status != 'cancelled') \
+            .update(order_values, synchronize_session=False)
+        if moved:
+            new_status = order_values.get('status', old_status)
+            if final_status == 'failed':
+                # Restore stock on failed payment
+                InventoryService.release_order_stock(order_id)
+        else:
+            new_status = 'cancelled'
+            Order.query.filter(Order.id == order_id).update({'payment_status': final_status}, synchronize_session=False)
 
-        # Start background thread for async processing
-        thread = Thread(target=webhook_task)
-        thread.daemon = True
-        thread.start()
+        SalesRollup.record_order_change(
+            order_id, placed_at, total_amount,
+            (old_status, old_payment_status), (new_status, final_status)
+        )
+        return True
 
     @classmethod
     def check_payment_status(cls, transaction_id):
@@ -225,8 +429,8 @@ class PaymentSimulator:
         # Generate refund transaction ID
         refund_txn_id = cls.generate_transaction_id().replace('TXN', 'RFD')
 
-        # Simulate 95% refund success rate
-        if random.random() < 0.95:
+        # Use the configured refund success rate
+        if cls._rng(f'refund:{transaction_id}').random() < cls.success_rates['refund']:
             return refund_txn_id, 'completed', 'Refund processed successfully'
         else:
             return None, 'failed', 'Refund processing failed. Contact support.'
@@ -0,0 +1,142 @@
+"""Set-based bulk price and stock updates"""
+from datetime import datetime
+
+from sqlalchemy import case, select, update
+
+from app import db
+from app.models import Product
+from app.services.inventory_service import InsufficientStockError
+from app.utils.validators import validate_price
+
+
+class InvalidBulkUpdateError(ValueError):
+    """Raised when update items fail validation; nothing is written"""
+
+    def __init__(self, details):
+        super().__init__('Invalid updates')
+        self.details = details  # [{'index': i, 'error': message}]
+
+
+class ProductsNotFoundError(LookupError):
+    """Raised when updates name products that don't exist; nothing is written"""
+
+    def __init__(self, product_ids):
+        super().__init__('Products not found')
+        self.product_ids = product_ids
+
+
+class BulkProductUpdate:
+    """
+    Applies many {id, price?, stock_quantity?, stock_delta?} changes with a
+    few UPDATE ... SET col = CASE id WHEN ... END WHERE id IN (...)
+    statements (one per kind of change per CHUNK_SIZE products) in the
+    caller's transaction. Stock deltas are applied in place and guarded so
+    no product can go below zero, like checkout reservations.
+    """
+
+    CHUNK_SIZE = 1000  # Products per statement, keeping bound parameters well under driver limits
+
+    @staticmethod
+    def validate(items, max_items):
+        """
+        Normalize raw update items
+        Returns: {'prices': {id: Decimal}, 'stock': {id: int}, 'deltas': {id: int}}
+        Raises: InvalidBulkUpdateError
+        """
+        if not isinstance(items, list) or not items:
+            raise InvalidBulkUpdateError([{'index': None, 'error': 'updates must be a non-empty list'}])
+        if len(items) > max_items:
+            raise InvalidBulkUpdateError([{'index': None, 'error': f'At most {max_items} updates per request'}])
+
+        changes = {'prices': {}, 'stock': {}, 'deltas': {}}
+        seen = set()
+        errors = []
+        for index, item in enumerate(items):
+            try:
+                if not isinstance(item, dict):
+                    raise ValueError('each update must be an object')
+
+                product_id = item.get('id')
+                if not isinstance(product_id, int) or isinstance(product_id, bool):
+                    raise ValueError('id must be an integer')
+                if product_id in seen:
+                    raise ValueError(f'product {product_id} appears more than once')
+
+                fields = [field for field in ('price', 'stock_quantity', 'stock_delta') if item.get(field) is not None]
+                if not fields:
+                    raise ValueError('nothing to update; give price, stock_quantity or stock_delta')
+                if 'stock_quantity' in fields and 'stock_delta' in fields:
+                    raise ValueError('give stock_quantity or stock_delta, not both')
+
+                if 'price' in fields:
+                    is_valid, price = validate_price(item['price'])
+                    if not is_valid:
+                        raise ValueError(price)
+                    changes['prices'][product_id] = price
+
+                for field, key in (('stock_quantity', 'stock'), ('stock_delta', 'deltas')):
+                    if field in fields:
+                        value = item[field]
+                        if not isinstance(value, int) or isinstance(value, bool):
+                            raise ValueError(f'{field} must be an integer')
+                        if field == 'stock_quantity' and value < 0:
+                            raise ValueError('stock_quantity must not be negative')
+                        changes[key][product_id] = value
+
+                seen.add(product_id)
+            except ValueError as e:
+                errors.append({'index': index, 'error': str(e)})
+
+        if errors:
+            raise InvalidBulkUpdateError(errors)
+        return changes
+
+    @classmethod
+    def _chunks(cls, values):
+        # Primary key order, so concurrent writers lock rows in the same order
+        items = sorted(values.items())
+        for i in range(0, len(items), cls.CHUNK_SIZE):
+            yield dict(items[i:i + cls.CHUNK_SIZE])
+
+    @classmethod
+    def apply(cls, changes):
+        """
+        Write validated changes in the caller's transaction
+        Returns: number of products changed
+        Raises:
+            ProductsNotFoundError: some ids don't exist
+            InsufficientStockError: a stock_delta would take stock below zero
+                ({product_id: units removed}); some rows may already be
+                updated, so the caller must roll back
+        """
+        product_ids = set(changes['prices']) | set(changes['stock']) | set(changes['deltas'])
+        found = set()
+        for chunk in cls._chunks(dict.fromkeys(product_ids)):
+            found.update(db.session.scalars(select(Product.id).where(Product.id.in_(chunk))))
+        if found != product_ids:
+            raise ProductsNotFoundError(sorted(product_ids - found))
+
+        now = datetime.utcnow()
+        for column, values in ((Product.price, changes['prices']), (Product.stock_quantity, changes['stock'])):
+            for chunk in cls._chunks(values):
+                db.session.execute(
+                    update(Product)
+                    .where(Product.id.in_(chunk))
+                    .values({column: case(chunk, value=Product.id), Product.updated_at: now})
+                    .execution_options(synchronize_session=False)
+                )
+
+        for chunk in cls._chunks(changes['deltas']):
+            delta = case(chunk, value=Product.id)
+            result = db.session.execute(
+                update(Product)
+                .where(Product.id.in_(chunk), Product.stock_quantity + delta >= 0)
+                .values({Product.stock_quantity: Product.stock_quantity + delta, Product.updated_at: now})
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount != len(chunk):
+                raise InsufficientStockError({
+                    product_id: -value for product_id, value in changes['deltas'].items() if value < 0
+                })
+
+        return len(product_ids)
@@ -0,0 +1,291 @@
+"""Bulk product import from CSV or JSON lines"""
+import csv
+import io
+import json
+import time
+from datetime import datetime
+
+from sqlalchemy import and_, insert, or_, select, update
+
+from app import db
+from app.models import Category, Product
+from app.services.suggestion_index import suggestion_index
+from app.utils.validators import validate_price
+
+
+class ImportFormatError(ValueError):
+    """Raised when the input can't be read at all (unknown format, bad CSV header)"""
+
+
+class RowError(ValueError):
+    """A single row failed validation; the import carries on with the rest"""
+
+
+def read_rows(stream, fmt):
+    """
+    Yield (row_number, dict) from a binary UTF-8 stream, one row at a time;
+    lines that can't be parsed yield a RowError in place of the dict
+    - csv: first line is the header
+    - ndjson: one JSON object per line, blank lines skipped
+    """
+    stream = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        if not reader.fieldnames:
+            raise ImportFormatError('CSV input needs a header row')
+        for row in reader:
+            yield reader.line_num, row
+    elif fmt == 'ndjson':
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield line_number, RowError(f'Invalid JSON: {e}')
+                continue
+            yield line_number, row if isinstance(row, dict) else RowError('Each line must be a JSON object')
+    else:
+        raise ImportFormatError(f'Unknown format {fmt!r}. Supported: csv, ndjson')
+
+
+class ProductImporter:
+    """
+    Validates product rows and writes them in batches of `batch_size`: one
+    SELECT resolves which SKUs/ids already exist, then a single executemany
+    INSERT and a single executemany UPDATE (by primary key) per batch, each
+    batch in its own transaction. Category names are resolved from a map
+    loaded once up front; categories created on the way are committed on
+    their own, before the batch that uses them (in a dry run they live and
+    die with the batch instead). Only the products each batch touched are
+    refreshed in the suggestion index.
+
+    Row keys: sku, name, description, price, category (name) or category_id,
+    stock_quantity, image_url. A row with an `id` updates that product; a
+    row with a `sku` updates the product with that SKU or creates it; any
+    other row creates a product. On updates, missing or empty fields are
+    left unchanged. Invalid rows are skipped and listed in the report (up to
+    `max_errors` of them).
+    """
+
+    TEXT_FIELDS = {'sku': 64, 'name': 255, 'image_url': 255}
+    REQUIRED_ON_CREATE = ('name', 'price', 'category_id', 'stock_quantity')
+
+    def __init__(self, batch_size=2000, max_errors=1000, create_categories=False, dry_run=False):
+        self.batch_size = batch_size
+        self.max_errors = max_errors
+        self.create_categories = create_categories
+        self.dry_run = dry_run
+        self.categories = {}
+        self.category_ids = set()
+        self.new_categories = set()
+        self.report = {
+            'rows': 0, 'created': 0, 'updated': 0, 'failed': 0,
+            'categories_created': 0, 'errors': [], 'dry_run': dry_run
+        }
+
+    def _load_categories(self):
+        rows = db.session.query(Category.id, Category.name).all()
+        self.categories = {name.strip().lower(): category_id for category_id, name in rows}
+        self.category_ids = {category_id for category_id, _ in rows}
+
+    def _category_id(self, name):
+        key = name.strip().lower()
+        if key not in self.categories:
+            if not self.create_categories:
+                raise RowError(f'Unknown category {name.strip()!r}')
+            category = Category(name=name.strip())
+            db.session.add(category)
+            if self.dry_run:
+                db.session.flush()
+            else:
+                # No product rows are pending here (batches are written in
+                # _commit_batch), so this commits just the category
+                db.session.commit()
+            self.categories[key] = category.id
+            self.category_ids.add(category.id)
+            # Counted once even if a dry run recreates it in a later batch
+            self.new_categories.add(key)
+            self.report['categories_created'] = len(self.new_categories)
+        return self.categories[key]
+
+    def _error(self, row_number, row, message):
+        self.report['failed'] += 1
+        if len(self.report['errors']) < self.max_errors:
+            sku = row.get('sku') if isinstance(row, dict) else None
+            self.report['errors'].append({'row': row_number, 'sku': sku or None, 'error': message})
+
+    @staticmethod
+    def _blank(value):
+        return value is None or (isinstance(value, str) and not value.strip())
+
+    def validate(self, row):
+        """Row dict -> column values to write; raises RowError"""
+        values = {}
+
+        if not self._blank(row.get('id')):
+            try:
+                values['id'] = int(row['id'])
+            except (TypeError, ValueError):
+                raise RowError('id must be an integer')
+
+        for field, max_length in self.TEXT_FIELDS.items():
+            if not self._blank(row.get(field)):
+                value = str(row[field]).strip()
+                if len(value) > max_length:
+                    raise RowError(f'{field} is longer than {max_length} characters')
+                values[field] = value
+        if 'description' in row and row['description'] is not None:
+            values['description'] = str(row['description'])
+
+        if not self._blank(row.get('price')):
+            is_valid, price = validate_price(row['price'])
+            if not is_valid:
+                raise RowError(price)
+            values['price'] = price
+
+        if not self._blank(row.get('stock_quantity')):
+            try:
+                stock = int(str(row['stock_quantity']).strip())
+            except ValueError:
+                raise RowError('stock_quantity must be a whole number')
+            if stock < 0:
+                raise RowError('stock_quantity must not be negative')
+            values['stock_quantity'] = stock
+
+        if not self._blank(row.get('category_id')):
+            try:
+                category_id = int(row['category_id'])
+            except (TypeError, ValueError):
+                raise RowError('category_id must be an integer')
+            if category_id not in self.category_ids:
+                raise RowError(f'Unknown category_id {category_id}')
+            values['category_id'] = category_id
+        elif not self._blank(row.get('category')):
+            values['category_id'] = self._category_id(str(row['category']))
+
+        return values
+
+    def _flush(self, batch):
+        """
+        Write one batch of (row_number, row, values) in the current transaction
+        Returns: (created, updated, [(row_number, row, error)], condition matching the written products)
+        """
+        skus = [values['sku'] for _, _, values in batch if 'sku' in values and 'id' not in values]
+        ids = [values['id'] for _, _, values in batch if 'id' in values]
+        existing_skus = dict(db.session.execute(
+            select(Product.sku, Product.id).where(Product.sku.in_(skus))
+        ).all()) if skus else {}
+        existing_ids = set(db.session.scalars(select(Product.id).where(Product.id.in_(ids)))) if ids else set()
+
+        # Whole seconds, as MySQL DATETIME columns store them, so the rows can be matched by it below
+        now = datetime.utcnow().replace(microsecond=0)
+        creates = {}  # sku (or row number for rows without one) -> values; a later row wins
+        updates = {}  # product id -> values
+        errors = []
+        for row_number, row, values in batch:
+            product_id = values.pop('id', None)
+            if product_id is not None and product_id not in existing_ids:
+                errors.append((row_number, row, f'Product {product_id} not found'))
+                continue
+            if product_id is None and values.get('sku') in existing_skus:
+                product_id = existing_skus[values['sku']]
+
+            if product_id is not None:
+                updates.setdefault(product_id, {'id': product_id}).update(values, updated_at=now)
+                continue
+
+            missing = [field for field in self.REQUIRED_ON_CREATE if field not in values]
+            if missing:
+                errors.append((row_number, row, f'Missing required fields for a new product: {", ".join(missing)}'))
+                continue
+            creates[values.get('sku') or f'row:{row_number}'] = {
+                'sku': None, 'description': '', 'image_url': None, **values, 'created_at': now, 'updated_at': now
+            }
+
+        touched = []
+        if creates:
+            rows = list(creates.values())
+            if db.session.get_bind().dialect.insert_executemany_returning:
+                touched.append(Product.id.in_(db.session.scalars(insert(Product).returning(Product.id), rows).all()))
+            else:
+                # No RETURNING for executemany (MySQL): find the new rows by SKU, or by name and timestamp
+                db.session.execute(insert(Product), rows)
+                skus = [values['sku'] for values in rows if values['sku']]
+                names = {values['name'] for values in rows if not values['sku']}
+                if skus:
+                    touched.append(Product.sku.in_(skus))
+                if names:
+                    touched.append(and_(Product.created_at == now, Product.name.in_(names)))
+        if updates:
+            # Bulk UPDATE by primary key; rows are grouped by the columns they set
+            db.session.execute(update(Product), list(updates.values()))
+            touched.append(Product.id.in_(list(updates)))
+
+        return len(creates), len(updates), errors, or_(*touched) if touched else None
+
+    @staticmethod
+    def _refresh_index(touched):
+        """Add or refresh the committed products matching `touched` in the suggestion index"""
+        if touched is None:
+            return
+        for product in db.session.execute(select(Product.id, Product.name, Product.price).where(touched)):
+            suggestion_index.add(product)
+
+    def _commit_batch(self, batch):
+        try:
+            created, updated, errors, touched = self._flush(batch)
+            if self.dry_run:
+                db.session.rollback()
+                # Categories flushed for this batch are gone again
+                self._load_categories()
+                touched = None
+            else:
+                db.session.commit()
+        except Exception as e:
+            # A constraint failure (e.g. a SKU clash) rejects the whole batch; report every row in it
+            db.session.rollback()
+            self._load_categories()
+            errors = [(row_number, row, f'Batch failed: {e}') for row_number, row, _ in batch]
+            created = updated = 0
+            touched = None
+
+        self._refresh_index(touched)
+
+        self.report['created'] += created
+        self.report['updated'] += updated
+        for row_number, row, message in errors:
+            self._error(row_number, row, message)
+
+    def run(self, rows):
+        """
+        Import (row_number, row) pairs (see read_rows)
+        Returns: report dict
+        """
+        started = time.monotonic()
+        self._load_categories()
+
+        batch = []
+        for row_number, row in rows:
+            self.report['rows'] += 1
+            try:
+                if isinstance(row, RowError):
+                    raise row
+                if not isinstance(row, dict):
+                    raise RowError('Each row must be an object')
+                batch.append((row_number, row, self.validate(row)))
+            except RowError as e:
+                self._error(row_number, row, str(e))
+
+            if len(batch) >= self.batch_size:
+                self._commit_batch(batch)
+                batch = []
+        if batch:
+            self._commit_batch(batch)
+
+        elapsed = time.monotonic() - started
+        self.report['elapsed_seconds'] = round(elapsed, 3)
+        self.report['rows_per_second'] = round(self.report['rows'] / elapsed, 1) if elapsed else None
+        self.report['errors_truncated'] = self.report['failed'] > len(self.report['errors'])
+        return self.report
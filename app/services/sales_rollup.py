@@ -0,0 +1,260 @@
+"""Incrementally maintained sales rollups and the analytics served from them"""
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import case, func, select
+
+from app import db
+from app.models import Category, DailySales, Order, OrderItem, Product, ProductDailySales
+
+
+class SalesRollup:
+    """
+    Keeps daily_sales / product_daily_sales in step with orders. Every write
+    path that changes an order's status or payment status reports the
+    before and after states in its own transaction; the rollups receive the
+    difference, so they always equal what backfill() would compute from the
+    orders table. Analytics then read a row per day (or per product-day)
+    instead of scanning order history.
+
+    Sales are attributed to the UTC day the order was placed.
+    """
+
+    DEFAULT_RANGE_DAYS = 30
+    MAX_RANGE_DAYS = 366 * 3
+
+    @staticmethod
+    def _flags(state):
+        """
+        (active, cancelled, paid, refunded) for an order in state (status, payment_status).
+        Refunded orders stay paid: refunds are deducted once, via refunded_amount.
+        """
+        if state is None:
+            return 0, 0, 0, 0
+        status, payment_status = state
+        cancelled = int(status == 'cancelled')
+        refunded = int(payment_status == 'refunded')
+        return 1 - cancelled, cancelled, int(payment_status == 'completed') | refunded, refunded
+
+    @staticmethod
+    def _order_lines(order_id):
+        return db.session.execute(
+            select(OrderItem.product_id, Product.category_id, OrderItem.quantity, OrderItem.price_at_purchase)
+            .join(Product, Product.id == OrderItem.product_id)
+            .where(OrderItem.order_id == order_id)
+        ).all()
+
+    @classmethod
+    def record_order_change(cls, order_id, placed_at, total_amount, before, after, lines=None, refunded_amount=None):
+        """
+        Apply one order's state change to the rollups, in the caller's transaction
+        - before / after: (status, payment_status); before is None for a new order
+        - lines: [(product_id, category_id, quantity, unit_price)], loaded from
+          order_items when needed and not given
+        - refunded_amount: amount refunded by this change (defaults to the order total)
+        """
+        active, cancelled, paid, refunded = (
+            new - old for new, old in zip(cls._flags(after), cls._flags(before))
+        )
+        if not (active or cancelled or paid or refunded):
+            return
+
+        day = (placed_at or datetime.utcnow()).date()
+        total_amount = Decimal(str(total_amount))
+        daily = {
+            'day': day,
+            'orders': active,
+            'cancelled_orders': cancelled,
+            'gross_revenue': active * total_amount,
+            'paid_revenue': paid * total_amount,
+            'refunded_amount': refunded * (total_amount if refunded_amount is None else Decimal(str(refunded_amount)))
+        }
+
+        if active:
+            products = {}
+            for product_id, category_id, quantity, unit_price in (lines if lines is not None else cls._order_lines(order_id)):
+                row = products.setdefault(product_id, {
+                    'day': day, 'product_id': product_id, 'category_id': category_id, 'units': 0, 'revenue': 0
+                })
+                row['units'] += active * quantity
+                row['revenue'] += active * quantity * Decimal(unit_price)
+            daily['units'] = sum(row['units'] for row in products.values())
+            ProductDailySales.add(list(products.values()))
+
+        DailySales.add([daily])
+
+    @staticmethod
+    def _as_date(value):
+        # func.date() gives a string on SQLite and a date on MySQL
+        return date.fromisoformat(value) if isinstance(value, str) else value
+
+    @classmethod
+    def _rebuild_window(cls, start, end):
+        """Recompute both rollups for orders placed in [start, end]; returns (days, product_days)"""
+        for model in (DailySales, ProductDailySales):
+            db.session.query(model).filter(model.day >= start, model.day <= end).delete(synchronize_session=False)
+
+        placed_day = func.date(Order.created_at)
+        is_active = Order.status != 'cancelled'
+        in_window = (
+            Order.created_at >= datetime.combine(start, datetime.min.time()),
+            Order.created_at < datetime.combine(end + timedelta(days=1), datetime.min.time())
+        )
+
+        def total_where(condition, value):
+            return func.coalesce(func.sum(case((condition, value), else_=0)), 0)
+
+        product_rows = [
+            {'day': cls._as_date(day), 'product_id': product_id, 'category_id': category_id,
+             'units': int(units), 'revenue': revenue}
+            for day, product_id, category_id, units, revenue in db.session.execute(
+                select(
+                    placed_day, OrderItem.product_id, Product.category_id,
+                    func.sum(OrderItem.quantity), func.sum(OrderItem.quantity * OrderItem.price_at_purchase)
+                )
+                .join(OrderItem, OrderItem.order_id == Order.id)
+                .join(Product, Product.id == OrderItem.product_id)
+                .where(is_active, *in_window)
+                .group_by(placed_day, OrderItem.product_id, Product.category_id)
+            )
+        ]
+        units_by_day = defaultdict(int)
+        for row in product_rows:
+            units_by_day[row['day']] += row['units']
+
+        daily_rows = [
+            {'day': cls._as_date(day), 'orders': orders, 'cancelled_orders': cancelled,
+             'units': units_by_day[cls._as_date(day)], 'gross_revenue': gross, 'paid_revenue': paid,
+             'refunded_amount': refunded}
+            for day, orders, cancelled, gross, paid, refunded in db.session.execute(
+                select(
+                    placed_day,
+                    total_where(is_active, 1),
+                    total_where(Order.status == 'cancelled', 1),
+                    total_where(is_active, Order.total_amount),
+                    total_where(Order.payment_status.in_(('completed', 'refunded')), Order.total_amount),
+                    total_where(Order.payment_status == 'refunded', Order.total_amount)
+                ).where(*in_window).group_by(placed_day)
+            )
+        ]
+
+        ProductDailySales.add(product_rows)
+        DailySales.add(daily_rows)
+        return len(daily_rows), len(product_rows)
+
+    @classmethod
+    def backfill(cls, start=None, end=None, window_days=31):
+        """
+        Rebuild the rollups for orders placed between start and end (inclusive
+        dates, defaulting to the first and last order) from the orders table,
+        `window_days` at a time so memory stays bounded. Each window commits
+        on its own. Refunds count the full order total since partial refund
+        amounts are not stored on orders. Run while orders in the range are
+        not changing.
+        Returns: stats dict
+        """
+        started = time.monotonic()
+        if start is None or end is None:
+            first, last = db.session.query(func.min(Order.created_at), func.max(Order.created_at)).one()
+            if first is None:
+                return {'days': 0, 'product_days': 0, 'windows': 0, 'elapsed_seconds': 0.0}
+            start = start or first.date()
+            end = end or last.date()
+
+        stats = {'days': 0, 'product_days': 0, 'windows': 0}
+        window_start = start
+        while window_start <= end:
+            window_end = min(end, window_start + timedelta(days=window_days - 1))
+            days, product_days = cls._rebuild_window(window_start, window_end)
+            db.session.commit()
+            stats['days'] += days
+            stats['product_days'] += product_days
+            stats['windows'] += 1
+            window_start = window_end + timedelta(days=1)
+
+        stats['elapsed_seconds'] = round(time.monotonic() - started, 3)
+        return stats
+
+    @classmethod
+    def parse_range(cls, start=None, end=None):
+        """
+        Parse ISO dates from query parameters; defaults to the last
+        DEFAULT_RANGE_DAYS days ending today (UTC).
+        Raises: ValueError on bad dates or ranges
+        """
+        try:
+            end = date.fromisoformat(end) if end else datetime.utcnow().date()
+            start = date.fromisoformat(start) if start else end - timedelta(days=cls.DEFAULT_RANGE_DAYS - 1)
+        except ValueError:
+            raise ValueError('Dates must be in YYYY-MM-DD format')
+
+        if start > end:
+            raise ValueError('start must not be after end')
+        if (end - start).days >= cls.MAX_RANGE_DAYS:
+            raise ValueError(f'Date ranges are limited to {cls.MAX_RANGE_DAYS} days')
+        return start, end
+
+    @staticmethod
+    def sales_series(start, end):
+        """One entry per day in [start, end] (zeros for days without orders) plus range totals"""
+        rows = {
+            row.day: row for row in
+            DailySales.query.filter(DailySales.day >= start, DailySales.day <= end).all()
+        }
+
+        series = []
+        totals = defaultdict(float)
+        day = start
+        while day <= end:
+            entry = rows[day].to_dict() if day in rows else dict.fromkeys(DailySales.COUNTERS, 0) | {'day': day.isoformat()}
+            entry['net_revenue'] = round(entry['paid_revenue'] - entry['refunded_amount'], 2)
+            for name in (*DailySales.COUNTERS, 'net_revenue'):
+                totals[name] += entry[name]
+            series.append(entry)
+            day += timedelta(days=1)
+
+        return {
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'days': series,
+            'totals': {name: round(value, 2) for name, value in totals.items()}
+        }
+
+    @staticmethod
+    def top_products(start, end, limit=10, sort_by='units'):
+        """Best sellers over [start, end] by units or revenue"""
+        units = func.sum(ProductDailySales.units).label('units')
+        revenue = func.sum(ProductDailySales.revenue).label('revenue')
+        rows = db.session.execute(
+            select(Product.id, Product.name, units, revenue)
+            .join(ProductDailySales, ProductDailySales.product_id == Product.id)
+            .where(ProductDailySales.day >= start, ProductDailySales.day <= end)
+            .group_by(Product.id, Product.name)
+            .having(units > 0)
+            .order_by((revenue if sort_by == 'revenue' else units).desc(), Product.id)
+            .limit(limit)
+        ).all()
+        return [
+            {'product_id': product_id, 'name': name, 'units': int(units), 'revenue': float(revenue)}
+            for product_id, name, units, revenue in rows
+        ]
+
+    @staticmethod
+    def category_sales(start, end):
+        """Units and revenue per category over [start, end], highest revenue first"""
+        units = func.sum(ProductDailySales.units)
+        revenue = func.sum(ProductDailySales.revenue)
+        rows = db.session.execute(
+            select(ProductDailySales.category_id, Category.name, units, revenue)
+            .outerjoin(Category, Category.id == ProductDailySales.category_id)
+            .where(ProductDailySales.day >= start, ProductDailySales.day <= end)
+            .group_by(ProductDailySales.category_id, Category.name)
+            .having(units > 0)
+            .order_by(revenue.desc())
+        ).all()
+        return [
+            {'category_id': category_id, 'name': name, 'units': int(units), 'revenue': float(revenue)}
+            for category_id, name, units, revenue in rows
+        ]
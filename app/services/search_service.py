@@ -0,0 +1,118 @@
+"""Product full-text search service"""
+import re
+from sqlalchemy import column, func, literal_column, select, table, text, or_
+from sqlalchemy.dialects.mysql import match
+from app import db
+from app.models import Product
+from app.models.product import PRODUCTS_FTS_DDL
+
+
+class ProductSearch:
+    """
+    Full-text search over product names and descriptions
+    - MySQL: FULLTEXT index on (name, description), maintained by InnoDB
+    - SQLite: FTS5 virtual table `products_fts`, kept in sync by triggers on products
+    - Anything else (or a missing index): falls back to ILIKE scans
+    """
+
+    FTS_TABLE = 'products_fts'
+
+    # Engine URL -> whether the full-text index exists
+    _available = {}
+
+    @staticmethod
+    def _dialect():
+        return db.engine.dialect.name
+
+    @staticmethod
+    def _tokens(term):
+        """Split user input into plain word tokens safe to embed in a match expression"""
+        return re.findall(r'\w+', term.lower())
+
+    @classmethod
+    def is_available(cls):
+        """Check (once per engine) whether the full-text index exists"""
+        key = str(db.engine.url)
+        if key not in cls._available:
+            dialect = cls._dialect()
+            if dialect == 'sqlite':
+                found = db.session.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                    {'name': cls.FTS_TABLE}
+                ).first()
+            elif dialect == 'mysql':
+                found = db.session.execute(
+                    text("SHOW INDEX FROM products WHERE Index_type = 'FULLTEXT'")
+                ).first()
+            else:
+                found = None
+            cls._available[key] = found is not None
+        return cls._available[key]
+
+    @classmethod
+    def filter_query(cls, query, term):
+        """
+        Restrict a Product query to rows matching `term`
+        Returns: (query, relevance) - relevance is a sortable expression
+        (higher is better) or None when only the ILIKE fallback is available
+        """
+        tokens = cls._tokens(term)
+        if not tokens or not cls.is_available():
+            search_pattern = f'%{term}%'
+            return query.filter(
+                or_(
+                    Product.name.ilike(search_pattern),
+                    Product.description.ilike(search_pattern)
+                )
+            ), None
+
+        if cls._dialect() == 'mysql':
+            # Every token required, each matched as a word prefix
+            against = ' '.join(f'+{token}*' for token in tokens)
+            relevance = match(Product.name, Product.description, against=against).in_boolean_mode()
+            return query.filter(relevance > 0), relevance
+
+        fts = table(cls.FTS_TABLE, column('rowid'))
+        fts_match = ' '.join(f'"{token}"*' for token in tokens)
+        ranked = select(
+            fts.c.rowid.label('product_id'),
+            func.bm25(literal_column(cls.FTS_TABLE)).label('rank')
+        ).where(literal_column(cls.FTS_TABLE).op('MATCH')(fts_match)).subquery()
+
+        # bm25() is lower-is-better, so negate it for a consistent direction
+        return query.join(ranked, ranked.c.product_id == Product.id), -ranked.c.rank
+
+    @classmethod
+    def suggest(cls, term, limit=10):
+        """Product name suggestions using a prefix index instead of a substring scan"""
+        tokens = cls._tokens(term)
+        query = Product.query
+
+        if tokens and cls.is_available() and cls._dialect() == 'sqlite':
+            fts = table(cls.FTS_TABLE, column('rowid'))
+            fts_match = 'name: ' + ' '.join(f'"{token}"*' for token in tokens)
+            matching_ids = select(fts.c.rowid).where(
+                literal_column(cls.FTS_TABLE).op('MATCH')(fts_match)
+            )
+            query = query.filter(Product.id.in_(matching_ids))
+        else:
+            # Leading-anchored LIKE can use the B-tree index on products.name
+            escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            query = query.filter(Product.name.like(f'{escaped}%', escape='\\'))
+
+        return query.order_by(Product.name).limit(limit).all()
+
+    @classmethod
+    def rebuild_index(cls):
+        """Create the FTS table and its sync triggers if missing and repopulate it from products"""
+        if cls._dialect() != 'sqlite':
+            return
+        cls._available.pop(str(db.engine.url), None)
+        for statement in PRODUCTS_FTS_DDL:
+            db.session.execute(text(statement))
+        db.session.execute(text(f'DELETE FROM {cls.FTS_TABLE}'))
+        db.session.execute(text(
+            f"INSERT INTO {cls.FTS_TABLE} (rowid, name, description) "
+            f"SELECT id, name, COALESCE(description, '') FROM products"
+        ))
+        db.session.commit()
@@ -0,0 +1,318 @@
+"""In-memory prefix index for product search suggestions"""
+import re
+import sys
+import time
+from threading import Lock, RLock, Thread
+
+
+class _Node:
+    """Trie node holding the best few matches for its prefix"""
+    __slots__ = ('children', 'top', 'ids')
+
+    def __init__(self):
+        self.children = {}
+        self.top = []     # Sorted [(sort_key, product_id)], at most MAX_RESULTS
+        self.ids = None   # Products whose (truncated) key ends at this node
+
+
+class PrefixTrie:
+    """
+    Prefix trie over product names. Every word start in a name is indexed,
+    so "pro" matches both "Pro Blender" and "iPhone 15 Pro".
+    Each node keeps the top MAX_RESULTS matches (by name) for its prefix,
+    making a lookup O(len(prefix)) regardless of catalog size.
+    """
+
+    MAX_RESULTS = 10
+    MAX_DEPTH = 24  # Keys are truncated to this many characters
+
+    def __init__(self):
+        self.root = _Node()
+        self.products = {}  # product_id -> (name, price)
+        self.node_count = 1
+
+    @staticmethod
+    def normalize(text):
+        return ' '.join(text.lower().split())
+
+    @classmethod
+    def _keys(cls, name):
+        """Every suffix of the normalized name starting at a word boundary"""
+        normalized = cls.normalize(name)
+        starts = [m.start() for m in re.finditer(r'(?<!\w)\w', normalized)]
+        return {normalized[i:i + cls.MAX_DEPTH] for i in starts}
+
+    @staticmethod
+    def _sort_key(name, product_id):
+        return (name.lower(), product_id)
+
+    def insert(self, product_id, name, price):
+        if product_id in self.products:
+            self.remove(product_id)
+
+        self.products[product_id] = (name, price)
+        entry = (self._sort_key(name, product_id), product_id)
+
+        for key in self._keys(name):
+            node = self.root
+            for char in key:
+                child = node.children.get(char)
+                if child is None:
+                    child = node.children[char] = _Node()
+                    self.node_count += 1
+                node = child
+                self._offer(node, entry)
+            if node.ids is None:
+                node.ids = set()
+            node.ids.add(product_id)
+
+    def set_price(self, product_id, price):
+        """Change a stored price; ranking is by name, so no nodes move"""
+        if product_id in self.products:
+            self.products[product_id] = (self.products[product_id][0], price)
+
+    def _offer(self, node, entry):
+        """Insert entry into the node's top list if it ranks high enough"""
+        top = node.top
+        if any(existing_id == entry[1] for _, existing_id in top):
+            return
+        if len(top) < self.MAX_RESULTS or entry < top[-1]:
+            top.append(entry)
+            top.sort()
+            del top[self.MAX_RESULTS:]
+
+    def remove(self, product_id):
+        if product_id not in self.products:
+            return
+        name, _ = self.products.pop(product_id)
+
+        for key in self._keys(name):
+            path = [self.root]
+            for char in key:
+                node = path[-1].children.get(char)
+                if node is None:
+                    break
+                path.append(node)
+            else:
+                if path[-1].ids:
+                    path[-1].ids.discard(product_id)
+
+            # Repair top lists bottom-up and prune nodes that became empty
+            for depth in range(len(path) - 1, 0, -1):
+                node = path[depth]
+                if any(existing_id == product_id for _, existing_id in node.top):
+                    node.top = self._collect(node, self.MAX_RESULTS)
+                if not node.children and not node.ids:
+                    del path[depth - 1].children[key[depth - 1]]
+                    self.node_count -= 1
+
+    def _collect(self, node, limit, prefix=None):
+        """Gather the best `limit` matches from a subtree (used for repairs and long prefixes)"""
+        ids = set()
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            if current.ids:
+                ids.update(current.ids)
+            stack.extend(current.children.values())
+
+        entries = []
+        for product_id in ids:
+            if product_id not in self.products:
+                continue  # Being removed; other keys of it are not unlinked yet
+            name = self.products[product_id][0]
+            if prefix and not any(key.startswith(prefix) for key in self._word_suffixes(name)):
+                continue
+            entries.append((self._sort_key(name, product_id), product_id))
+        entries.sort()
+        return entries[:limit]
+
+    @classmethod
+    def _word_suffixes(cls, name):
+        normalized = cls.normalize(name)
+        return [normalized[m.start():] for m in re.finditer(r'(?<!\w)\w', normalized)]
+
+    def search(self, prefix, limit=MAX_RESULTS):
+        """Return [(product_id, name, price)] for names with a word starting with prefix"""
+        prefix = self.normalize(prefix)
+        node = self.root
+        for char in prefix[:self.MAX_DEPTH]:
+            node = node.children.get(char)
+            if node is None:
+                return []
+
+        if len(prefix) > self.MAX_DEPTH:
+            entries = self._collect(node, limit, prefix=prefix)
+        else:
+            entries = node.top[:limit]
+
+        return [(product_id, *self.products[product_id]) for _, product_id in entries]
+
+    def approx_bytes(self):
+        """Rough memory footprint of the trie structure"""
+        total = sys.getsizeof(self.products)
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            total += sys.getsizeof(node) + sys.getsizeof(node.children) + sys.getsizeof(node.top)
+            if node.ids:
+                total += sys.getsizeof(node.ids)
+            stack.extend(node.children.values())
+        return total
+
+
+class SuggestionIndex:
+    """
+    Process-local suggestion index, built from the products table and
+    updated incrementally by the admin product routes. Each worker process
+    holds its own copy and rebuilds it once it is older than the configured
+    TTL, so changes made through other workers show up eventually.
+
+    Builds run on a background thread, never on a request: a stale index
+    keeps serving until the new one is swapped in, and until the first
+    build finishes suggestions come from the database.
+    """
+
+    RETRY_SECONDS = 30  # Wait after a failed build before trying again
+
+    def __init__(self):
+        self._trie = None
+        self._lock = RLock()
+        self._build_lock = Lock()
+        self._pending = None  # Changes made while a build runs, replayed onto the new trie
+        self._app = None
+        self._generation = 0  # Bumped by init_app so builds started for an earlier app are discarded
+        self._rebuilding = False
+        self._retry_at = 0
+        self.rebuild_thread = None
+        self.ttl = 300
+        self.built_at = None
+        self.build_seconds = None
+
+    def init_app(self, app):
+        """
+        Configure from app settings. Nothing is read from the database here:
+        the first suggestion request starts the build.
+        """
+        with self._lock:
+            self._app = app
+            self._generation += 1
+            self._trie = None
+            self._retry_at = 0
+            self.built_at = None
+        self.ttl = app.config.get('SUGGESTION_INDEX_TTL', 300)
+
+    def rebuild(self):
+        """Rebuild the whole index from the database and swap it in"""
+        from app import db
+        from app.models import Product
+
+        with self._build_lock:
+            started = time.perf_counter()
+            with self._lock:
+                generation = self._generation
+                self._pending = []
+            try:
+                trie = PrefixTrie()
+                rows = db.session.query(Product.id, Product.name, Product.price).yield_per(1000)
+                for product_id, name, price in rows:
+                    trie.insert(product_id, name, float(price))
+
+                with self._lock:
+                    if generation != self._generation:
+                        return
+                    for method, args in self._pending:
+                        getattr(trie, method)(*args)
+                    self._trie = trie
+                    self.built_at = time.time()
+                    self.build_seconds = time.perf_counter() - started
+            finally:
+                with self._lock:
+                    self._pending = None
+
+    def _is_stale(self):
+        with self._lock:
+            return self._trie is None or bool(self.ttl and time.time() - self.built_at > self.ttl)
+
+    def _rebuild_in_background(self):
+        """Start a build on a background thread unless one is running (or recently failed)"""
+        from flask import current_app
+
+        with self._lock:
+            if self._rebuilding or time.time() < self._retry_at:
+                return
+            self._rebuilding = True
+            app = self._app or current_app._get_current_object()
+
+        def run():
+            from app import db
+
+            try:
+                with app.app_context():
+                    try:
+                        self.rebuild()
+                    except Exception:
+                        app.logger.exception('Suggestion index build failed')
+                        self._retry_at = time.time() + self.RETRY_SECONDS
+                    finally:
+                        db.session.remove()
+            finally:
+                with self._lock:
+                    self._rebuilding = False
+
+        self.rebuild_thread = Thread(target=run, name='suggestion-index-build', daemon=True)
+        self.rebuild_thread.start()
+
+    def _change(self, method, *args):
+        """Apply a change to the live trie and to any build in progress"""
+        with self._lock:
+            if self._trie is not None:
+                getattr(self._trie, method)(*args)
+            if self._pending is not None:
+                self._pending.append((method, args))
+
+    def suggest(self, prefix, limit=PrefixTrie.MAX_RESULTS):
+        """Suggestions as [{'id', 'name', 'price'}]"""
+        if self._is_stale():
+            self._rebuild_in_background()
+
+        with self._lock:
+            if self._trie is not None:
+                matches = self._trie.search(prefix, limit)
+                return [{'id': product_id, 'name': name, 'price': price} for product_id, name, price in matches]
+
+        # First build still running: database prefix search meanwhile
+        from app.services.search_service import ProductSearch
+        return [{'id': p.id, 'name': p.name, 'price': float(p.price)} for p in ProductSearch.suggest(prefix, limit)]
+
+    def add(self, product):
+        """Add or refresh a product (call after the change is committed)"""
+        self._change('insert', product.id, product.name, float(product.price))
+
+    def update_prices(self, prices):
+        """Refresh prices ({product_id: price}) in place (call after the change is committed)"""
+        for product_id, price in prices.items():
+            self._change('set_price', product_id, float(price))
+
+    def remove(self, product_id):
+        """Drop a product (call after the delete is committed)"""
+        self._change('remove', product_id)
+
+    def stats(self):
+        """Size and freshness information for monitoring"""
+        with self._lock:
+            if self._trie is None:
+                return {'built': False, 'rebuilding': self._rebuilding}
+            return {
+                'built': True,
+                'rebuilding': self._rebuilding,
+                'products': len(self._trie.products),
+                'nodes': self._trie.node_count,
+                'approx_bytes': self._trie.approx_bytes(),
+                'built_at': self.built_at,
+                'build_seconds': self.build_seconds,
+                'ttl_seconds': self.ttl
+            }
+
+
+suggestion_index = SuggestionIndex()
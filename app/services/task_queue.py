@@ -0,0 +1,167 @@
+"""Bounded background task execution"""
+import atexit
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Condition, Lock
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(Exception):
+    """Raised when a task is submitted while the queue is at capacity"""
+
+
+class BoundedExecutor:
+    """
+    Thread pool with a bounded backlog.
+    At most `max_workers` tasks run at once and at most `max_queue_size`
+    more wait behind them; further submissions block for up to
+    `submit_timeout` seconds and are then rejected with QueueFullError,
+    so a traffic spike turns into backpressure instead of unbounded threads
+    and memory. Tasks that raise are logged, since callers usually don't
+    keep the returned futures.
+    """
+
+    def __init__(self, name, max_workers=4, max_queue_size=100, submit_timeout=0):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+        self.submit_timeout = submit_timeout
+
+        self._executor = None
+        self._executor_lock = Lock()
+        self._state = Condition()
+        self._accepting = True
+        self._shutdown_registered = False
+
+        # Metrics
+        self._pending = 0  # Queued + running
+        self._active = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+
+    def configure(self, max_workers=None, max_queue_size=None, submit_timeout=None):
+        """Change sizing; only takes effect before the first task is submitted"""
+        if max_workers is not None:
+            self.max_workers = max_workers
+        if max_queue_size is not None:
+            self.max_queue_size = max_queue_size
+        if submit_timeout is not None:
+            self.submit_timeout = submit_timeout
+
+    def _get_executor(self):
+        # Threads are started lazily so forking servers don't copy dead pools
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix=self.name
+                    )
+        return self._executor
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        Queue fn(*args, **kwargs) for execution
+        Raises: QueueFullError if no slot frees up within submit_timeout
+        """
+        capacity = self.max_workers + self.max_queue_size
+        deadline = time.monotonic() + self.submit_timeout
+
+        with self._state:
+            while self._accepting and self._pending >= capacity:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._state.wait(remaining)
+
+            if not self._accepting:
+                self._rejected += 1
+                raise QueueFullError(f'{self.name} is shutting down')
+            if self._pending >= capacity:
+                self._rejected += 1
+                raise QueueFullError(f'{self.name} queue is full')
+
+            self._pending += 1
+
+        def run():
+            with self._state:
+                self._active += 1
+            failed = False
+            try:
+                return fn(*args, **kwargs)
+            except Exception:
+                failed = True
+                raise
+            finally:
+                with self._state:
+                    self._active -= 1
+                    self._pending -= 1
+                    if failed:
+                        self._failed += 1
+                    else:
+                        self._completed += 1
+                    self._state.notify_all()
+
+        try:
+            future = self._get_executor().submit(run)
+        except RuntimeError:
+            # Executor already shut down
+            with self._state:
+                self._pending -= 1
+                self._rejected += 1
+            raise QueueFullError(f'{self.name} is shutting down')
+
+        future.add_done_callback(self._log_failure)
+        return future
+
+    def _log_failure(self, future):
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            logger.error(f'{self.name} task failed: {error!r}', exc_info=error)
+
+    def metrics(self):
+        """Queue depth and throughput counters"""
+        with self._state:
+            return {
+                'name': self.name,
+                'workers': self.max_workers,
+                'queue_capacity': self.max_queue_size,
+                'queued': self._pending - self._active,
+                'active': self._active,
+                'completed': self._completed,
+                'failed': self._failed,
+                'rejected': self._rejected,
+                'accepting': self._accepting
+            }
+
+    def shutdown(self, timeout=None):
+        """
+        Stop accepting tasks and wait up to `timeout` seconds for queued and
+        running tasks to finish. Returns True if everything drained.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        with self._state:
+            self._accepting = False
+            while self._pending:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._state.wait(remaining)
+            drained = self._pending == 0
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=drained, cancel_futures=not drained)
+
+        return drained
+
+    def register_shutdown(self, timeout):
+        """Drain the queue when the process exits"""
+        if not self._shutdown_registered:
+            atexit.register(self.shutdown, timeout)
+            self._shutdown_registered = True
@@ -0,0 +1,71 @@
+"""Small in-process caches"""
+import time
+from collections import OrderedDict
+from threading import Lock
+
+
+class TTLCache:
+    """
+    Thread-safe per-process cache whose entries expire `ttl` seconds after
+    being stored. At most `maxsize` entries are kept; the least recently
+    used are evicted first. Each worker process has its own copy, so values
+    changed elsewhere are picked up at most `ttl` seconds late unless the
+    writer calls invalidate() in the same process.
+    """
+
+    _MISSING = object()
+
+    def __init__(self, ttl=30, maxsize=1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get_or_set(self, key, loader, ttl=None):
+        """Return the cached value, or call loader() and cache its result"""
+        value = self.get(key, self._MISSING)
+        if value is self._MISSING:
+            value = loader()
+            self.set(key, value, ttl)
+        return value
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses
+            }
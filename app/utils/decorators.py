@@ -1,21 +1,78 @@
 """Custom decorators for route protection"""
+import hashlib
 from functools import wraps
-from flask import jsonify
-from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
-from app.models import User
+from flask import jsonify, request, current_app, make_response, Response
+from flask_jwt_extended import verify_jwt_in_request, get_jwt, get_jwt_identity
+from app import db
+from app.models import User, IdempotencyKey
+from app.utils.cache import TTLCache
+
+
+def token_version_cache():
+    """
+    The current app's user_id -> User.token_version cache, so admin checks
+    don't hit the database. Kept per app (like the rate limiter's buckets)
+    since versions belong to that app's database.
+    """
+    cache = current_app.extensions.get('token_versions')
+    if cache is None:
+        cache = current_app.extensions.setdefault('token_versions', TTLCache(ttl=30, maxsize=10000))
+    return cache
+
+
+def current_token_version(user_id):
+    """A user's token version (None if the user is gone), cached for JWT_TOKEN_VERSION_TTL seconds"""
+    return token_version_cache().get_or_set(
+        user_id,
+        lambda: db.session.query(User.token_version).filter(User.id == user_id).scalar(),
+        ttl=current_app.config.get('JWT_TOKEN_VERSION_TTL', 30)
+    )
+
+
+def revoke_user_tokens(user_id):
+    """
+    Invalidate a user's issued tokens (in the caller's transaction), e.g.
+    after a role change. Call forget_token_version() once the transaction
+    has committed; the change then takes effect at once in this process and
+    within JWT_TOKEN_VERSION_TTL seconds in others.
+    """
+    User.bump_token_version(user_id)
+
+
+def forget_token_version(user_id):
+    """
+    Drop a user's cached token version. Only after the bump has committed:
+    a request in between would otherwise re-cache the old version.
+    """
+    token_version_cache().invalidate(user_id)
 
 
 def admin_required(fn):
-    """Decorator to require admin role"""
+    """
+    Decorator to require admin role
+    The role comes from the token's claims; the token version claim is
+    checked against the (cached) current version so tokens issued before a
+    role change stop working.
+    """
     @wraps(fn)
     def wrapper(*args, **kwargs):
         verify_jwt_in_request()
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        claims = get_jwt()
+
+        if 'role' not in claims:
+            # Token issued before role claims existed
+            user = User.query.get(current_user_id)
+            if not user or user.role != 'admin':
+                return jsonify({'error': 'Admin access required'}), 403
+            return fn(*args, **kwargs)
 
-        if not user or user.role != 'admin':
+        if claims['role'] != 'admin':
             return jsonify({'error': 'Admin access required'}), 403
 
+        if claims.get('tv') != current_token_version(current_user_id):
+            return jsonify({'error': 'Token has been revoked, please log in again'}), 401
+
         return fn(*args, **kwargs)
     return wrapper
 
@@ -27,3 +84,61 @@ def login_required_jwt(fn):
         verify_jwt_in_request()
         return fn(*args, **kwargs)
     return wrapper
+
+
+def idempotent(fn):
+    """
+    Decorator to honour an Idempotency-Key request header.
+    The first request with a key runs normally and its response is stored;
+    retries with the same key (and body) get the stored response back without
+    re-running the view. While it runs, retries get 409; if it hasn't finished
+    within IDEMPOTENCY_LEASE_SECONDS, the next retry runs it instead.
+    Must be applied below @jwt_required().
+    """
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get('Idempotency-Key')
+        if not key:
+            return fn(*args, **kwargs)
+
+        if len(key) > 255:
+            return jsonify({'error': 'Idempotency-Key must be at most 255 characters'}), 400
+
+        request_hash = hashlib.sha256(request.get_data()).hexdigest()
+        record, created = IdempotencyKey.claim(
+            get_jwt_identity(),
+            request.endpoint,
+            key,
+            request_hash,
+            current_app.config.get('IDEMPOTENCY_KEY_TTL', 24 * 60 * 60),
+            current_app.config.get('IDEMPOTENCY_LEASE_SECONDS', 60)
+        )
+
+        if not created:
+            if record is None:
+                # Claimed and released again while we looked; let the client retry
+                return jsonify({'error': 'Request with this Idempotency-Key is in progress'}), 409
+            if record.request_hash != request_hash:
+                return jsonify({'error': 'Idempotency-Key was already used with a different request'}), 422
+            if record.status_code is None:
+                return jsonify({'error': 'Request with this Idempotency-Key is in progress'}), 409
+
+            response = Response(record.response_body, status=record.status_code, mimetype='application/json')
+            response.headers['Idempotent-Replayed'] = 'true'
+            return response
+
+        record_id = record.id
+        try:
+            response = make_response(fn(*args, **kwargs))
+        except Exception:
+            IdempotencyKey.release(record_id)
+            raise
+
+        # Server errors are not stored so the client can retry them
+        if response.status_code >= 500:
+            IdempotencyKey.release(record_id)
+        else:
+            IdempotencyKey.complete(record_id, response.status_code, response.get_data(as_text=True))
+
+        return response
+    return wrapper
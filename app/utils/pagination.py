@@ -0,0 +1,105 @@
+"""Keyset (cursor) pagination helpers"""
+import base64
+import json
+from datetime import datetime
+from decimal import Decimal
+from sqlalchemy import and_, or_
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a client sends a cursor that cannot be decoded"""
+
+
+def _dump_value(value):
+    """Tag sort key values so they round-trip through JSON with their type"""
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    if isinstance(value, Decimal):
+        return {'dec': str(value)}
+    return value
+
+
+def _load_value(value):
+    if isinstance(value, dict):
+        if 'dt' in value:
+            return datetime.fromisoformat(value['dt'])
+        if 'dec' in value:
+            return Decimal(value['dec'])
+    return value
+
+
+def encode_cursor(sort_key, item_id, scope):
+    """Build an opaque cursor pointing just after (sort_key, item_id)"""
+    payload = json.dumps({'k': _dump_value(sort_key), 'id': item_id, 's': scope}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, scope):
+    """
+    Decode a cursor produced by encode_cursor
+    Returns: (sort_key, item_id)
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        sort_key, item_id = _load_value(payload['k']), int(payload['id'])
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursorError('Invalid cursor') from e
+
+    # A cursor is only meaningful for the ordering it was issued for
+    if payload.get('s') != scope:
+        raise InvalidCursorError('Cursor does not match the requested sort order')
+
+    return sort_key, item_id
+
+
+def keyset_paginate(query, sort_column, id_column, cursor, per_page, descending=True, scope='default'):
+    """
+    Fetch one page of `query` ordered by (sort_column, id_column), seeking past
+    the position encoded in `cursor` instead of using OFFSET.
+
+    The cursor stores the sort value exactly as the database computed it
+    (sort_column is selected alongside each row), so the seek comparisons
+    agree with the ORDER BY even for computed expressions such as ratios
+    or lower(name) under the column collation.
+
+    Args:
+        query: SQLAlchemy query with filters already applied
+        sort_column: Column or expression to sort on
+        id_column: Unique tiebreaker column (primary key)
+        cursor: Cursor from a previous page, or empty/None for the first page
+        per_page: Page size
+        descending: Sort direction for both columns
+        scope: Identifies the ordering; cursors from other orderings are rejected
+
+    Returns:
+        (items, next_cursor) - next_cursor is None on the last page
+    """
+    if cursor:
+        last_key, last_id = decode_cursor(cursor, scope)
+        if descending:
+            query = query.filter(or_(
+                sort_column < last_key,
+                and_(sort_column == last_key, id_column < last_id)
+            ))
+        else:
+            query = query.filter(or_(
+                sort_column > last_key,
+                and_(sort_column == last_key, id_column > last_id)
+            ))
+
+    query = query.order_by(None)
+    if descending:
+        query = query.order_by(sort_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(sort_column.asc(), id_column.asc())
+
+    # Fetch one extra row to know whether another page exists
+    rows = query.add_columns(sort_column.label('keyset_sort_key')).limit(per_page + 1).all()
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        last, last_key = rows[-1]
+        next_cursor = encode_cursor(last_key, last.id, scope)
+
+    return [item for item, _ in rows], next_cursor
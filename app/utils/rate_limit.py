@@ -0,0 +1,198 @@
+"""Token bucket rate limiting for selected endpoints"""
+import importlib
+import math
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from threading import Lock
+
+from flask import current_app, g, jsonify, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+
+class RateLimit:
+    """
+    A bucket of `capacity` tokens refilled at `rate` tokens per second.
+    Built from "<count>/<second|minute|hour|day>" plus an optional burst
+    (bucket size, defaults to count).
+    """
+
+    def __init__(self, capacity, rate):
+        if capacity < 1 or rate <= 0:
+            raise ValueError('Rate limits need a capacity of at least 1 and a positive rate')
+        self.capacity = capacity
+        self.rate = rate
+
+    @classmethod
+    def parse(cls, spec):
+        """Accepts '10/minute' or {'limit': '10/minute', 'burst': 20}"""
+        burst = None
+        if isinstance(spec, dict):
+            burst = spec.get('burst')
+            spec = spec['limit']
+
+        try:
+            count, period = spec.split('/')
+            count = int(count)
+            seconds = PERIODS[period.strip()]
+        except (ValueError, KeyError):
+            raise ValueError(f'Invalid rate limit {spec!r}; expected e.g. "10/minute"')
+
+        return cls(capacity=burst or count, rate=count / seconds)
+
+
+class RateLimitStore(ABC):
+    """
+    Where bucket state lives. The in-process MemoryStore gives each worker
+    its own buckets; a shared store (e.g. Redis running the same refill
+    arithmetic in a script) makes limits global. Implementations must make
+    consume() atomic per key.
+    """
+
+    @abstractmethod
+    def consume(self, key, limit, cost=1):
+        """
+        Take `cost` tokens from the bucket for `key`
+        Returns: (allowed, remaining_tokens, retry_after_seconds)
+        """
+
+
+class MemoryStore(RateLimitStore):
+    """Per-process buckets; idle buckets beyond `max_keys` are dropped oldest first"""
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()  # key -> (tokens, updated_at)
+        self._lock = Lock()
+
+    def consume(self, key, limit, cost=1):
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (limit.capacity, now))
+            tokens = min(limit.capacity, tokens + (now - updated_at) * limit.rate)
+
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                # A dropped bucket restarts full, so evicting only ever errs towards allowing
+                self._buckets.popitem(last=False)
+
+        retry_after = 0 if allowed else (cost - tokens) / limit.rate
+        return allowed, tokens, retry_after
+
+
+def load_store(name):
+    """'memory' or 'package.module:ClassName' for a custom RateLimitStore"""
+    if name == 'memory':
+        return MemoryStore()
+    module_name, _, class_name = name.partition(':')
+    if not class_name:
+        raise ValueError(f'Invalid RATE_LIMIT_STORE {name!r}; use "memory" or "package.module:ClassName"')
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+class RateLimiter:
+    """
+    Applies RATE_LIMITS before each request. Keys are endpoint names
+    ('auth.login') or blueprint names ('coupons'); an endpoint entry wins
+    over its blueprint's. Authenticated callers are limited per user,
+    everyone else per client IP (as rewritten by ProxyFix, see
+    PROXY_FIX_X_FOR). RATE_LIMITS_BY_FIELD adds a second bucket per value of
+    a JSON body field, e.g. per target email for logins, so spreading
+    attempts over many addresses doesn't help. Over-limit requests get 429
+    with a Retry-After header.
+    """
+
+    def init_app(self, app):
+        limits = {
+            name: RateLimit.parse(spec)
+            for name, spec in app.config.get('RATE_LIMITS', {}).items()
+        }
+        field_limits = {
+            name: (spec['field'], RateLimit.parse(spec))
+            for name, spec in app.config.get('RATE_LIMITS_BY_FIELD', {}).items()
+        }
+        registered = 'rate_limiter' in app.extensions
+        # Per-app state, so each app (and each test) gets its own buckets
+        app.extensions['rate_limiter'] = {
+            'limits': limits,
+            'field_limits': field_limits,
+            'store': load_store(app.config.get('RATE_LIMIT_STORE', 'memory'))
+        }
+
+        if app.config.get('RATE_LIMIT_ENABLED', True) and not registered:
+            app.before_request(self._check)
+            app.after_request(self._add_headers)
+
+    @staticmethod
+    def store():
+        """The current app's RateLimitStore"""
+        return current_app.extensions['rate_limiter']['store']
+
+    @staticmethod
+    def _client_key():
+        try:
+            verify_jwt_in_request(optional=True)
+            user_id = get_jwt_identity()
+        except Exception:
+            # Bad tokens are the view's business; limit by address meanwhile
+            user_id = None
+        if user_id is not None:
+            return f'user:{user_id}'
+        return f'ip:{request.remote_addr}'
+
+    @staticmethod
+    def _field_value(field):
+        data = request.get_json(silent=True)
+        value = data.get(field) if isinstance(data, dict) else None
+        return value.strip().lower() if isinstance(value, str) and value.strip() else None
+
+    def _check(self):
+        if request.method == 'OPTIONS':
+            return None
+
+        state = current_app.extensions['rate_limiter']
+        limits = state['limits']
+        rule = request.endpoint if request.endpoint in limits else request.blueprint
+        if rule in limits:
+            limit = limits[rule]
+            allowed, remaining, retry_after = state['store'].consume(f'{rule}:{self._client_key()}', limit)
+            g.rate_limit = (limit, remaining)
+            if not allowed:
+                return self._reject(retry_after)
+
+        if request.endpoint in state['field_limits']:
+            field, limit = state['field_limits'][request.endpoint]
+            value = self._field_value(field)
+            if value is not None:
+                allowed, _, retry_after = state['store'].consume(f'{request.endpoint}:{field}:{value}', limit)
+                if not allowed:
+                    return self._reject(retry_after)
+
+        return None
+
+    @staticmethod
+    def _reject(retry_after):
+        retry_after = max(1, math.ceil(retry_after))
+        response = jsonify({'error': 'Too many requests, please slow down', 'retry_after': retry_after})
+        response.status_code = 429
+        response.headers['Retry-After'] = str(retry_after)
+        return response
+
+    @staticmethod
+    def _add_headers(response):
+        state = g.get('rate_limit')
+        if state is not None:
+            limit, remaining = state
+            response.headers['X-RateLimit-Limit'] = str(limit.capacity)
+            response.headers['X-RateLimit-Remaining'] = str(int(remaining))
+        return response
+
+
+rate_limiter = RateLimiter()
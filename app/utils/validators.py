@@ -1,9 +1,14 @@
 """Input validation utilities"""
 import re
 import os
+from decimal import Decimal, InvalidOperation
 from email_validator import validate_email, EmailNotValidError
 
 
+# Prices are stored as Numeric(10, 2)
+MAX_PRICE = Decimal('99999999.99')
+
+
 def validate_email_format(email):
     """Validate email format"""
     try:
@@ -50,3 +55,21 @@ def validate_required_fields(data, required_fields):
         return False, missing_fields
 
     return True, []
+
+
+def validate_price(value):
+    """
+    Parse a price and round it to cents
+    Returns: (is_valid, Decimal price or error message)
+    """
+    try:
+        price = Decimal(str(value).strip())
+    except InvalidOperation:
+        return False, 'price must be a number'
+    if not price.is_finite():
+        return False, 'price must be a number'
+
+    # Bound it first: quantize() raises for values with too many digits (e.g. 1e30)
+    if price < 0 or price > MAX_PRICE or price.quantize(Decimal('0.01')) > MAX_PRICE:
+        return False, f'price must be between 0 and {MAX_PRICE}'
+    return True, price.quantize(Decimal('0.01'))
@@ -23,6 +23,98 @@ class Config:
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
 
+    # Admin dashboard: seconds to reuse computed statistics
+    DASHBOARD_CACHE_TTL = int(os.getenv('DASHBOARD_CACHE_TTL', 30))
+
+    # Bulk product import: rows written per transaction, row errors listed in the report
+    PRODUCT_IMPORT_BATCH_SIZE = int(os.getenv('PRODUCT_IMPORT_BATCH_SIZE', 2000))
+    PRODUCT_IMPORT_MAX_ERRORS = int(os.getenv('PRODUCT_IMPORT_MAX_ERRORS', 1000))
+
+    # Bulk price / stock updates: most items accepted per request
+    BULK_UPDATE_MAX_ITEMS = int(os.getenv('BULK_UPDATE_MAX_ITEMS', 10000))
+
+    # Admin exports: rows fetched per round trip from the server-side cursor
+    EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', 2000))
+
+    # Rate limiting: endpoint ('auth.login') or blueprint ('coupons') -> "<count>/<second|minute|hour|day>"
+    # or {'limit': ..., 'burst': ...}. Per user when authenticated, otherwise per IP.
+    RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+    RATE_LIMIT_STORE = os.getenv('RATE_LIMIT_STORE', 'memory')  # Or "package.module:StoreClass" for a shared store
+    RATE_LIMITS = {
+        'auth.login': {'limit': '10/minute', 'burst': 5},
+        'auth.register': '5/minute',
+        'products.search_suggestions': {'limit': '10/second', 'burst': 20},
+        'coupons.validate_coupon': '20/minute'
+    }
+    # Extra buckets per value of a JSON body field, whichever client sends it
+    RATE_LIMITS_BY_FIELD = {
+        'auth.login': {'field': 'email', 'limit': '20/hour', 'burst': 10}
+    }
+    # Trusted reverse proxies in front of the app; their X-Forwarded-For entries
+    # give the client address used for per-IP limits (0: use the socket address)
+    PROXY_FIX_X_FOR = int(os.getenv('PROXY_FIX_X_FOR', 0))
+
+    # Password hashing (executor: process, thread, inline)
+    BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', 12))  # Work factor; existing hashes are upgraded on login
+    BCRYPT_EXECUTOR = os.getenv('BCRYPT_EXECUTOR', 'process')
+    BCRYPT_WORKERS = int(os.getenv('BCRYPT_WORKERS', 0))  # 0: half the CPU cores
+    BCRYPT_MAX_PENDING = int(os.getenv('BCRYPT_MAX_PENDING', 8))  # Waiting hashes before shedding load
+    BCRYPT_ADMISSION_TIMEOUT = float(os.getenv('BCRYPT_ADMISSION_TIMEOUT', 0.5))  # Seconds to wait for a slot
+
+    # Seconds a worker may keep using a cached user token version; bounds how
+    # long a revoked admin token keeps working in other processes
+    JWT_TOKEN_VERSION_TTL = int(os.getenv('JWT_TOKEN_VERSION_TTL', 30))
+
+    # Search suggestions (in-memory prefix index per worker process)
+    SUGGESTION_INDEX_ENABLED = os.getenv('SUGGESTION_INDEX_ENABLED', 'true').lower() == 'true'
+    SUGGESTION_INDEX_TTL = int(os.getenv('SUGGESTION_INDEX_TTL', 300))  # Seconds before a background rebuild
+
+    # Background payment finalization (bounded worker pool)
+    PAYMENT_WORKERS = int(os.getenv('PAYMENT_WORKERS', 8))
+    PAYMENT_QUEUE_SIZE = int(os.getenv('PAYMENT_QUEUE_SIZE', 1000))  # Waiting jobs before rejecting
+    PAYMENT_QUEUE_TIMEOUT = float(os.getenv('PAYMENT_QUEUE_TIMEOUT', 0))  # Seconds to wait for a free slot
+    PAYMENT_DRAIN_TIMEOUT = float(os.getenv('PAYMENT_DRAIN_TIMEOUT', 30))  # Seconds to drain on shutdown
+
+    # Reconciliation of payments stuck in 'processing' (scripts/reconcile_payments.py)
+    PAYMENT_RECONCILE_AFTER = int(os.getenv('PAYMENT_RECONCILE_AFTER', 300))  # Seconds before a payment counts as stuck
+    PAYMENT_RECONCILE_BATCH_SIZE = int(os.getenv('PAYMENT_RECONCILE_BATCH_SIZE', 200))
+    PAYMENT_RECONCILE_WORKERS = int(os.getenv('PAYMENT_RECONCILE_WORKERS', 8))
+
+    # Long-poll payment status endpoint
+    PAYMENT_STATUS_MAX_WAIT = float(os.getenv('PAYMENT_STATUS_MAX_WAIT', 25))  # Seconds a request may be parked
+    PAYMENT_STATUS_RECHECK_INTERVAL = float(os.getenv('PAYMENT_STATUS_RECHECK_INTERVAL', 5))  # Seconds between DB re-reads
+    PAYMENT_STATUS_MAX_WAITERS = int(os.getenv('PAYMENT_STATUS_MAX_WAITERS', 500))  # Parked requests per process before 429
+
+    # Payment gateway simulator (latency: none, fixed, uniform, normal, exponential)
+    PAYMENT_SIM_LATENCY = os.getenv('PAYMENT_SIM_LATENCY', 'uniform')
+    PAYMENT_SIM_LATENCY_MIN = float(os.getenv('PAYMENT_SIM_LATENCY_MIN', 1))  # Seconds (uniform)
+    PAYMENT_SIM_LATENCY_MAX = float(os.getenv('PAYMENT_SIM_LATENCY_MAX', 3))  # Seconds (uniform)
+    PAYMENT_SIM_LATENCY_MEAN = float(os.getenv('PAYMENT_SIM_LATENCY_MEAN', 2))  # Seconds (fixed, normal, exponential)
+    PAYMENT_SIM_LATENCY_STDDEV = float(os.getenv('PAYMENT_SIM_LATENCY_STDDEV', 0.5))  # Seconds (normal)
+    PAYMENT_SIM_SUCCESS_RATES = os.getenv('PAYMENT_SIM_SUCCESS_RATES', '')  # e.g. "credit_card=0.9,paypal=0.95"
+    PAYMENT_SIM_SEED = os.getenv('PAYMENT_SIM_SEED')  # Set for reproducible outcomes
+
+    # Email delivery (transport: console, smtp, memory) and the background outbox sender
+    EMAIL_TRANSPORT = os.getenv('EMAIL_TRANSPORT', 'console')
+    EMAIL_FROM = os.getenv('EMAIL_FROM', 'no-reply@example.com')
+    SMTP_HOST = os.getenv('SMTP_HOST', 'localhost')
+    SMTP_PORT = int(os.getenv('SMTP_PORT', 25))
+    SMTP_USERNAME = os.getenv('SMTP_USERNAME')
+    SMTP_PASSWORD = os.getenv('SMTP_PASSWORD')
+    SMTP_USE_TLS = os.getenv('SMTP_USE_TLS', 'false').lower() == 'true'
+    EMAIL_WORKER_ENABLED = os.getenv('EMAIL_WORKER_ENABLED', 'false').lower() == 'true'  # On: run.py also sends; else run scripts/run_email_worker.py
+    EMAIL_WORKERS = int(os.getenv('EMAIL_WORKERS', 4))
+    EMAIL_BATCH_SIZE = int(os.getenv('EMAIL_BATCH_SIZE', 50))
+    EMAIL_POLL_INTERVAL = float(os.getenv('EMAIL_POLL_INTERVAL', 2))  # Seconds between outbox polls
+    EMAIL_MAX_ATTEMPTS = int(os.getenv('EMAIL_MAX_ATTEMPTS', 5))
+    EMAIL_RETRY_BASE = float(os.getenv('EMAIL_RETRY_BASE', 30))  # Seconds; doubles on each retry
+    EMAIL_RETRY_MAX = float(os.getenv('EMAIL_RETRY_MAX', 3600))
+    EMAIL_LEASE_SECONDS = int(os.getenv('EMAIL_LEASE_SECONDS', 300))  # Claimed rows become due again after this
+
+    # Idempotency-Key support for checkout and payment initiation
+    IDEMPOTENCY_KEY_TTL = int(os.getenv('IDEMPOTENCY_KEY_TTL', 24 * 60 * 60))  # Seconds
+    IDEMPOTENCY_LEASE_SECONDS = int(os.getenv('IDEMPOTENCY_LEASE_SECONDS', 60))  # Unfinished claims are taken over after this
+
 
 class DevelopmentConfig(Config):
     """Development configuration"""
@@ -40,6 +132,11 @@ class TestingConfig(Config):
     """Testing configuration"""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///test.db'
+    PAYMENT_SIM_LATENCY = 'none'
+    EMAIL_TRANSPORT = 'memory'
+    EMAIL_WORKER_ENABLED = False
+    BCRYPT_ROUNDS = 4
+    BCRYPT_EXECUTOR = 'inline'
 
 
 config = {
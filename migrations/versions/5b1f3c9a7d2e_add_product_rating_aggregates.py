@@ -0,0 +1,35 @@
+"""Add denormalized rating aggregates to products
+
+Revision ID: 5b1f3c9a7d2e
+Revises: 2834ecc82fd3
+Create Date: 2026-10-17 09:12:41.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b1f3c9a7d2e'
+down_revision = '2834ecc82fd3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('rating_sum', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('rating_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Backfill from existing reviews
+    op.execute("""
+        UPDATE products SET
+            rating_sum = (SELECT COALESCE(SUM(rating), 0) FROM reviews WHERE reviews.product_id = products.id),
+            rating_count = (SELECT COUNT(*) FROM reviews WHERE reviews.product_id = products.id)
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.drop_column('rating_count')
+        batch_op.drop_column('rating_sum')
@@ -0,0 +1,42 @@
+"""Add (sort_key, id) indexes for keyset pagination
+
+Revision ID: 9c4e2a61f0b8
+Revises: 5b1f3c9a7d2e
+Create Date: 2026-10-17 10:03:55.902117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c4e2a61f0b8'
+down_revision = '5b1f3c9a7d2e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.create_index('ix_orders_created_at_id', ['created_at', 'id'], unique=False)
+        batch_op.create_index('ix_orders_user_id_created_at_id', ['user_id', 'created_at', 'id'], unique=False)
+
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.create_index('ix_products_created_at_id', ['created_at', 'id'], unique=False)
+        batch_op.create_index('ix_products_price_id', ['price', 'id'], unique=False)
+
+    with op.batch_alter_table('reviews', schema=None) as batch_op:
+        batch_op.create_index('ix_reviews_created_at_id', ['created_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('reviews', schema=None) as batch_op:
+        batch_op.drop_index('ix_reviews_created_at_id')
+
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.drop_index('ix_products_price_id')
+        batch_op.drop_index('ix_products_created_at_id')
+
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.drop_index('ix_orders_user_id_created_at_id')
+        batch_op.drop_index('ix_orders_created_at_id')
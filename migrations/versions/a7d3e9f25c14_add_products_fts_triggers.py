@@ -0,0 +1,49 @@
+"""Keep the SQLite products_fts index in sync with triggers
+
+Revision ID: a7d3e9f25c14
+Revises: f3a8d2c61b47
+Create Date: 2026-10-18 09:42:17.305118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7d3e9f25c14'
+down_revision = 'f3a8d2c61b47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    # Batch migrations on products rebuild the table, which drops its
+    # triggers; later ones must recreate these
+    op.execute('CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(name, description)')
+    op.execute("""CREATE TRIGGER IF NOT EXISTS products_fts_insert AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts (rowid, name, description) VALUES (new.id, new.name, COALESCE(new.description, ''));
+    END""")
+    op.execute("""CREATE TRIGGER IF NOT EXISTS products_fts_update AFTER UPDATE OF id, name, description ON products BEGIN
+        DELETE FROM products_fts WHERE rowid = old.id;
+        INSERT INTO products_fts (rowid, name, description) VALUES (new.id, new.name, COALESCE(new.description, ''));
+    END""")
+    op.execute("""CREATE TRIGGER IF NOT EXISTS products_fts_delete AFTER DELETE ON products BEGIN
+        DELETE FROM products_fts WHERE rowid = old.id;
+    END""")
+
+    # Products written outside the admin routes were never indexed
+    op.execute('DELETE FROM products_fts')
+    op.execute("INSERT INTO products_fts (rowid, name, description) "
+               "SELECT id, name, COALESCE(description, '') FROM products")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    op.execute('DROP TRIGGER IF EXISTS products_fts_insert')
+    op.execute('DROP TRIGGER IF EXISTS products_fts_update')
+    op.execute('DROP TRIGGER IF EXISTS products_fts_delete')
@@ -0,0 +1,26 @@
+"""Add token version to users
+
+Revision ID: b62d4f8a1e93
+Revises: 3fa6c1d9e2b7
+Create Date: 2026-10-17 16:03:27.518930
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b62d4f8a1e93'
+down_revision = '3fa6c1d9e2b7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('token_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('token_version')
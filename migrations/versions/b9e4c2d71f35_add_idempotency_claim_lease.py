@@ -0,0 +1,31 @@
+"""Add a claim lease to idempotency keys
+
+Revision ID: b9e4c2d71f35
+Revises: a7d3e9f25c14
+Create Date: 2026-10-18 10:27:51.660392
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b9e4c2d71f35'
+down_revision = 'a7d3e9f25c14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('idempotency_keys', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('claimed_at', sa.DateTime(), nullable=True))
+
+    op.execute('UPDATE idempotency_keys SET claimed_at = COALESCE(created_at, CURRENT_TIMESTAMP)')
+
+    with op.batch_alter_table('idempotency_keys', schema=None) as batch_op:
+        batch_op.alter_column('claimed_at', existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade():
+    with op.batch_alter_table('idempotency_keys', schema=None) as batch_op:
+        batch_op.drop_column('claimed_at')
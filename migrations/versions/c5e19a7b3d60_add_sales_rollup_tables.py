@@ -0,0 +1,52 @@
+"""Add daily sales rollup tables
+
+Revision ID: c5e19a7b3d60
+Revises: b62d4f8a1e93
+Create Date: 2026-10-17 18:04:27.519306
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5e19a7b3d60'
+down_revision = 'b62d4f8a1e93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('daily_sales',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('orders', sa.Integer(), nullable=False),
+    sa.Column('cancelled_orders', sa.Integer(), nullable=False),
+    sa.Column('units', sa.Integer(), nullable=False),
+    sa.Column('gross_revenue', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.Column('paid_revenue', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.Column('refunded_amount', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('day')
+    )
+    op.create_table('product_daily_sales',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=True),
+    sa.Column('units', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+    sa.PrimaryKeyConstraint('day', 'product_id')
+    )
+    with op.batch_alter_table('product_daily_sales', schema=None) as batch_op:
+        batch_op.create_index('ix_product_daily_sales_category_id_day', ['category_id', 'day'], unique=False)
+
+    # Populate with scripts/backfill_sales_rollup.py once deployed
+
+
+def downgrade():
+    with op.batch_alter_table('product_daily_sales', schema=None) as batch_op:
+        batch_op.drop_index('ix_product_daily_sales_category_id_day')
+
+    op.drop_table('product_daily_sales')
+    op.drop_table('daily_sales')
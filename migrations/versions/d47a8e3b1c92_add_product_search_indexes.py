@@ -0,0 +1,43 @@
+"""Add product search indexes (FULLTEXT on MySQL, FTS5 on SQLite)
+
+Revision ID: d47a8e3b1c92
+Revises: 9c4e2a61f0b8
+Create Date: 2026-10-17 11:26:08.441730
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd47a8e3b1c92'
+down_revision = '9c4e2a61f0b8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.create_index('ix_products_name', ['name'], unique=False)
+
+    if dialect == 'mysql':
+        op.create_index('ix_products_name_description_fulltext', 'products',
+                        ['name', 'description'], mysql_prefix='FULLTEXT')
+    elif dialect == 'sqlite':
+        op.execute('CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(name, description)')
+        op.execute("INSERT INTO products_fts (rowid, name, description) "
+                   "SELECT id, name, COALESCE(description, '') FROM products")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'mysql':
+        op.drop_index('ix_products_name_description_fulltext', table_name='products')
+    elif dialect == 'sqlite':
+        op.execute('DROP TABLE IF EXISTS products_fts')
+
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.drop_index('ix_products_name')
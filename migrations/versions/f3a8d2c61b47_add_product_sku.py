@@ -0,0 +1,28 @@
+"""Add SKU to products
+
+Revision ID: f3a8d2c61b47
+Revises: c5e19a7b3d60
+Create Date: 2026-10-17 19:21:08.604415
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a8d2c61b47'
+down_revision = 'c5e19a7b3d60'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('sku', sa.String(length=64), nullable=True))
+        batch_op.create_unique_constraint('uq_products_sku', ['sku'])
+
+
+def downgrade():
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_products_sku', type_='unique')
+        batch_op.drop_column('sku')
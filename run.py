@@ -1,6 +1,7 @@
 import os
 from app import create_app, db
-from app.models import User, Address, Product, Category, Review, Cart, CartItem, Order, OrderItem, Payment, Wishlist, Coupon
+from app.services.email_sender import email_sender
+from app.models import User, Address, Product, Category, Review, Cart, CartItem, Order, OrderItem, Payment, Wishlist, Coupon, IdempotencyKey, EmailOutbox, DailySales, ProductDailySales
 
 app = create_app(os.getenv('FLASK_ENV', 'development'))
 
@@ -20,8 +21,16 @@ def make_shell_context():
         'OrderItem': OrderItem,
         'Payment': Payment,
         'Wishlist': Wishlist,
-        'Coupon': Coupon
+        'Coupon': Coupon,
+        'IdempotencyKey': IdempotencyKey,
+        'EmailOutbox': EmailOutbox,
+        'DailySales': DailySales,
+        'ProductDailySales': ProductDailySales
     }
 
 if __name__ == '__main__':
+    # Send emails from this process too; the debug reloader runs this file
+    # twice, so only its serving child starts the sender
+    if app.config.get('EMAIL_WORKER_ENABLED') and os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        email_sender.start(app)
     app.run(debug=True, host='0.0.0.0', port=5001)
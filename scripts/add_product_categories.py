@@ -1,6 +1,12 @@
 #!/usr/bin/env python3
 """
 Script to add categories to all products
+
+Missing categories are created, then every mapped product is updated in one
+bulk UPDATE. For loading whole catalogs use scripts/import_products.py.
+
+Usage:
+    python scripts/add_product_categories.py
 """
 
 import os
@@ -9,6 +15,8 @@ import sys
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from sqlalchemy import update
+
 from app import db
 from app.models import Product, Category
 from run import app
@@ -31,43 +39,45 @@ PRODUCT_CATEGORIES = {
 
 def main():
     with app.app_context():
-        # Create categories if they don't exist
-        categories_to_create = ['Electronics', 'Apparel', 'Books', 'Appliances']
-        category_objects = {}
+        # Create categories if they don't exist (one lookup for all of them)
+        categories_to_create = sorted(set(PRODUCT_CATEGORIES.values()))
+        category_ids = dict(
+            db.session.query(Category.name, Category.id).filter(Category.name.in_(categories_to_create)).all()
+        )
 
         for cat_name in categories_to_create:
-            category = Category.query.filter_by(name=cat_name).first()
-            if not category:
-                category = Category(name=cat_name)
-                db.session.add(category)
-                print(f"Created category: {cat_name}")
-            else:
+            if cat_name in category_ids:
                 print(f"Category already exists: {cat_name}")
-            category_objects[cat_name] = category
+                continue
+            category = Category(name=cat_name)
+            db.session.add(category)
+            db.session.flush()
+            category_ids[cat_name] = category.id
+            print(f"Created category: {cat_name}")
 
         db.session.commit()
         print("\nCategories created successfully!\n")
 
-        # Update products with categories
-        products = Product.query.all()
-
-        for product in products:
-            if product.name in PRODUCT_CATEGORIES:
-                category_name = PRODUCT_CATEGORIES[product.name]
-                category = category_objects[category_name]
-                product.category_id = category.id
-                print(f"Updated {product.name} -> {category_name}")
+        # Update products with categories in a single bulk UPDATE by primary key
+        changes = []
+        for product_id, name in db.session.query(Product.id, Product.name).yield_per(1000):
+            if name in PRODUCT_CATEGORIES:
+                category_name = PRODUCT_CATEGORIES[name]
+                changes.append({'id': product_id, 'category_id': category_ids[category_name]})
+                print(f"Updated {name} -> {category_name}")
             else:
-                print(f"No category mapping for: {product.name}")
+                print(f"No category mapping for: {name}")
 
+        if changes:
+            db.session.execute(update(Product), changes)
         db.session.commit()
         print("\nProducts updated with categories successfully!")
 
         # Display all products with categories
         print("\nAll products with categories:")
-        products = Product.query.all()
-        for p in products:
-            print(f"  - {p.name}: {p.category.name if p.category else 'No category'}")
+        rows = db.session.query(Product.name, Category.name).outerjoin(Category, Category.id == Product.category_id)
+        for product_name, category_name in rows:
+            print(f"  - {product_name}: {category_name or 'No category'}")
 
 
 if __name__ == '__main__':
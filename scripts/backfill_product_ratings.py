@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+Script to backfill or repair the denormalized rating aggregates on products
+
+Recomputes rating_sum and rating_count for every product from the reviews
+table. Safe to re-run at any time.
+
+Usage:
+    python scripts/backfill_product_ratings.py
+"""
+
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models import Product
+from run import app
+
+
+def main():
+    with app.app_context():
+        drifted = Product.recompute_rating_aggregates()
+        print(f"Rating aggregates recomputed ({drifted} products were out of date)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Script to rebuild the daily sales rollups from the orders table
+
+Recomputes daily_sales and product_daily_sales for orders placed between
+the given dates (inclusive, YYYY-MM-DD), or for all orders when no dates
+are given. Run it once after migrating, and again for any range that needs
+repairing; the rollups are kept current incrementally after that.
+
+Usage:
+    python scripts/backfill_sales_rollup.py [start_date] [end_date]
+
+Example:
+    python scripts/backfill_sales_rollup.py
+    python scripts/backfill_sales_rollup.py 2026-01-01 2026-03-31
+"""
+
+import os
+import sys
+from datetime import date
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.sales_rollup import SalesRollup
+from run import app
+
+
+def main():
+    try:
+        start = date.fromisoformat(sys.argv[1]) if len(sys.argv) > 1 else None
+        end = date.fromisoformat(sys.argv[2]) if len(sys.argv) > 2 else None
+    except ValueError:
+        print('Dates must be in YYYY-MM-DD format')
+        sys.exit(1)
+
+    with app.app_context():
+        stats = SalesRollup.backfill(start, end)
+
+    print(
+        f"Rebuilt {stats['days']} days and {stats['product_days']} product-days "
+        f"in {stats['windows']} windows ({stats['elapsed_seconds']}s)"
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Script to benchmark email template rendering
+
+Renders order confirmation emails for synthetic orders one at a time and in
+batches, and compares them with the old per-item string concatenation.
+No database or app context is needed.
+
+Usage:
+    python scripts/benchmark_email_rendering.py [count] [items_per_order]
+
+Example:
+    python scripts/benchmark_email_rendering.py 20000 5
+    python scripts/benchmark_email_rendering.py 200 2000
+"""
+
+import os
+import sys
+import time
+from html import escape
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.email_templates import TEMPLATES
+
+
+def make_snapshot(order_id, item_count):
+    return {
+        'order_id': order_id,
+        'total_amount': f'{item_count * 19.98:.2f}',
+        'status': 'pending',
+        'payment_status': 'pending',
+        'items': [
+            {'name': f'Product {i}', 'quantity': 2, 'subtotal': '19.98'}
+            for i in range(item_count)
+        ]
+    }
+
+
+def concatenate(snapshot, with_html=False):
+    """The previous approach: build bodies with += per item"""
+    body = f"Order Details:\n- Order ID: #{snapshot['order_id']}\n- Total Amount: ${snapshot['total_amount']}\n\nItems:\n"
+    for item in snapshot['items']:
+        body += f"- {item['name']} x {item['quantity']} = ${item['subtotal']}\n"
+    if not with_html:
+        return body
+
+    html_body = f"<ul><li>Order ID: #{snapshot['order_id']}</li><li>Total Amount: ${escape(snapshot['total_amount'])}</li></ul><table>"
+    for item in snapshot['items']:
+        html_body += (f"<tr><td>{escape(str(item['name']))}</td><td>{escape(str(item['quantity']))}</td>"
+                      f"<td>${escape(str(item['subtotal']))}</td></tr>")
+    return body, html_body + "</table>"
+
+
+def timed(label, count, fn):
+    started = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - started
+    print(f"  {label:<36} {elapsed:8.3f}s  {count / elapsed:>12,.0f} emails/s")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    item_count = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    template = TEMPLATES['order_confirmation']
+    snapshots = [make_snapshot(i, item_count) for i in range(count)]
+
+    print(f"Rendering {count} order confirmations with {item_count} items each...")
+    timed('concatenation (text only)', count, lambda: [concatenate(s) for s in snapshots])
+    timed('concatenation (text+html)', count, lambda: [concatenate(s, with_html=True) for s in snapshots])
+    timed('template, one at a time (text+html)', count, lambda: [template.render(s) for s in snapshots])
+    timed('template, batch (text+html)', count, lambda: template.render_batch(snapshots))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Script to create or update products in bulk from a CSV or JSON lines file
+
+Rows are validated, category names resolved, and products written in
+batches of PRODUCT_IMPORT_BATCH_SIZE (matched on id or sku, created
+otherwise). The search index picks up each batch as it commits. Rows that
+fail are listed with their line numbers and skipped.
+
+Columns / keys: sku, name, description, price, category (or category_id),
+stock_quantity, image_url, and optionally id.
+
+Usage:
+    python scripts/import_products.py <file.csv|file.ndjson|-> [--format=csv|ndjson] [--create-categories] [--dry-run]
+
+Example:
+    python scripts/import_products.py catalog.csv
+    python scripts/import_products.py catalog.ndjson --create-categories
+    gunzip -c catalog.csv.gz | python scripts/import_products.py - --format=csv
+"""
+
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.product_import import ImportFormatError, ProductImporter, read_rows
+from run import app
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    flags = [arg for arg in sys.argv[1:] if arg.startswith('--')]
+    if len(args) != 1:
+        print(__doc__)
+        sys.exit(1)
+
+    path = args[0]
+    fmt = next((flag.split('=', 1)[1] for flag in flags if flag.startswith('--format=')), None)
+    if fmt is None:
+        fmt = 'csv' if path.lower().endswith('.csv') else 'ndjson'
+
+    stream = sys.stdin.buffer if path == '-' else open(path, 'rb')
+    try:
+        with app.app_context():
+            importer = ProductImporter(
+                batch_size=app.config['PRODUCT_IMPORT_BATCH_SIZE'],
+                max_errors=app.config['PRODUCT_IMPORT_MAX_ERRORS'],
+                create_categories='--create-categories' in flags,
+                dry_run='--dry-run' in flags
+            )
+            report = importer.run(read_rows(stream, fmt))
+    except ImportFormatError as e:
+        print(f'Error: {e}')
+        sys.exit(1)
+    finally:
+        if stream is not sys.stdin.buffer:
+            stream.close()
+
+    for error in report['errors']:
+        print(f"  line {error['row']}{' (' + error['sku'] + ')' if error['sku'] else ''}: {error['error']}")
+    if report['errors_truncated']:
+        print(f"  ... and {report['failed'] - len(report['errors'])} more")
+
+    print(
+        f"{'Checked' if report['dry_run'] else 'Imported'} {report['rows']} rows in {report['elapsed_seconds']}s "
+        f"({report['rows_per_second']}/s): {report['created']} created, {report['updated']} updated, "
+        f"{report['failed']} failed, {report['categories_created']} categories created"
+    )
+    sys.exit(1 if report['failed'] else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+Script to delete expired idempotency keys
+
+Expired keys are already ignored by the API; this just keeps the table small.
+Run it periodically (e.g. from cron).
+
+Usage:
+    python scripts/purge_idempotency_keys.py
+"""
+
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models import IdempotencyKey
+from run import app
+
+
+def main():
+    with app.app_context():
+        removed = IdempotencyKey.purge_expired()
+        print(f"Removed {removed} expired idempotency keys")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Script to rebuild the product full-text search index
+
+On SQLite this recreates the products_fts table and its sync triggers if
+missing and repopulates it from products; triggers keep it current after
+that. On MySQL the FULLTEXT index is maintained by the database and nothing
+needs rebuilding.
+
+Usage:
+    python scripts/rebuild_search_index.py
+"""
+
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.search_service import ProductSearch
+from run import app
+
+
+def main():
+    with app.app_context():
+        ProductSearch.rebuild_index()
+        print("Product search index rebuilt successfully!")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Script to finalize payments stuck in 'processing'
+
+Payments still 'processing' PAYMENT_RECONCILE_AFTER seconds after they were
+created are re-driven through the payment gateway and their orders and stock
+updated, as the background worker would have done. Run it once, or pass an
+interval to keep sweeping.
+
+Usage:
+    python scripts/reconcile_payments.py [interval_seconds]
+
+Example:
+    python scripts/reconcile_payments.py
+    python scripts/reconcile_payments.py 60
+"""
+
+import os
+import sys
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.payment_reconciler import PaymentReconciler
+from run import app
+
+
+def sweep():
+    with app.app_context():
+        stats = PaymentReconciler.reconcile(
+            older_than=app.config['PAYMENT_RECONCILE_AFTER'],
+            batch_size=app.config['PAYMENT_RECONCILE_BATCH_SIZE'],
+            max_workers=app.config['PAYMENT_RECONCILE_WORKERS']
+        )
+
+    print(
+        f"Reconciled {stats['scanned']} payments in {stats['elapsed_seconds']}s "
+        f"({stats['per_second']}/s): {stats['completed']} completed, {stats['failed']} failed, "
+        f"{stats['pending']} pending, {stats['skipped']} already finalized, {stats['errors']} errors"
+    )
+
+
+def main():
+    interval = float(sys.argv[1]) if len(sys.argv) > 1 else None
+
+    sweep()
+    while interval:
+        time.sleep(interval)
+        sweep()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Script to deliver queued emails from the outbox
+
+The web app doesn't send emails itself (run.py does only with
+EMAIL_WORKER_ENABLED=true), so run this as its own service. Safe to run
+alongside other senders; each message is claimed by one of them.
+
+Usage:
+    python scripts/run_email_worker.py [once]
+
+Example:
+    python scripts/run_email_worker.py
+    python scripts/run_email_worker.py once
+"""
+
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models import EmailOutbox
+from app.services.email_sender import email_sender
+from run import app
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == 'once':
+        with app.app_context():
+            totals = {'claimed': 0, 'sent': 0, 'retrying': 0, 'failed': 0}
+            while True:
+                stats = email_sender.process_due()
+                for key, value in stats.items():
+                    totals[key] += value
+                if stats['claimed'] < email_sender.batch_size:
+                    break
+
+            print(f"Processed {totals['claimed']} emails: {totals['sent']} sent, "
+                  f"{totals['retrying']} to retry, {totals['failed']} failed")
+            print(f"Outbox: {EmailOutbox.counts()}")
+        return
+
+    print("Delivering queued emails (Ctrl+C to stop)...")
+    try:
+        email_sender.run_forever(app)
+    except KeyboardInterrupt:
+        email_sender.stop(timeout=30)
+
+
+if __name__ == '__main__':
+    main()
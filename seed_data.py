@@ -192,6 +192,7 @@ def seed_database():
 
         db.session.add_all(reviews)
         db.session.commit()
+        Product.recompute_rating_aggregates()
 
         # Create carts for users
         print("Creating carts...")
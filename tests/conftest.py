@@ -0,0 +1,40 @@
+"""Shared fixtures for the in-process tests (SQLite, see TestingConfig)
+
+Modules that need seed data or extra setup override `app` with a fixture of
+the same name that takes this one as an argument.
+"""
+import pytest
+from flask_jwt_extended import create_access_token
+
+from app import create_app, db
+from app.models import User
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def auth_headers(app):
+    """Returns a function building the Authorization header for a user"""
+    def auth_headers(user):
+        token = create_access_token(identity=user.id, additional_claims=user.token_claims())
+        return {'Authorization': f'Bearer {token}'}
+
+    return auth_headers
+
+
+@pytest.fixture
+def admin_headers(auth_headers):
+    admin = User(email='admin@example.com', first_name='Ad', last_name='Min', password_hash='x', role='admin')
+    db.session.add(admin)
+    db.session.commit()
+    return auth_headers(admin)
+
@@ -0,0 +1,93 @@
+"""Tests for role / token version claims in admin authorization (runs in-process against SQLite)"""
+from sqlalchemy import event
+
+from app import create_app, db
+from app.models import User
+from app.utils.decorators import token_version_cache
+
+
+def create_user(email, role):
+    user = User(email=email, first_name='Test', last_name='User', role=role)
+    user.set_password('Password123!')
+    db.session.add(user)
+    db.session.commit()
+    return user.id
+
+
+def login(client, email):
+    response = client.post('/api/auth/login', json={'email': email, 'password': 'Password123!'})
+    assert response.status_code == 200
+    return {'Authorization': f"Bearer {response.json['access_token']}"}
+
+
+def count_queries(client, url, headers):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        response = client.get(url, headers=headers)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+    return response, len(statements)
+
+
+def test_admin_check_needs_no_queries_once_version_is_cached(app):
+    create_user('admin@example.com', 'admin')
+    client = app.test_client()
+    headers = login(client, 'admin@example.com')
+
+    # Warm the token version cache
+    response, _ = count_queries(client, '/api/payments/queue/stats', headers)
+    assert response.status_code == 200
+
+    response, query_count = count_queries(client, '/api/payments/queue/stats', headers)
+    assert response.status_code == 200
+    assert query_count == 0
+
+
+def test_non_admin_is_rejected_from_claims(app):
+    create_user('user@example.com', 'user')
+    client = app.test_client()
+    headers = login(client, 'user@example.com')
+
+    response, query_count = count_queries(client, '/api/payments/queue/stats', headers)
+    assert response.status_code == 403
+    assert query_count == 0
+
+
+def test_role_change_revokes_tokens_with_the_old_role(app):
+    admin_id = create_user('admin@example.com', 'admin')
+    other_id = create_user('other@example.com', 'admin')
+    client = app.test_client()
+    admin_headers = login(client, 'admin@example.com')
+    other_headers = login(client, 'other@example.com')
+    assert client.get('/api/payments/queue/stats', headers=other_headers).status_code == 200
+
+    # Demote the other admin: their existing token stops working at once
+    response = client.post(f'/api/admin/users/{other_id}/toggle-role', headers=admin_headers)
+    assert response.status_code == 200
+    assert response.json['user']['role'] == 'user'
+    assert client.get('/api/payments/queue/stats', headers=other_headers).status_code == 401
+
+    # A fresh login carries the new role
+    assert client.get('/api/payments/queue/stats', headers=login(client, 'other@example.com')).status_code == 403
+    assert client.get('/api/payments/queue/stats', headers=admin_headers).status_code == 200
+    assert db.session.get(User, admin_id).token_version == 0
+
+
+def test_token_version_cache_belongs_to_its_app(app):
+    admin_id = create_user('admin@example.com', 'admin')
+    User.bump_token_version(admin_id)
+    db.session.commit()
+    client = app.test_client()
+    headers = login(client, 'admin@example.com')
+    assert client.get('/api/payments/queue/stats', headers=headers).status_code == 200
+    assert token_version_cache().get(admin_id) == 1
+
+    # Another app (another database) starts with an empty cache
+    other = create_app('testing')
+    with other.app_context():
+        assert token_version_cache().get(admin_id) is None
@@ -0,0 +1,100 @@
+"""Tests for the aggregate admin dashboard (runs in-process against SQLite)"""
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event
+
+from app import db
+from app.models import Category, Order, OrderItem, Product, User
+from app.services.dashboard_stats import DashboardStats
+
+
+@pytest.fixture
+def app(app):
+    DashboardStats.invalidate()
+    yield app
+    DashboardStats.invalidate()
+
+
+def seed_orders():
+    admin = User(email='admin@example.com', first_name='Ad', last_name='Min', role='admin')
+    admin.set_password('Password123!')
+    buyers = [User(email=f'buyer{i}@example.com', first_name='Buy', last_name='Er', password_hash='x') for i in range(3)]
+    category = Category(name='Gadgets')
+    db.session.add_all([admin, category, *buyers])
+    db.session.flush()
+
+    products = [
+        Product(name=f'Gadget {i}', price=Decimal('5.00'), category_id=category.id, stock_quantity=stock)
+        for i, stock in enumerate([3, 50, 9, 100])
+    ]
+    db.session.add_all(products)
+    db.session.flush()
+
+    old = datetime.utcnow() - timedelta(days=45)
+    orders = [
+        ('pending', 'pending', '10.00', None),
+        ('processing', 'completed', '20.50', None),
+        ('shipped', 'completed', '30.25', None),
+        ('delivered', 'completed', '40.00', old),
+        ('cancelled', 'failed', '99.99', old),
+    ]
+    for i, (status, payment_status, total, created_at) in enumerate(orders):
+        order = Order(user_id=buyers[i % 3].id, total_amount=Decimal(total), shipping_address_id=1,
+                      status=status, payment_status=payment_status, created_at=created_at or datetime.utcnow())
+        db.session.add(order)
+        db.session.flush()
+        db.session.add(OrderItem(order_id=order.id, product_id=products[i % 2].id, quantity=i + 1,
+                                 price_at_purchase=Decimal('5.00')))
+
+    db.session.commit()
+
+
+def get_stats(client, headers):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        response = client.get('/api/admin/dashboard/stats', headers=headers)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+    assert response.status_code == 200
+    return response.json, len(statements)
+
+
+def test_dashboard_is_built_from_two_queries_then_cached(app):
+    seed_orders()
+    client = app.test_client()
+    token = client.post('/api/auth/login', json={'email': 'admin@example.com', 'password': 'Password123!'}).json
+    headers = {'Authorization': f"Bearer {token['access_token']}"}
+    client.get('/api/payments/queue/stats', headers=headers)  # Warm the token version cache
+
+    stats, query_count = get_stats(client, headers)
+
+    assert stats['overview'] == {
+        'total_users': 3,
+        'total_products': 4,
+        'total_orders': 5,
+        'total_revenue': 90.75,
+        'recent_orders_30d': 3
+    }
+    assert stats['orders'] == {'pending': 1, 'processing': 1, 'shipped': 1, 'delivered': 1}
+    assert stats['inventory'] == {'low_stock_count': 2}
+    assert stats['top_products'] == [{'name': 'Gadget 0', 'sold': 9}, {'name': 'Gadget 1', 'sold': 6}]
+    assert query_count == 2
+
+    cached, query_count = get_stats(client, headers)
+    assert cached == stats
+    assert query_count == 0
+
+
+def test_dashboard_handles_an_empty_store(app):
+    stats = DashboardStats.compute()
+
+    assert stats['overview']['total_revenue'] == 0
+    assert stats['orders'] == {'pending': 0, 'processing': 0, 'shipped': 0, 'delivered': 0}
+    assert stats['top_products'] == []
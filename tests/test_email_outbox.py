@@ -0,0 +1,125 @@
+"""Tests for the email outbox and background sender (runs in-process against SQLite)"""
+from datetime import datetime
+from decimal import Decimal
+from string import Template
+
+import pytest
+
+from app import db
+from app.models import Address, Cart, CartItem, Category, EmailOutbox, Product, User
+from app.services.email_sender import email_sender
+from app.services.email_service import EmailService
+from app.services.email_templates import compile_template
+
+
+@pytest.fixture
+def app(app):
+    EmailService.transport.clear()
+    return app
+
+
+@pytest.fixture
+def shopper(app, auth_headers):
+    """A user with two products in their cart; returns (auth headers, address id)"""
+    user = User(email='shopper@example.com', first_name='Shop', last_name='Per', password_hash='x')
+    category = Category(name='Kitchen')
+    db.session.add_all([user, category])
+    db.session.flush()
+
+    address = Address(user_id=user.id, address_line1='1 Main St', city='Springfield', state='IL',
+                      postal_code='62701', country='USA')
+    cart = Cart(user_id=user.id)
+    kettle = Product(name='Kettle', price=Decimal('25.00'), category_id=category.id, stock_quantity=5)
+    mug = Product(name='Mug', price=Decimal('4.50'), category_id=category.id, stock_quantity=5)
+    db.session.add_all([address, cart, kettle, mug])
+    db.session.flush()
+    db.session.add_all([
+        CartItem(cart_id=cart.id, product_id=kettle.id, quantity=1),
+        CartItem(cart_id=cart.id, product_id=mug.id, quantity=2)
+    ])
+    db.session.commit()
+
+    return auth_headers(user), address.id
+
+
+def test_checkout_queues_confirmation_and_sender_delivers_it(app, shopper):
+    headers, address_id = shopper
+
+    response = app.test_client().post('/api/orders/checkout', json={'shipping_address_id': address_id}, headers=headers)
+    assert response.status_code == 201
+
+    # Nothing is sent inline
+    assert EmailService.transport.outbox == []
+    [message] = EmailOutbox.query.all()
+    assert (message.kind, message.status, message.to_email) == ('order_confirmation', 'pending', 'shopper@example.com')
+
+    stats = email_sender.process_due()
+
+    assert stats == {'claimed': 1, 'sent': 1, 'retrying': 0, 'failed': 0}
+    [sent] = EmailService.transport.outbox
+    assert sent['subject'] == f"Order Confirmation - Order #{response.json['order']['id']}"
+    assert '- Kettle x 1 = $25.00' in sent['body']
+    assert '- Mug x 2 = $9.00' in sent['body']
+    assert EmailOutbox.counts() == {'sent': 1}
+
+
+def test_failed_checkout_queues_nothing(app, shopper):
+    headers, _ = shopper
+
+    response = app.test_client().post('/api/orders/checkout', json={'shipping_address_id': 999}, headers=headers)
+
+    assert response.status_code == 400
+    assert EmailOutbox.query.count() == 0
+
+
+def test_failed_delivery_is_retried_with_backoff_then_given_up(app, monkeypatch):
+    EmailService.queue_order_shipped('someone@example.com', {'order_id': 7, 'total_amount': '10.00'})
+    db.session.commit()
+
+    def broken_send(*args, **kwargs):
+        raise ConnectionRefusedError('SMTP server down')
+
+    monkeypatch.setattr(EmailService.transport, 'send', broken_send)
+    monkeypatch.setattr(email_sender, 'max_attempts', 2)
+
+    assert email_sender.process_due()['retrying'] == 1
+    message = db.session.get(EmailOutbox, 1)
+    assert (message.status, message.attempts, message.last_error) == ('pending', 1, 'SMTP server down')
+
+    # Not due again until the backoff has passed
+    assert email_sender.process_due()['claimed'] == 0
+
+    EmailOutbox.query.update({'next_attempt_at': datetime.utcnow()})
+    db.session.commit()
+    assert email_sender.process_due()['failed'] == 1
+    db.session.expire_all()
+    assert db.session.get(EmailOutbox, 1).status == 'failed'
+
+
+def test_templates_escape_html_only_and_render_in_batches():
+    snapshots = [
+        {'order_id': i, 'total_amount': '9.00', 'status': 'pending', 'payment_status': 'pending',
+         'items': [{'name': 'Mug <Large>', 'quantity': 2, 'subtotal': '9.00'}]}
+        for i in range(3)
+    ]
+
+    rendered = EmailService.render_batch('order_confirmation', snapshots)
+
+    assert [subject for subject, _, _ in rendered] == [f'Order Confirmation - Order #{i}' for i in range(3)]
+    subject, body, html_body = rendered[0]
+    assert '- Mug <Large> x 2 = $9.00\n' in body
+    assert '<td>Mug &lt;Large&gt;</td><td>2</td><td>$9.00</td>' in html_body
+    assert rendered[0] == EmailService.render('order_confirmation', snapshots[0])
+
+
+def test_compiled_templates_match_string_template():
+    text = 'Hi ${name}, {braces} stay; $$$amount paid for $item.'
+    values = {'name': 'Ann', 'amount': '5.00', 'item': '<Mug>'}
+
+    assert compile_template(text)(values) == Template(text).substitute(values)
+    assert compile_template(text, html=True, raw_fields=('item',))(values) == \
+        'Hi Ann, {braces} stay; $5.00 paid for <Mug>.'
+    assert compile_template('$item', html=True)(values) == '&lt;Mug&gt;'
+
+    with pytest.raises(ValueError):
+        compile_template('Total: $ 5')
@@ -0,0 +1,102 @@
+"""Tests for streaming admin exports (runs in-process against SQLite)"""
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from app import db
+from app.models import Category, Order, OrderItem, Payment, Product, User
+
+
+@pytest.fixture
+def app(app):
+    app.config['EXPORT_CHUNK_SIZE'] = 7
+    return app
+
+
+def seed_orders(count):
+    """`count` orders, one a day going back from today; every third is cancelled"""
+    buyer = User(email='buyer@example.com', first_name='Buy', last_name='Er', password_hash='x')
+    category = Category(name='Gadgets')
+    db.session.add_all([buyer, category])
+    db.session.flush()
+    product = Product(name='=HYPERLINK("x")', price=Decimal('2.50'), category_id=category.id, stock_quantity=10)
+    db.session.add(product)
+    db.session.flush()
+
+    for i in range(count):
+        order = Order(user_id=buyer.id, total_amount=Decimal('5.00'), shipping_address_id=1,
+                      status='cancelled' if i % 3 == 0 else 'pending',
+                      created_at=datetime.utcnow() - timedelta(days=i))
+        db.session.add(order)
+        db.session.flush()
+        db.session.add(OrderItem(order_id=order.id, product_id=product.id, quantity=2, price_at_purchase=Decimal('2.50')))
+        if i % 2:
+            db.session.add(Payment(order_id=order.id, amount=Decimal('5.00'), payment_method='paypal',
+                                   transaction_id=f'TXN-{i}', status='completed'))
+    db.session.commit()
+
+
+def test_orders_stream_as_csv_in_chunks(app, admin_headers):
+    seed_orders(20)
+
+    response = app.test_client().get('/api/admin/export/orders', headers=admin_headers)
+
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.mimetype == 'text/csv'
+    assert 'attachment; filename="orders-' in response.headers['Content-Disposition']
+
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert [int(row['id']) for row in rows] == list(range(1, 21))
+    assert rows[0]['email'] == 'buyer@example.com'
+    assert rows[0]['total_amount'] == '5.00'
+    assert rows[0]['items'] == '2'
+    assert rows[0]['payment_method'] == ''
+    assert rows[1]['payment_method'] == 'paypal'
+
+
+def test_filters_and_ndjson(app, admin_headers):
+    seed_orders(20)
+    start = (datetime.utcnow() - timedelta(days=9)).date().isoformat()
+
+    response = app.test_client().get(
+        f'/api/admin/export/orders?format=ndjson&status=pending&start={start}', headers=admin_headers
+    )
+
+    assert response.mimetype == 'application/x-ndjson'
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    # Days 0-9 minus the cancelled ones (0, 3, 6, 9)
+    assert [row['id'] for row in rows] == [2, 3, 5, 6, 8, 9]
+    assert all(row['status'] == 'pending' for row in rows)
+
+
+def test_csv_cells_cannot_become_formulas(app, admin_headers):
+    seed_orders(1)
+
+    response = app.test_client().get('/api/admin/export/products', headers=admin_headers)
+
+    [row] = csv.DictReader(io.StringIO(response.get_data(as_text=True)))
+    assert row['name'] == '\'=HYPERLINK("x")'
+    assert row['category'] == 'Gadgets'
+
+
+def test_empty_export_still_has_a_header(app, admin_headers):
+    response = app.test_client().get('/api/admin/export/users?role=user', headers=admin_headers)
+
+    assert response.get_data(as_text=True).splitlines() == ['id,email,first_name,last_name,role,created_at']
+
+
+@pytest.mark.parametrize('url', [
+    '/api/admin/export/payments',
+    '/api/admin/export/orders?format=xlsx',
+    '/api/admin/export/orders?start=last-week'
+])
+def test_bad_requests_are_rejected_before_streaming(app, admin_headers, url):
+    response = app.test_client().get(url, headers=admin_headers)
+
+    assert response.status_code == 400
+    assert 'error' in response.json
@@ -0,0 +1,108 @@
+"""Tests for Idempotency-Key handling on checkout (runs in-process against SQLite)"""
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from app import db
+from app.models import Address, Cart, CartItem, Category, IdempotencyKey, Order, OrderItem, Product, User
+
+
+@pytest.fixture
+def shopper(app):
+    """(auth headers, address id) for a user with 2 units of a product in their cart"""
+    db.session.add(Category(id=1, name='Electronics'))
+    db.session.add(Product(id=1, name='Widget', price=Decimal('10.00'), category_id=1, stock_quantity=10))
+    user = User(email='shopper@example.com', first_name='Shop', last_name='Per')
+    user.set_password('Password123!')
+    db.session.add(user)
+    db.session.flush()
+    address = Address(user_id=user.id, address_line1='1 Main St', city='Springfield', state='IL',
+                      postal_code='62701', country='USA')
+    cart = Cart(user_id=user.id)
+    db.session.add_all([address, cart])
+    db.session.flush()
+    db.session.add(CartItem(cart_id=cart.id, product_id=1, quantity=2))
+    db.session.commit()
+
+    response = app.test_client().post('/api/auth/login', json={'email': 'shopper@example.com', 'password': 'Password123!'})
+    return {'Authorization': f"Bearer {response.json['access_token']}"}, address.id
+
+
+def checkout(client, headers, address_id, key):
+    return client.post('/api/orders/checkout', json={'shipping_address_id': address_id},
+                       headers={**headers, 'Idempotency-Key': key})
+
+
+def stock():
+    return db.session.get(Product, 1, populate_existing=True).stock_quantity
+
+
+def test_retry_replays_the_stored_response(app, shopper):
+    headers, address_id = shopper
+    client = app.test_client()
+
+    first = checkout(client, headers, address_id, 'order-1')
+    assert first.status_code == 201
+    assert 'Idempotent-Replayed' not in first.headers
+
+    retry = checkout(client, headers, address_id, 'order-1')
+    assert retry.status_code == 201
+    assert retry.headers['Idempotent-Replayed'] == 'true'
+    assert retry.json == first.json
+
+    # The order was placed and stock taken once
+    assert Order.query.count() == 1
+    assert OrderItem.query.count() == 1
+    assert stock() == 8
+
+
+def test_same_key_with_a_different_body_is_rejected(app, shopper):
+    headers, address_id = shopper
+    client = app.test_client()
+    assert checkout(client, headers, address_id, 'order-1').status_code == 201
+
+    response = client.post('/api/orders/checkout', json={'shipping_address_id': address_id, 'note': 'x'},
+                           headers={**headers, 'Idempotency-Key': 'order-1'})
+    assert response.status_code == 422
+    assert Order.query.count() == 1
+
+
+def test_client_errors_are_stored_for_replay(app, shopper):
+    headers, address_id = shopper
+    client = app.test_client()
+
+    assert checkout(client, headers, 9999, 'bad-address').status_code == 400
+    replay = checkout(client, headers, 9999, 'bad-address')
+    assert replay.status_code == 400
+    assert replay.headers['Idempotent-Replayed'] == 'true'
+
+    # Without a key every request runs
+    assert client.post('/api/orders/checkout', json={'shipping_address_id': address_id}, headers=headers).status_code == 201
+    assert IdempotencyKey.query.filter_by(key='bad-address').one().status_code == 400
+
+
+def test_unfinished_claim_blocks_retries_until_its_lease_expires(app, shopper, monkeypatch):
+    headers, address_id = shopper
+    client = app.test_client()
+
+    # The worker dies after the order commits but before the response is stored
+    with monkeypatch.context() as patch:
+        patch.setattr(IdempotencyKey, 'complete', classmethod(lambda cls, *args: None))
+        assert checkout(client, headers, address_id, 'order-1').status_code == 201
+
+    assert checkout(client, headers, address_id, 'order-1').status_code == 409
+
+    # Once the lease lapses the next retry takes the claim over and runs the view again
+    lease = app.config['IDEMPOTENCY_LEASE_SECONDS']
+    IdempotencyKey.query.filter_by(key='order-1').update(
+        {'claimed_at': datetime.utcnow() - timedelta(seconds=lease + 1)}
+    )
+    db.session.commit()
+    response = checkout(client, headers, address_id, 'order-1')
+    assert response.status_code == 400  # The cart was already checked out
+    assert 'Idempotent-Replayed' not in response.headers
+    assert Order.query.count() == 1
+    assert stock() == 8
+
+    assert checkout(client, headers, address_id, 'order-1').headers['Idempotent-Replayed'] == 'true'
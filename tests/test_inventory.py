@@ -0,0 +1,123 @@
+"""Concurrency tests for stock reservation (runs in-process against SQLite)"""
+import threading
+from decimal import Decimal
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app import db
+from app.models import Category, Product
+from app.services.inventory_service import InventoryService, InsufficientStockError
+
+
+INITIAL_STOCK = 10
+WORKERS = 16
+ATTEMPTS_PER_WORKER = 5
+
+
+def create_products(count, stock):
+    category = Category(name='Flash Sale')
+    db.session.add(category)
+    db.session.flush()
+
+    products = [
+        Product(name=f'Limited Item {i}', price=Decimal('9.99'), category_id=category.id, stock_quantity=stock)
+        for i in range(count)
+    ]
+    db.session.add_all(products)
+    db.session.commit()
+    return [product.id for product in products]
+
+
+def hammer(app, quantities_for_attempt):
+    """Run reservations from many threads at once, each in its own app context and session"""
+    outcomes = {'reserved': 0, 'rejected': 0, 'locked': 0}
+    outcome_lock = threading.Lock()
+    start = threading.Barrier(WORKERS)
+
+    def worker():
+        with app.app_context():
+            start.wait()
+            for attempt in range(ATTEMPTS_PER_WORKER):
+                try:
+                    InventoryService.reserve_stock(quantities_for_attempt(attempt))
+                    db.session.commit()
+                    outcome = 'reserved'
+                except InsufficientStockError:
+                    db.session.rollback()
+                    outcome = 'rejected'
+                except OperationalError:
+                    # SQLite "database is locked" under contention - not a sale
+                    db.session.rollback()
+                    outcome = 'locked'
+                with outcome_lock:
+                    outcomes[outcome] += 1
+
+    threads = [threading.Thread(target=worker) for _ in range(WORKERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return outcomes
+
+
+def current_stock(product_ids):
+    db.session.expire_all()
+    return [db.session.get(Product, product_id).stock_quantity for product_id in product_ids]
+
+
+def test_concurrent_single_line_reservations_never_oversell(app):
+    [product_id] = create_products(1, INITIAL_STOCK)
+
+    outcomes = hammer(app, lambda attempt: {product_id: 1})
+
+    [remaining] = current_stock([product_id])
+    assert remaining >= 0
+    assert outcomes['reserved'] == INITIAL_STOCK - remaining
+    assert outcomes['reserved'] + outcomes['rejected'] + outcomes['locked'] == WORKERS * ATTEMPTS_PER_WORKER
+    assert outcomes['reserved'] <= INITIAL_STOCK
+    assert outcomes['rejected'] > 0
+
+
+def test_concurrent_multi_line_reservations_are_all_or_nothing(app):
+    product_ids = create_products(3, INITIAL_STOCK)
+
+    # Every reservation takes one of each product and, on odd attempts,
+    # a second unit of the last one, so lines run out at different times
+    def quantities(attempt):
+        lines = {product_id: 1 for product_id in product_ids}
+        lines[product_ids[-1]] += attempt % 2
+        return lines
+
+    outcomes = hammer(app, quantities)
+
+    stock = current_stock(product_ids)
+    assert min(stock) >= 0
+    # All-or-nothing: the untouched-extra lines moved in lockstep
+    assert stock[0] == stock[1] == INITIAL_STOCK - outcomes['reserved']
+    assert stock[2] <= stock[0]
+
+
+def test_release_stock_restores_quantities(app):
+    product_ids = create_products(2, 3)
+
+    InventoryService.reserve_stock({product_ids[0]: 3, product_ids[1]: 1})
+    db.session.commit()
+    InventoryService.release_stock({product_ids[0]: 2})
+    db.session.commit()
+
+    assert current_stock(product_ids) == [2, 2]
+
+
+def test_shortfall_reports_the_short_line(app):
+    product_ids = create_products(2, 3)
+
+    with pytest.raises(InsufficientStockError) as excinfo:
+        InventoryService.reserve_stock({product_ids[0]: 1, product_ids[1]: 4})
+    db.session.rollback()
+
+    product_id, name, requested, available = InventoryService.find_shortfall(excinfo.value.quantities)
+    assert (product_id, requested, available) == (product_ids[1], 4, 3)
+    assert name == 'Limited Item 1'
+    assert current_stock(product_ids) == [3, 3]
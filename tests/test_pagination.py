@@ -0,0 +1,88 @@
+"""Tests for keyset (cursor) pagination (runs in-process against SQLite)"""
+from datetime import datetime
+from decimal import Decimal
+from fractions import Fraction
+
+import pytest
+
+from app import db
+from app.models import Category, Product
+from app.utils.pagination import InvalidCursorError, decode_cursor, encode_cursor
+
+
+@pytest.fixture
+def app(app):
+    seed_catalog()
+    return app
+
+
+def seed_catalog():
+    """
+    30 products with many sort value ties: ratings such as 1/3 and 2/3 that
+    have no exact decimal form, and names differing only in case
+    """
+    db.session.add(Category(id=1, name='Electronics'))
+    ratings = [(1, 3), (2, 3), (4, 3), (0, 0), (5, 1), (10, 3)]
+    names = ['apple', 'Apple', 'APPLE', 'banana', 'Banana']
+    for i in range(30):
+        rating_sum, rating_count = ratings[i % len(ratings)]
+        db.session.add(Product(
+            name=names[i % len(names)], price=Decimal('5.00') + i % 4, category_id=1, stock_quantity=5,
+            rating_sum=rating_sum, rating_count=rating_count, created_at=datetime(2024, 1, 1 + i % 3)
+        ))
+    db.session.commit()
+
+
+def walk(client, query, per_page=4):
+    """Follow next_cursor to the end; returns the product ids in page order"""
+    ids, cursor, pages = [], '', 0
+    while cursor is not None:
+        response = client.get(f'/api/products/?{query}&per_page={per_page}&cursor={cursor}')
+        assert response.status_code == 200
+        assert len(response.json['products']) <= per_page
+        ids += [p['id'] for p in response.json['products']]
+        cursor = response.json['pagination']['next_cursor']
+        pages += 1
+        assert pages <= 30
+    return ids
+
+
+SORT_VALUES = {
+    'rating': lambda p: Fraction(p.rating_sum, p.rating_count) if p.rating_count else Fraction(0),
+    'name': lambda p: p.name.lower(),
+    'price': lambda p: p.price,
+    'created_at': lambda p: p.created_at
+}
+
+
+@pytest.mark.parametrize('sort_by', list(SORT_VALUES))
+@pytest.mark.parametrize('order', ['asc', 'desc'])
+def test_cursor_pages_cover_every_product_once_in_order(app, sort_by, order):
+    client = app.test_client()
+
+    ids = walk(client, f'sort_by={sort_by}&order={order}')
+
+    # Exact sort values, ties broken by id in the same direction
+    expected = sorted(Product.query.all(), key=lambda p: (SORT_VALUES[sort_by](p), p.id), reverse=order == 'desc')
+    assert ids == [p.id for p in expected]
+
+
+def test_bad_cursors_are_rejected(app):
+    client = app.test_client()
+    first = client.get('/api/products/?sort_by=rating&per_page=4&cursor=').json
+
+    # A cursor only works for the ordering it was issued for
+    cursor = first['pagination']['next_cursor']
+    response = client.get(f'/api/products/?sort_by=price&per_page=4&cursor={cursor}')
+    assert response.status_code == 400
+
+    assert client.get('/api/products/?per_page=4&cursor=not-a-cursor').status_code == 400
+    assert client.get('/api/products/?sort_by=relevance&search=apple&cursor=').status_code == 400
+
+
+def test_cursor_round_trips_typed_values():
+    for value in (datetime(2024, 5, 6, 7, 8, 9, 123456), Decimal('12.30'), 1 / 3, 'apple', 0):
+        assert decode_cursor(encode_cursor(value, 7, 'scope'), 'scope') == (value, 7)
+
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(encode_cursor(1, 7, 'scope'), 'other')
@@ -0,0 +1,67 @@
+"""Tests for the bounded bcrypt hasher (runs in-process against SQLite)"""
+import bcrypt
+import pytest
+
+from app import db
+from app.models import User
+from app.services.password_hasher import password_hasher
+
+
+@pytest.fixture
+def app(app):
+    yield app
+    password_hasher.shutdown()
+
+
+def create_user(password_hash):
+    user = User(email='shopper@example.com', first_name='Shop', last_name='Per', password_hash=password_hash)
+    db.session.add(user)
+    db.session.commit()
+    return user.id
+
+
+def login(app, password):
+    return app.test_client().post('/api/auth/login', json={'email': 'shopper@example.com', 'password': password})
+
+
+def test_login_rehashes_passwords_made_at_another_cost(app):
+    old_hash = bcrypt.hashpw(b'Password123!', bcrypt.gensalt(5)).decode('utf-8')
+    user_id = create_user(old_hash)
+
+    assert login(app, 'Password123!').status_code == 200
+
+    new_hash = db.session.get(User, user_id).password_hash
+    assert new_hash != old_hash
+    assert new_hash.startswith(f'$2b${app.config["BCRYPT_ROUNDS"]:02d}$')
+    assert login(app, 'Password123!').status_code == 200
+    assert login(app, 'wrong').status_code == 401
+
+
+@pytest.mark.parametrize('executor', ['thread', 'process'])
+def test_pool_hashes_and_verifies(app, executor):
+    app.config['BCRYPT_EXECUTOR'] = executor
+    app.config['BCRYPT_WORKERS'] = 2
+    password_hasher.init_app(app)
+
+    hashed = password_hasher.hash('s3cret')
+
+    assert password_hasher.verify('s3cret', hashed)
+    assert not password_hasher.verify('other', hashed)
+    assert not password_hasher.needs_rehash(hashed)
+
+
+def test_saturated_pool_sheds_logins_with_429(app):
+    create_user(bcrypt.hashpw(b'Password123!', bcrypt.gensalt(4)).decode('utf-8'))
+    app.config.update(BCRYPT_EXECUTOR='thread', BCRYPT_WORKERS=1, BCRYPT_MAX_PENDING=0, BCRYPT_ADMISSION_TIMEOUT=0)
+    password_hasher.init_app(app)
+
+    # Occupy the only slot, as a long-running hash would
+    password_hasher._slots.acquire()
+    try:
+        response = login(app, 'Password123!')
+    finally:
+        password_hasher._slots.release()
+
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '1'
+    assert login(app, 'Password123!').status_code == 200
@@ -0,0 +1,78 @@
+"""Tests for the stuck payment sweep (runs in-process against SQLite)"""
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from app import db
+from app.models import Category, Order, OrderItem, Payment, Product, User
+from app.services.payment_reconciler import PaymentReconciler
+from app.services.payment_simulator import PaymentSimulator
+
+
+@pytest.fixture
+def app(app):
+    yield app
+    # Back to the app's own (unseeded) simulation model
+    PaymentSimulator.configure(success_rates={}, seed=None)
+
+
+def create_payments(count, age, stock=100):
+    """`count` processing payments, created `age` ago, each for one unit of a product"""
+    user = User(email='buyer@example.com', first_name='Buy', last_name='Er', password_hash='x')
+    category = Category(name='Gadgets')
+    db.session.add_all([user, category])
+    db.session.flush()
+
+    product = Product(name='Gadget', price=Decimal('5.00'), category_id=category.id, stock_quantity=stock)
+    db.session.add(product)
+    db.session.flush()
+
+    created_at = datetime.utcnow() - age
+    for i in range(count):
+        order = Order(user_id=user.id, total_amount=Decimal('5.00'), shipping_address_id=1, payment_status='processing')
+        db.session.add(order)
+        db.session.flush()
+        db.session.add(OrderItem(order_id=order.id, product_id=product.id, quantity=1, price_at_purchase=Decimal('5.00')))
+        db.session.add(Payment(
+            order_id=order.id, amount=Decimal('5.00'), payment_method='paypal',
+            transaction_id=f'TXN-STUCK-{i}', status='processing', created_at=created_at
+        ))
+
+    db.session.commit()
+    return product.id
+
+
+def test_reconcile_finalizes_stale_payments_and_restores_stock(app):
+    product_id = create_payments(25, age=timedelta(hours=1))
+    PaymentSimulator.configure(success_rates={'paypal': 0.5}, seed=7)
+
+    stats = PaymentReconciler.reconcile(older_than=60, batch_size=10, max_workers=4)
+
+    assert stats['scanned'] == 25
+    assert stats['completed'] + stats['failed'] == 25
+    assert stats['completed'] and stats['failed']
+    assert stats['errors'] == stats['skipped'] == 0
+
+    db.session.expire_all()
+    assert Payment.query.filter_by(status='processing').count() == 0
+    assert Order.query.filter_by(status='cancelled', payment_status='failed').count() == stats['failed']
+    assert Order.query.filter_by(status='processing', payment_status='completed').count() == stats['completed']
+    # Every failed order gave its unit back
+    assert db.session.get(Product, product_id).stock_quantity == 100 + stats['failed']
+
+
+def test_reconcile_leaves_recent_and_finalized_payments_alone(app):
+    create_payments(3, age=timedelta(seconds=5))
+
+    stats = PaymentReconciler.reconcile(older_than=60)
+
+    assert stats['scanned'] == 0
+    assert Payment.query.filter_by(status='processing').count() == 3
+
+    # A payment finalized by a live worker mid-sweep is not touched again
+    assert PaymentSimulator.apply_payment_result(1, 'completed')
+    db.session.commit()
+    assert not PaymentSimulator.apply_payment_result(1, 'failed')
+    db.session.rollback()
+    assert db.session.get(Payment, 1).status == 'completed'
@@ -0,0 +1,69 @@
+"""Tests for the payment gateway simulation model"""
+import pytest
+
+from app.services.payment_simulator import LatencyModel, PaymentSimulator
+
+
+@pytest.fixture(autouse=True)
+def simulator():
+    latency = PaymentSimulator.latency
+    PaymentSimulator.configure(latency=LatencyModel('none'), success_rates={}, seed=None)
+    yield PaymentSimulator
+    PaymentSimulator.configure(latency=latency, success_rates={}, seed=None)
+
+
+def outcomes(transaction_ids):
+    return {
+        transaction_id: PaymentSimulator.process_payment(transaction_id, 10.0, 'paypal')
+        for transaction_id in transaction_ids
+    }
+
+
+def test_seeded_outcomes_are_reproducible_in_any_order(simulator):
+    transaction_ids = [f'TXN-{i}' for i in range(200)]
+    simulator.configure(success_rates={'paypal': 0.5}, seed=42)
+
+    first = outcomes(transaction_ids)
+    assert outcomes(reversed(transaction_ids)) == first
+    assert {status for status, _ in first.values()} == {'completed', 'failed'}
+
+    simulator.configure(seed=43)
+    assert outcomes(transaction_ids) != first
+
+
+def test_seeded_latency_is_reproducible(simulator):
+    model = LatencyModel('normal', mean=2.0, stddev=0.5)
+    simulator.configure(seed=7)
+
+    assert model.sample(simulator._rng('TXN-1')) == model.sample(simulator._rng('TXN-1'))
+
+
+def test_configure_only_changes_what_is_passed(simulator):
+    simulator.configure(success_rates={'paypal': 0.25}, seed=7)
+
+    simulator.configure(seed=8)
+    assert simulator.settings()['success_rates']['paypal'] == 0.25
+
+    simulator.configure(success_rates={'refund': 1.0})
+    assert simulator.settings()['seed'] == 8
+    # Rates passed again start over from the defaults
+    assert simulator.settings()['success_rates'] == dict(PaymentSimulator.DEFAULT_SUCCESS_RATES, refund=1.0)
+
+    simulator.configure(latency=LatencyModel('fixed', mean=0.5))
+    assert simulator.settings()['seed'] == 8
+    assert simulator.settings()['latency']['distribution'] == 'fixed'
+
+
+def test_parse_success_rates():
+    parse = PaymentSimulator.parse_success_rates
+
+    assert parse(' credit_card=0.8, paypal = 1 ,') == {'credit_card': 0.8, 'paypal': 1.0}
+    assert parse({'refund': '0.5'}) == {'refund': 0.5}
+    assert parse('') == parse(None) == {}
+
+    with pytest.raises(ValueError):
+        parse('paypal=1.5')
+    with pytest.raises(ValueError):
+        parse('paypal=often')
+    with pytest.raises(ValueError):
+        parse('paypal')
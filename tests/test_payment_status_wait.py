@@ -0,0 +1,91 @@
+"""Tests for the long-poll payment status endpoint (runs in-process against SQLite)"""
+import threading
+import time
+from decimal import Decimal
+
+import pytest
+
+from app import db
+from app.models import Order, Payment, User
+from app.services.payment_notifier import payment_notifier
+
+
+@pytest.fixture
+def app(app):
+    # Long enough that only a publish can end a wait early
+    app.config['PAYMENT_STATUS_RECHECK_INTERVAL'] = 30
+    return app
+
+
+@pytest.fixture
+def payment(app, auth_headers):
+    """A processing payment; returns (transaction id, auth headers)"""
+    user = User(email='buyer@example.com', first_name='Buy', last_name='Er', password_hash='x')
+    db.session.add(user)
+    db.session.flush()
+    order = Order(user_id=user.id, total_amount=Decimal('5.00'), shipping_address_id=1, payment_status='processing')
+    db.session.add(order)
+    db.session.flush()
+    db.session.add(Payment(order_id=order.id, amount=Decimal('5.00'), payment_method='paypal',
+                           transaction_id='TXN-WAIT', status='processing'))
+    db.session.commit()
+    return 'TXN-WAIT', auth_headers(user)
+
+
+def finalize_later(app, transaction_id, delay):
+    """Complete the payment from another thread after `delay` seconds, like the payment worker"""
+    def finalize():
+        time.sleep(delay)
+        with app.app_context():
+            Payment.query.filter_by(transaction_id=transaction_id).update({'status': 'completed'})
+            db.session.commit()
+            db.session.remove()
+        payment_notifier.publish(transaction_id)
+
+    thread = threading.Thread(target=finalize)
+    thread.start()
+    return thread
+
+
+def test_publish_wakes_the_waiting_request(app, payment):
+    transaction_id, headers = payment
+    thread = finalize_later(app, transaction_id, delay=0.2)
+
+    started = time.monotonic()
+    response = app.test_client().get(f'/api/payments/status/{transaction_id}/wait?timeout=10', headers=headers)
+    thread.join()
+
+    assert response.status_code == 200
+    assert response.json['status'] == 'completed'
+    assert time.monotonic() - started < 5
+    assert payment_notifier.waiting() == 0
+
+
+def test_wait_returns_the_unchanged_payment_at_the_timeout(app, payment):
+    transaction_id, headers = payment
+
+    started = time.monotonic()
+    response = app.test_client().get(f'/api/payments/status/{transaction_id}/wait?timeout=0.2', headers=headers)
+
+    assert response.status_code == 200
+    assert response.json['status'] == 'processing'
+    assert 0.2 <= time.monotonic() - started < 5
+    assert payment_notifier.waiting() == 0
+
+    # A client that is already behind gets the current status straight away
+    response = app.test_client().get(f'/api/payments/status/{transaction_id}/wait?status=pending', headers=headers)
+    assert response.json['status'] == 'processing'
+
+
+def test_waiters_past_the_cap_are_turned_away(app, payment):
+    transaction_id, headers = payment
+    app.config['PAYMENT_STATUS_MAX_WAITERS'] = 1
+    client = app.test_client()
+
+    with payment_notifier.subscribe('TXN-OTHER'):
+        response = client.get(f'/api/payments/status/{transaction_id}/wait?timeout=0', headers=headers)
+        assert response.status_code == 429
+        assert response.headers['Retry-After'] == '30'
+
+    response = client.get(f'/api/payments/status/{transaction_id}/wait?timeout=0', headers=headers)
+    assert response.status_code == 200
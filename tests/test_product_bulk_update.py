@@ -0,0 +1,110 @@
+"""Tests for the bulk price / stock update endpoint (runs in-process against SQLite)"""
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event
+
+from app import db
+from app.models import Category, Product
+from app.services.product_bulk_update import BulkProductUpdate
+from app.services.suggestion_index import suggestion_index
+
+
+@pytest.fixture
+def app(app):
+    seed_products(50)
+    return app
+
+
+def seed_products(count):
+    category = Category(name='Gadgets')
+    db.session.add(category)
+    db.session.flush()
+    db.session.add_all([
+        Product(name=f'Gadget {i}', price=Decimal('10.00'), category_id=category.id, stock_quantity=5)
+        for i in range(count)
+    ])
+    db.session.commit()
+
+
+@pytest.fixture
+def post(app, admin_headers):
+    client = app.test_client()
+    client.get('/api/payments/queue/stats', headers=admin_headers)  # Warm the token version cache
+
+    def post(updates):
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            response = client.post('/api/admin/products/bulk-update', json={'updates': updates}, headers=admin_headers)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+        db.session.expire_all()
+        return response, statements
+
+    return post
+
+
+def stock_and_prices():
+    return {p.id: (p.price, p.stock_quantity) for p in Product.query.all()}
+
+
+def test_many_products_change_in_a_few_statements(app, post, monkeypatch):
+    monkeypatch.setattr(BulkProductUpdate, 'CHUNK_SIZE', 20)
+    suggestion_index.rebuild()
+    updates = [{'id': i, 'price': 12.5} for i in range(1, 41)]
+    updates += [{'id': i, 'stock_quantity': 100} for i in range(41, 46)]
+    updates += [{'id': i, 'stock_delta': -5} for i in range(46, 51)]
+
+    response, statements = post(updates)
+
+    assert response.status_code == 200
+    assert response.json['updated'] == 50
+    assert (response.json['price_updates'], response.json['stock_updates']) == (40, 10)
+    updates_run = [s for s in statements if s.startswith('UPDATE products')]
+    # 40 prices in chunks of 20, one absolute stock chunk, one delta chunk
+    assert len(updates_run) == 4
+
+    products = stock_and_prices()
+    assert products[1] == (Decimal('12.50'), 5)
+    assert products[41] == (Decimal('10.00'), 100)
+    assert products[50] == (Decimal('10.00'), 0)
+    assert suggestion_index.suggest('gadget 1')[0]['price'] == 12.5
+
+
+def test_stock_cannot_go_negative_and_nothing_is_applied(app, post):
+    before = stock_and_prices()
+
+    response, _ = post([{'id': 1, 'price': 1}, {'id': 2, 'stock_delta': 3}, {'id': 3, 'stock_delta': -6}])
+
+    assert response.status_code == 409
+    assert (response.json['product_id'], response.json['requested'], response.json['available']) == (3, 6, 5)
+    assert stock_and_prices() == before
+
+
+def test_missing_products_and_invalid_items_are_rejected(app, post):
+    response, _ = post([{'id': 1, 'price': 3}, {'id': 999, 'stock_delta': 1}])
+    assert response.status_code == 404
+    assert response.json['product_ids'] == [999]
+
+    response, _ = post([
+        {'id': 1},
+        {'id': 2, 'price': -1},
+        {'id': 3, 'stock_quantity': 1, 'stock_delta': 1},
+        {'id': 4, 'stock_delta': 1.5},
+        {'id': 5, 'price': 2},
+        {'id': 5, 'price': 3},
+        {'id': 6, 'price': 100000000},
+        {'id': 7, 'price': 99999999.999},
+        {'id': 8, 'price': 'NaN'},
+        {'id': 9, 'price': 99999999.99},
+        {'id': 10, 'price': 1e30}
+    ])
+    assert response.status_code == 400
+    assert [d['index'] for d in response.json['details']] == [0, 1, 2, 3, 5, 6, 7, 8, 10]
+    assert response.json['details'][5]['error'] == 'price must be between 0 and 99999999.99'
+    assert Product.query.filter(Product.price != Decimal('10.00')).count() == 0
@@ -0,0 +1,162 @@
+"""Tests for bulk product import (runs in-process against SQLite)"""
+import io
+import json
+from decimal import Decimal
+
+import pytest
+
+from app import db
+from app.models import Category, Product
+from app.services.product_import import ProductImporter, read_rows
+from app.services.suggestion_index import suggestion_index
+
+
+@pytest.fixture
+def app(app):
+    db.session.add_all([Category(name='Kitchen'), Category(name='Garden')])
+    db.session.commit()
+    return app
+
+
+CATALOG_CSV = '''sku,name,price,category,stock_quantity,description
+K-1,Kettle,25.00,kitchen,5,Boils water
+K-2,Mug,4.5,Kitchen,20,
+G-1,Rake,12,Garden,,Missing stock
+G-2,Hose,abc,Garden,3,
+X-1,Widget,1,Nowhere,1,
+'''
+
+
+def import_csv(text, batch_size=2, **options):
+    importer = ProductImporter(batch_size=batch_size, **options)
+    return importer.run(read_rows(io.BytesIO(text.encode('utf-8')), 'csv'))
+
+
+def test_csv_import_creates_valid_rows_and_reports_the_rest(app):
+    report = import_csv(CATALOG_CSV)
+
+    assert (report['rows'], report['created'], report['updated'], report['failed']) == (5, 2, 0, 3)
+    assert [(e['row'], e['sku']) for e in report['errors']] == [(5, 'G-2'), (6, 'X-1'), (4, 'G-1')]
+    assert 'price must be a number' in report['errors'][0]['error']
+    assert "Unknown category 'Nowhere'" in report['errors'][1]['error']
+    assert 'stock_quantity' in report['errors'][2]['error']
+
+    kettle = Product.query.filter_by(sku='K-1').one()
+    assert (kettle.name, kettle.price, kettle.stock_quantity, kettle.category.name) == ('Kettle', Decimal('25.00'), 5, 'Kitchen')
+    assert Product.query.filter_by(sku='K-2').one().description == ''
+    # Imported products are searchable straight away
+    assert [s['name'] for s in suggestion_index.suggest('ket')] == ['Kettle']
+
+
+def test_out_of_range_prices_are_row_errors(app):
+    report = import_csv('sku,name,price,category,stock_quantity\n'
+                        'G-3,Gnome,1e26,Garden,1\n'
+                        'G-4,Gnome,99999999.995,Garden,1\n'
+                        'G-5,Gnome,99999999.99,Garden,1\n')
+
+    assert (report['created'], report['failed']) == (1, 2)
+    assert {e['error'] for e in report['errors']} == {'price must be between 0 and 99999999.99'}
+
+
+def test_reimport_updates_by_sku_and_id_leaving_blank_fields(app):
+    import_csv(CATALOG_CSV)
+    mug_id = Product.query.filter_by(sku='K-2').one().id
+
+    report = import_csv(
+        'id,sku,name,price,category,stock_quantity\n'
+        ',K-1,,30,,\n'
+        f'{mug_id},,Big Mug,,Garden,7\n'
+        '999,,Ghost,1,Garden,1\n'
+    )
+
+    assert (report['created'], report['updated'], report['failed']) == (0, 2, 1)
+    assert report['errors'][0]['error'] == 'Product 999 not found'
+    kettle = Product.query.filter_by(sku='K-1').one()
+    assert (kettle.name, kettle.price, kettle.stock_quantity) == ('Kettle', Decimal('30.00'), 5)
+    mug = db.session.get(Product, mug_id)
+    assert (mug.name, mug.sku, mug.stock_quantity, mug.category.name) == ('Big Mug', 'K-2', 7, 'Garden')
+
+
+def test_dry_run_and_category_creation(app):
+    report = import_csv(CATALOG_CSV, create_categories=True, dry_run=True)
+
+    assert report['created'] == 3
+    assert report['categories_created'] == 1
+    assert Product.query.count() == 0
+    assert Category.query.count() == 2
+
+
+def test_import_endpoint_accepts_ndjson_bodies_and_files(app, admin_headers):
+    client = app.test_client()
+    body = '\n'.join(json.dumps(row) for row in [
+        {'sku': 'N-1', 'name': 'Trowel', 'price': 8, 'category_id': 2, 'stock_quantity': 4},
+        {'sku': 'N-2', 'name': 'Spade', 'price': 15, 'category': 'garden', 'stock_quantity': 2},
+        ['not', 'an', 'object']
+    ]) + '\n{broken'
+
+    response = client.post('/api/admin/products/import', data=body, headers=admin_headers,
+                           content_type='application/x-ndjson')
+
+    assert response.status_code == 200
+    assert (response.json['created'], response.json['failed']) == (2, 2)
+    assert [e['row'] for e in response.json['errors']] == [3, 4]
+
+    response = client.post('/api/admin/products/import?create_categories=1', headers=admin_headers,
+                           data={'file': (io.BytesIO(CATALOG_CSV.encode('utf-8')), 'catalog.csv')})
+
+    assert response.status_code == 200
+    assert (response.json['created'], response.json['categories_created']) == (3, 1)
+    assert Product.query.count() == 5
+
+    response = client.post('/api/admin/products/import?format=xml', data='<x/>', headers=admin_headers)
+    assert response.status_code == 400
+
+
+NEW_CATEGORY_CSV = '''sku,name,price,category,stock_quantity
+S-1,Sofa,300,Living,1
+S-2,Chair,80,Living,4
+S-3,Lamp,40,Living,2
+'''
+
+
+def test_dry_run_categories_are_recreated_per_batch_and_counted_once(app):
+    importer = ProductImporter(batch_size=1, create_categories=True, dry_run=True)
+    report = importer.run(read_rows(io.BytesIO(NEW_CATEGORY_CSV.encode('utf-8')), 'csv'))
+
+    assert (report['created'], report['failed'], report['categories_created']) == (3, 0, 1)
+    # No id from a rolled-back batch is left in the map for later batches to use
+    assert set(importer.categories) == {'kitchen', 'garden'}
+    assert Category.query.count() == 2
+
+
+def test_created_categories_survive_a_failed_batch(app):
+    import_csv('sku,name,price,category_id,stock_quantity\nS-1,Sofa,300,1,1\n')
+    sofa_id = Product.query.one().id
+
+    # The batch updates the sofa to a SKU it also creates, so it fails as a whole
+    report = import_csv('id,sku,name,price,category,stock_quantity\n'
+                        ',S-2,Chair,80,Living,4\n'
+                        ',S-3,Lamp,40,Living,2\n'
+                        f'{sofa_id},S-2,,,,\n', batch_size=3, create_categories=True)
+
+    assert (report['created'], report['failed'], report['categories_created']) == (0, 3, 1)
+    assert Category.query.filter_by(name='Living').count() == 1
+
+
+@pytest.mark.parametrize('returning', [True, False], ids=['returning', 'no-returning'])
+def test_import_refreshes_only_the_touched_products_in_the_suggestion_index(app, monkeypatch, returning):
+    # Without executemany RETURNING (MySQL) new rows are found by SKU, or by name and timestamp
+    monkeypatch.setattr(db.engine.dialect, 'insert_executemany_returning', returning)
+    import_csv(CATALOG_CSV)
+    suggestion_index.rebuild()
+    monkeypatch.setattr(suggestion_index, 'rebuild', lambda: pytest.fail('full rebuild during import'))
+    kettle_id = Product.query.filter_by(sku='K-1').one().id
+
+    import_csv(f'id,sku,name,price,category,stock_quantity\n{kettle_id},,Tea Kettle,31,,\n'
+               ',K-3,Kettle Descaler,6,Kitchen,9\n'
+               ',,Kettle Stand,12,Kitchen,3\n', batch_size=3)
+
+    assert [(s['name'], s['price']) for s in suggestion_index.suggest('ket')] == [
+        ('Kettle Descaler', 6.0), ('Kettle Stand', 12.0), ('Tea Kettle', 31.0)
+    ]
+    assert suggestion_index.suggest('tea')[0]['id'] == kettle_id
@@ -0,0 +1,90 @@
+"""Tests for SQL filtering, sorting and pagination of GET /api/products/ (runs in-process against SQLite)"""
+from decimal import Decimal
+
+import pytest
+
+from app import db
+from app.models import Category, Product
+
+
+@pytest.fixture
+def app(app):
+    seed_catalog()
+    return app
+
+
+def seed_catalog():
+    """
+    25 products over two categories, priced 1..25. Product i has average
+    rating (i % 5) + 1, except every seventh which has no reviews; the last
+    two are out of stock.
+    """
+    categories = [Category(name='Electronics'), Category(name='Books')]
+    db.session.add_all(categories)
+    db.session.flush()
+
+    for i in range(25):
+        reviewed = i % 7 != 0
+        db.session.add(Product(
+            name=f'{"abcdefghijklmnopqrstuvwxy"[(i * 7) % 25]} product',
+            description='Sample product',
+            price=Decimal(i + 1),
+            category_id=categories[i % 2].id,
+            stock_quantity=0 if i >= 23 else 5,
+            rating_sum=((i % 5) + 1) * 2 if reviewed else 0,
+            rating_count=2 if reviewed else 0
+        ))
+    db.session.commit()
+
+
+def listing(client, query=''):
+    response = client.get(f'/api/products/?{query}')
+    assert response.status_code == 200
+    return response.json
+
+
+def test_filters_apply_in_sql_and_total_counts_matches(app):
+    client = app.test_client()
+
+    data = listing(client, 'per_page=100')
+    assert data['pagination']['total'] == 23  # Out of stock hidden by default
+    assert all(p['stock_quantity'] > 0 for p in data['products'])
+    assert listing(client, 'show_out_of_stock=true')['pagination']['total'] == 25
+
+    data = listing(client, 'category_id=1&min_price=5&max_price=15&per_page=100')
+    prices = [p['price'] for p in data['products']]
+    assert data['pagination']['total'] == len(prices) == 6
+    assert all(5 <= price <= 15 for price in prices)
+    assert {p['category_id'] for p in data['products']} == {1}
+
+    data = listing(client, 'min_rating=4&per_page=100')
+    ratings = [p['average_rating'] for p in data['products']]
+    assert data['pagination']['total'] == len(ratings)
+    assert ratings and min(ratings) >= 4
+
+
+def test_sorting_by_each_field(app):
+    client = app.test_client()
+
+    prices = [p['price'] for p in listing(client, 'sort_by=price&order=asc&per_page=100')['products']]
+    assert prices == sorted(prices)
+
+    names = [p['name'] for p in listing(client, 'sort_by=name&order=asc&per_page=100')['products']]
+    assert names == sorted(names, key=str.lower)
+
+    ratings = [p['average_rating'] for p in listing(client, 'sort_by=rating&order=desc&per_page=100')['products']]
+    assert ratings == sorted(ratings, reverse=True)
+    assert ratings[-1] == 0  # Unreviewed products sort as 0
+
+
+def test_offset_pages_cover_every_product_once(app):
+    client = app.test_client()
+
+    first = listing(client, 'sort_by=rating&per_page=10&page=1')
+    assert first['pagination'] == {'page': 1, 'per_page': 10, 'total': 23, 'pages': 3}
+
+    seen = []
+    for page in (1, 2, 3):
+        seen += [p['id'] for p in listing(client, f'sort_by=rating&per_page=10&page={page}')['products']]
+    assert len(seen) == len(set(seen)) == 23
+    assert listing(client, 'sort_by=rating&per_page=10&page=4')['products'] == []
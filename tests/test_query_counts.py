@@ -0,0 +1,194 @@
+"""Query count tests for product listing, cart and checkout endpoints (runs in-process against SQLite)"""
+from contextlib import contextmanager
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event
+
+from app import db
+from app.models import Category, Product, Review, User
+
+
+@pytest.fixture
+def app(app):
+    seed_catalog()
+    return app
+
+
+def seed_catalog():
+    """Two categories, 60 products and a review on every product"""
+    categories = [Category(name='Electronics'), Category(name='Books')]
+    db.session.add_all(categories)
+
+    reviewer = User(email='reviewer@example.com', first_name='Review', last_name='Er', password_hash='x')
+    db.session.add(reviewer)
+    db.session.flush()
+
+    for i in range(60):
+        product = Product(
+            name=f'Product {i}',
+            description='Sample product',
+            price=Decimal('10.00') + i,
+            category_id=categories[i % 2].id,
+            stock_quantity=5
+        )
+        db.session.add(product)
+        db.session.flush()
+        db.session.add(Review(product_id=product.id, user_id=reviewer.id, rating=1 + i % 5))
+        Product.update_rating_aggregates(product.id, 1 + i % 5, 1)
+
+    db.session.commit()
+
+
+@contextmanager
+def count_queries():
+    """Count SQL statements executed inside the block"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def get_with_fresh_session(client, url):
+    # Start from an empty identity map so nothing is served from cache
+    db.session.expunge_all()
+    with count_queries() as statements:
+        response = client.get(url)
+    assert response.status_code == 200
+    return response, len(statements)
+
+
+def test_product_listing_query_count_is_independent_of_page_size(app):
+    client = app.test_client()
+
+    small, small_count = get_with_fresh_session(client, '/api/products/?per_page=5')
+    large, large_count = get_with_fresh_session(client, '/api/products/?per_page=50')
+
+    assert len(small.json['products']) == 5
+    assert len(large.json['products']) == 50
+    assert large.json['products'][0]['category_name'] is not None
+    assert small_count == large_count <= 2
+
+
+def test_product_listing_rating_sort_query_count(app):
+    client = app.test_client()
+
+    response, query_count = get_with_fresh_session(
+        client, '/api/products/?per_page=40&sort_by=rating&min_rating=2'
+    )
+
+    ratings = [p['average_rating'] for p in response.json['products']]
+    assert ratings == sorted(ratings, reverse=True)
+    assert min(ratings) >= 2
+    assert query_count <= 2
+
+
+def test_category_detail_query_count_is_bounded(app):
+    client = app.test_client()
+
+    response, query_count = get_with_fresh_session(client, '/api/products/categories/1')
+
+    assert len(response.json['products']) == 30
+    assert all(p['review_count'] == 1 for p in response.json['products'])
+    assert query_count <= 3
+
+
+def create_shopper(cart_lines, email='shopper@example.com'):
+    """A user with a shipping address and `cart_lines` products in their cart"""
+    from app.models import Address, Cart, CartItem
+
+    user = User(email=email, first_name='Shop', last_name='Per')
+    user.set_password('Password123!')
+    db.session.add(user)
+    db.session.flush()
+    address = Address(user_id=user.id, address_line1='1 Main St', city='Springfield', state='IL',
+                      postal_code='62701', country='USA')
+    cart = Cart(user_id=user.id)
+    db.session.add_all([address, cart])
+    db.session.flush()
+    for product_id in range(1, cart_lines + 1):
+        db.session.add(CartItem(cart_id=cart.id, product_id=product_id, quantity=2))
+    db.session.commit()
+    return user.id, address.id
+
+
+def login_shopper(client, email='shopper@example.com'):
+    response = client.post('/api/auth/login', json={'email': email, 'password': 'Password123!'})
+    assert response.status_code == 200
+    return {'Authorization': f"Bearer {response.json['access_token']}"}
+
+
+def cart_get_query_count(client, headers):
+    db.session.expunge_all()
+    with count_queries() as statements:
+        response = client.get('/api/cart/', headers=headers)
+    assert response.status_code == 200
+    return response.json, len(statements)
+
+
+def test_cart_query_count_is_independent_of_line_count(app):
+    from app.models import CartItem
+
+    client = app.test_client()
+    create_shopper(cart_lines=3)
+    headers = login_shopper(client)
+
+    small, small_count = cart_get_query_count(client, headers)
+
+    cart_id = small['id']
+    db.session.add_all(CartItem(cart_id=cart_id, product_id=product_id, quantity=1) for product_id in range(4, 31))
+    db.session.commit()
+    large, large_count = cart_get_query_count(client, headers)
+
+    assert len(small['items']) == 3
+    assert len(large['items']) == 30
+    assert small_count == large_count <= 2
+
+    # Totals are computed in the same pass as the lines
+    assert small['total_items'] == 6
+    assert small['subtotal'] == float(sum(2 * (Decimal('10.00') + i) for i in range(3)))
+    assert all(item['product']['category_name'] for item in large['items'])
+
+
+def checkout_query_count(app, cart_lines, email='shopper@example.com'):
+    client = app.test_client()
+    _, address_id = create_shopper(cart_lines, email)
+    headers = login_shopper(client, email)
+
+    db.session.expunge_all()
+    with count_queries() as statements:
+        response = client.post('/api/orders/checkout', json={'shipping_address_id': address_id}, headers=headers)
+    assert response.status_code == 201
+    return response.json['order'], statements
+
+
+def test_checkout_writes_order_lines_in_bulk(app):
+    from app.models import CartItem, OrderItem
+
+    order, statements = checkout_query_count(app, cart_lines=3)
+    assert [item['product_id'] for item in order['items']] == [1, 2, 3]
+    assert order['total_items'] == 6
+    assert order['total_amount'] == float(sum(2 * (Decimal('10.00') + i) for i in range(3)))
+
+    # One INSERT for all lines, one DELETE for the cart, one stock UPDATE
+    assert sum(s.lstrip().upper().startswith('INSERT INTO ORDER_ITEMS') for s in statements) == 1
+    assert sum(s.lstrip().upper().startswith('DELETE FROM CART_ITEMS') for s in statements) == 1
+    assert sum(s.lstrip().upper().startswith('UPDATE PRODUCTS') for s in statements) == 1
+
+    assert OrderItem.query.count() == 3
+    assert CartItem.query.count() == 0
+    assert [p.stock_quantity for p in Product.query.filter(Product.id <= 4).order_by(Product.id)] == [3, 3, 3, 5]
+
+
+def test_checkout_query_count_is_independent_of_line_count(app):
+    _, small = checkout_query_count(app, cart_lines=2)
+    order, large = checkout_query_count(app, cart_lines=25, email='big-spender@example.com')
+
+    assert len(order['items']) == 25
+    assert len(small) == len(large)
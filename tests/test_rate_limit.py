@@ -0,0 +1,111 @@
+"""Tests for token bucket rate limiting (runs in-process against SQLite)"""
+import pytest
+
+import config
+from app import create_app, db
+from app.utils.rate_limit import MemoryStore, RateLimit, RateLimitStore, rate_limiter
+
+
+class CountingStore(MemoryStore):
+    """Stands in for a shared store; counts calls so tests can see it was used"""
+    calls = 0
+
+    def consume(self, key, limit, cost=1):
+        CountingStore.calls += 1
+        return super().consume(key, limit, cost)
+
+
+def login(client, ip='10.0.0.1', email='nobody@example.com', headers=None):
+    return client.post('/api/auth/login', json={'email': email, 'password': 'wrong'},
+                       environ_base={'REMOTE_ADDR': ip}, headers=headers)
+
+
+def test_parse_accepts_rate_strings_and_bursts():
+    limit = RateLimit.parse('30/minute')
+    assert (limit.capacity, limit.rate) == (30, 0.5)
+
+    limit = RateLimit.parse({'limit': '10/second', 'burst': 25})
+    assert (limit.capacity, limit.rate) == (25, 10)
+
+    with pytest.raises(ValueError):
+        RateLimit.parse('ten per minute')
+
+
+def test_login_burst_is_rejected_with_retry_after(app):
+    client = app.test_client()
+    burst = app.config['RATE_LIMITS']['auth.login']['burst']
+
+    for remaining in reversed(range(burst)):
+        response = login(client)
+        assert response.status_code == 401
+        assert response.headers['X-RateLimit-Remaining'] == str(remaining)
+
+    response = login(client)
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) >= 1
+    assert response.json['retry_after'] == int(response.headers['Retry-After'])
+
+    # Another address has its own bucket
+    assert login(client, ip='10.0.0.2').status_code == 401
+
+
+def test_unlisted_endpoints_are_not_limited(app):
+    response = app.test_client().get('/api/products/categories')
+    assert 'X-RateLimit-Limit' not in response.headers
+
+
+def test_blueprint_rules_and_custom_stores(app):
+    app.config.update(RATE_LIMITS={'coupons': '1/hour'}, RATE_LIMIT_STORE=f'{__name__}:CountingStore')
+    rate_limiter.init_app(app)
+    client = app.test_client()
+    CountingStore.calls = 0
+
+    assert client.get('/api/coupons/').status_code == 200
+    assert client.get('/api/coupons/').status_code == 429
+    assert CountingStore.calls == 2
+    assert isinstance(rate_limiter.store(), CountingStore)
+
+
+def test_login_attempts_are_limited_per_email_across_addresses(app):
+    client = app.test_client()
+    burst = app.config['RATE_LIMITS_BY_FIELD']['auth.login']['burst']
+
+    for i in range(burst):
+        assert login(client, ip=f'10.1.0.{i}', email='Victim@example.com').status_code == 401
+
+    response = login(client, ip='10.2.0.1', email=' victim@example.com')
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) >= 1
+
+    # Other accounts are unaffected
+    assert login(client, ip='10.2.0.1', email='other@example.com').status_code == 401
+
+
+def test_forwarded_addresses_only_count_behind_a_configured_proxy(monkeypatch):
+    burst = config.Config.RATE_LIMITS['auth.login']['burst']
+
+    def exhausted_after_spoofing(app):
+        client = app.test_client()
+        with app.app_context():
+            db.drop_all()
+            db.create_all()
+            for i in range(burst):
+                login(client, email=f'user{i}@example.com', headers={'X-Forwarded-For': f'10.9.0.{i}'})
+            status = login(client, email='last@example.com', headers={'X-Forwarded-For': '10.9.9.9'}).status_code
+            db.session.remove()
+            db.drop_all()
+        return status == 429
+
+    # Without ProxyFix the header is ignored: every attempt came from the same socket
+    assert exhausted_after_spoofing(create_app('testing'))
+
+    monkeypatch.setattr(config.TestingConfig, 'PROXY_FIX_X_FOR', 1)
+    assert not exhausted_after_spoofing(create_app('testing'))
+
+
+def test_stores_must_implement_consume():
+    class IncompleteStore(RateLimitStore):
+        pass
+
+    with pytest.raises(TypeError):
+        IncompleteStore()
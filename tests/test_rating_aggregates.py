@@ -0,0 +1,84 @@
+"""Tests for the stored rating aggregates on products (runs in-process against SQLite)"""
+from decimal import Decimal
+
+import pytest
+
+from app import db
+from app.models import Category, Product, Review, User
+
+
+def create_user(email, role='user'):
+    user = User(email=email, first_name='Test', last_name='User', role=role)
+    user.set_password('Password123!')
+    db.session.add(user)
+    db.session.commit()
+    return user.id
+
+
+def create_product(name='Widget', rating_sum=0, rating_count=0):
+    if not db.session.get(Category, 1):
+        db.session.add(Category(id=1, name='Electronics'))
+    product = Product(name=name, price=Decimal('9.99'), category_id=1, stock_quantity=5,
+                      rating_sum=rating_sum, rating_count=rating_count)
+    db.session.add(product)
+    db.session.commit()
+    return product.id
+
+
+def login(client, email):
+    response = client.post('/api/auth/login', json={'email': email, 'password': 'Password123!'})
+    assert response.status_code == 200
+    return {'Authorization': f"Bearer {response.json['access_token']}"}
+
+
+def test_average_rating_agrees_in_python_and_sql(app):
+    for rating_sum, rating_count in ((0, 0), (5, 1), (1, 3), (2, 3), (7, 2), (13, 4)):
+        create_product(f'{rating_sum}/{rating_count}', rating_sum, rating_count)
+
+    in_sql = dict(db.session.query(Product.id, Product.average_rating).all())
+    for product in Product.query.all():
+        assert product.average_rating == pytest.approx(in_sql[product.id])
+
+    # Filtering on the expression picks the same products as the property
+    matched = {p.id for p in Product.query.filter(Product.average_rating >= 2.5)}
+    assert matched == {p.id for p in Product.query.all() if p.average_rating >= 2.5}
+
+
+def test_review_add_and_delete_keep_aggregates_current(app):
+    create_user('admin@example.com', role='admin')
+    create_user('a@example.com')
+    create_user('b@example.com')
+    product_id = create_product()
+    client = app.test_client()
+
+    for email, rating in (('a@example.com', 5), ('b@example.com', 2)):
+        response = client.post(f'/api/products/{product_id}/reviews', json={'rating': rating},
+                               headers=login(client, email))
+        assert response.status_code == 201
+
+    product = client.get(f'/api/products/{product_id}').json
+    assert product['review_count'] == 2
+    assert product['average_rating'] == 3.5
+
+    review_id = Review.query.filter_by(rating=5).one().id
+    response = client.delete(f'/api/admin/reviews/{review_id}', headers=login(client, 'admin@example.com'))
+    assert response.status_code == 200
+
+    product = client.get(f'/api/products/{product_id}').json
+    assert product['review_count'] == 1
+    assert product['average_rating'] == 2
+
+    # The stored aggregates match a recount from the reviews table
+    assert Product.recompute_rating_aggregates() == 0
+
+
+def test_recompute_repairs_drifted_aggregates(app):
+    user_id = create_user('a@example.com')
+    product_id = create_product(rating_sum=40, rating_count=9)
+    db.session.add(Review(product_id=product_id, user_id=user_id, rating=4))
+    db.session.commit()
+
+    assert Product.recompute_rating_aggregates() == 1
+    product = db.session.get(Product, product_id)
+    db.session.refresh(product)
+    assert (product.rating_sum, product.rating_count) == (4, 1)
@@ -0,0 +1,174 @@
+"""Tests for the incrementally maintained sales rollups (runs in-process against SQLite)"""
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from app import db
+from app.models import Address, Cart, CartItem, Category, DailySales, Order, Payment, Product, ProductDailySales, User
+from app.services.payment_simulator import PaymentSimulator
+from app.services.sales_rollup import SalesRollup
+
+
+@pytest.fixture
+def app(app):
+    PaymentSimulator.configure(success_rates={'refund': 1.0})
+    yield app
+    PaymentSimulator.configure(success_rates={}, seed=None)
+
+
+@pytest.fixture
+def store(app, auth_headers, admin_headers):
+    """A shopper with an address and cart, an admin, and two products; returns auth headers and ids"""
+    shopper = User(email='shopper@example.com', first_name='Shop', last_name='Per', password_hash='x')
+    category = Category(name='Kitchen')
+    db.session.add_all([shopper, category])
+    db.session.flush()
+
+    address = Address(user_id=shopper.id, address_line1='1 Main St', city='Springfield', state='IL',
+                      postal_code='62701', country='USA')
+    kettle = Product(name='Kettle', price=Decimal('25.00'), category_id=category.id, stock_quantity=50)
+    mug = Product(name='Mug', price=Decimal('4.50'), category_id=category.id, stock_quantity=50)
+    db.session.add_all([address, Cart(user_id=shopper.id), kettle, mug])
+    db.session.commit()
+
+    return {
+        'shopper': auth_headers(shopper),
+        'admin': admin_headers,
+        'shopper_id': shopper.id,
+        'address_id': address.id,
+        'kettle': kettle.id,
+        'mug': mug.id
+    }
+
+
+def place_order(client, store, **quantities):
+    cart = Cart.query.filter_by(user_id=store['shopper_id']).one()
+    db.session.add_all([
+        CartItem(cart_id=cart.id, product_id=store[name], quantity=quantity) for name, quantity in quantities.items()
+    ])
+    db.session.commit()
+
+    response = client.post('/api/orders/checkout', json={'shipping_address_id': store['address_id']},
+                           headers=store['shopper'])
+    assert response.status_code == 201
+    return response.json['order']['id']
+
+
+def settle(order_id, final_status):
+    order = db.session.get(Order, order_id)
+    payment = Payment(order_id=order_id, amount=order.total_amount, payment_method='paypal',
+                      transaction_id=f'TXN-{order_id}', status='processing')
+    db.session.add(payment)
+    db.session.commit()
+    assert PaymentSimulator.apply_payment_result(payment.id, final_status)
+    db.session.commit()
+    return payment.id
+
+
+def rollup_snapshot():
+    db.session.expire_all()
+    daily = [row.to_dict() for row in DailySales.query.order_by(DailySales.day).all()]
+    products = sorted(
+        (row.day.isoformat(), row.product_id, row.category_id, row.units, float(row.revenue))
+        for row in ProductDailySales.query.all()
+    )
+    return daily, products
+
+
+def test_rollups_follow_the_order_lifecycle_and_match_a_backfill(app, store):
+    client = app.test_client()
+
+    refunded = place_order(client, store, kettle=1, mug=2)   # 34.00: paid, then refunded
+    cancelled = place_order(client, store, mug=1)            # 4.50: cancelled by the shopper
+    declined = place_order(client, store, kettle=2)          # 50.00: payment fails
+    paid = place_order(client, store, mug=3)                 # 13.50: paid
+
+    [placed] = rollup_snapshot()[0]
+    assert (placed['orders'], placed['units'], placed['gross_revenue']) == (4, 9, 102.0)
+
+    refunded_payment = settle(refunded, 'completed')
+    settle(declined, 'failed')
+    settle(paid, 'completed')
+    assert client.post(f'/api/orders/{cancelled}/cancel', headers=store['shopper']).status_code == 200
+    assert client.post(f'/api/payments/refund/{refunded_payment}', json={}, headers=store['admin']).status_code == 200
+
+    daily, products = rollup_snapshot()
+    [today] = daily
+    assert today == {
+        'day': datetime.utcnow().date().isoformat(),
+        'orders': 1,
+        'cancelled_orders': 3,
+        'units': 3,
+        'gross_revenue': 13.5,
+        'paid_revenue': 47.5,
+        'refunded_amount': 34.0
+    }
+    # The refund is deducted once
+    totals = client.get('/api/admin/analytics/sales', headers=store['admin']).json['totals']
+    assert (totals['paid_revenue'], totals['refunded_amount'], totals['net_revenue']) == (47.5, 34.0, 13.5)
+    assert SalesRollup.top_products(datetime.utcnow().date(), datetime.utcnow().date()) == [
+        {'product_id': store['mug'], 'name': 'Mug', 'units': 3, 'revenue': 13.5}
+    ]
+
+    # Rebuilding from the orders table gives the same rows (zero rows aside)
+    stats = SalesRollup.backfill()
+    assert stats['days'] == 1
+    rebuilt_daily, rebuilt_products = rollup_snapshot()
+    assert rebuilt_daily == daily
+    assert rebuilt_products == [row for row in products if row[3]]
+
+
+def test_analytics_endpoints_read_the_rollup(app, store):
+    client = app.test_client()
+    place_order(client, store, kettle=1, mug=2)
+    today = datetime.utcnow().date().isoformat()
+
+    response = client.get('/api/admin/analytics/sales', headers=store['admin'])
+    assert response.status_code == 200
+    assert len(response.json['days']) == 30
+    assert response.json['end'] == today
+    assert response.json['totals']['orders'] == 1
+    assert response.json['totals']['gross_revenue'] == 34.0
+
+    response = client.get(f'/api/admin/analytics/top-products?start={today}&sort_by=revenue', headers=store['admin'])
+    assert [p['name'] for p in response.json['products']] == ['Kettle', 'Mug']
+
+    response = client.get('/api/admin/analytics/categories', headers=store['admin'])
+    assert response.json['categories'] == [{'category_id': 1, 'name': 'Kitchen', 'units': 3, 'revenue': 34.0}]
+
+    assert client.get('/api/admin/analytics/sales?start=yesterday', headers=store['admin']).status_code == 400
+    assert client.get('/api/admin/analytics/sales', headers=store['shopper']).status_code == 403
+
+
+@pytest.mark.parametrize('final_status', ['completed', 'failed'])
+def test_payment_outcome_after_a_cancel_keeps_the_order_cancelled(app, store, final_status):
+    client = app.test_client()
+    order_id = place_order(client, store, kettle=2)
+    assert client.post(f'/api/orders/{order_id}/cancel', headers=store['shopper']).status_code == 200
+
+    # The gateway answers for a payment that was in flight when the shopper cancelled
+    settle(order_id, final_status)
+
+    db.session.expire_all()
+    order = db.session.get(Order, order_id)
+    assert (order.status, order.payment_status) == ('cancelled', final_status)
+    # The cancel already returned the units: not taken again, not returned twice
+    assert db.session.get(Product, store['kettle']).stock_quantity == 50
+
+    [today] = rollup_snapshot()[0]
+    assert (today['orders'], today['cancelled_orders'], today['units']) == (0, 1, 0)
+    daily, _ = rollup_snapshot()
+    SalesRollup.backfill()
+    assert rollup_snapshot()[0] == daily
+
+
+def test_partial_refunds_only_deduct_the_refunded_amount(app, store):
+    client = app.test_client()
+    payment_id = settle(place_order(client, store, kettle=1, mug=2), 'completed')  # 34.00
+
+    response = client.post(f'/api/payments/refund/{payment_id}', json={'amount': 10}, headers=store['admin'])
+    assert response.status_code == 200
+
+    totals = client.get('/api/admin/analytics/sales', headers=store['admin']).json['totals']
+    assert (totals['paid_revenue'], totals['refunded_amount'], totals['net_revenue']) == (34.0, 10.0, 24.0)
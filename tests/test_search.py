@@ -0,0 +1,99 @@
+"""Tests for product full-text search (runs in-process against SQLite)"""
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import insert, text, update
+
+from app import db
+from app.models import Category, Product
+from app.services.search_service import ProductSearch
+
+
+@pytest.fixture
+def app(app):
+    db.session.add(Category(id=1, name='Electronics'))
+    db.session.commit()
+    return app
+
+
+def add_product(name, description=''):
+    # Plain ORM writes, as seed data and scripts do; no search-specific calls
+    product = Product(name=name, description=description, price=Decimal('10.00'), category_id=1, stock_quantity=5)
+    db.session.add(product)
+    db.session.commit()
+    return product.id
+
+
+def search(client, term, **params):
+    query = '&'.join(f'{key}={value}' for key, value in params.items())
+    response = client.get(f'/api/products/?search={term}&{query}')
+    assert response.status_code == 200
+    return [p['name'] for p in response.json['products']]
+
+
+def test_every_write_path_keeps_the_index_in_sync(app):
+    assert ProductSearch.is_available()
+    client = app.test_client()
+
+    add_product('Wireless Mouse', 'Ergonomic and quiet')
+    db.session.execute(insert(Product), [
+        {'name': 'Wired Keyboard', 'description': 'Mechanical', 'price': 20, 'category_id': 1, 'stock_quantity': 5}
+    ])
+    db.session.commit()
+
+    assert search(client, 'wireless') == ['Wireless Mouse']
+    assert search(client, 'mech') == ['Wired Keyboard']  # Prefix match on the description
+    assert sorted(search(client, 'wire')) == ['Wired Keyboard', 'Wireless Mouse']
+    assert search(client, 'reless') == []  # Word prefixes, not substrings
+
+    # Bulk UPDATEs and deletes are reflected too
+    db.session.execute(update(Product).where(Product.name == 'Wired Keyboard').values(name='Gaming Keyboard'))
+    db.session.commit()
+    assert search(client, 'gaming') == ['Gaming Keyboard']
+    assert search(client, 'wired') == []
+
+    db.session.delete(Product.query.filter_by(name='Wireless Mouse').one())
+    db.session.commit()
+    assert search(client, 'wireless') == []
+    assert db.session.execute(text('SELECT count(*) FROM products_fts')).scalar() == 1
+
+
+def test_relevance_ranks_better_matches_first(app):
+    client = app.test_client()
+    add_product('Laptop Stand', 'Aluminium stand for a laptop')
+    add_product('USB Hub', 'Works with any laptop')
+    add_product('Laptop Laptop Sleeve', 'A laptop sleeve for your laptop')
+    add_product('Desk Lamp', 'Bright')
+
+    names = search(client, 'laptop', sort_by='relevance')
+    assert set(names) == {'Laptop Stand', 'USB Hub', 'Laptop Laptop Sleeve'}
+    assert names[0] == 'Laptop Laptop Sleeve'
+    assert names[-1] == 'USB Hub'
+
+    # Every token must match
+    assert search(client, 'laptop sleeve') == ['Laptop Laptop Sleeve']
+
+
+def test_falls_back_to_substring_search_without_the_index(app, monkeypatch):
+    client = app.test_client()
+    add_product('Wireless Mouse', 'Ergonomic')
+    add_product('Desk Lamp', 'Bright')
+    monkeypatch.setitem(ProductSearch._available, str(db.engine.url), False)
+
+    assert search(client, 'reless') == ['Wireless Mouse']  # Substring, which FTS would not match
+    assert search(client, 'lamp', sort_by='relevance') == ['Desk Lamp']
+    assert [p.name for p in ProductSearch.suggest('des')] == ['Desk Lamp']
+
+
+def test_rebuild_restores_a_missing_index(app):
+    add_product('Wireless Mouse')
+    db.session.execute(text('DROP TABLE products_fts'))
+    db.session.commit()
+
+    ProductSearch.rebuild_index()
+    assert ProductSearch.is_available()
+    assert search(app.test_client(), 'mouse') == ['Wireless Mouse']
+
+    # The triggers are back as well
+    add_product('Mouse Pad')
+    assert sorted(search(app.test_client(), 'mouse')) == ['Mouse Pad', 'Wireless Mouse']
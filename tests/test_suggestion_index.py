@@ -0,0 +1,125 @@
+"""Tests for the in-memory search suggestion index (runs in-process against SQLite)"""
+import time
+from decimal import Decimal
+
+import pytest
+
+from app import db
+from app.models import Category, Product
+from app.services.suggestion_index import PrefixTrie, suggestion_index
+
+
+@pytest.fixture
+def app(app):
+    db.session.add(Category(id=1, name='Electronics'))
+    db.session.commit()
+    yield app
+    if suggestion_index.rebuild_thread is not None:
+        suggestion_index.rebuild_thread.join(5)
+
+
+def add_product(name, price='10.00'):
+    product = Product(name=name, price=Decimal(price), category_id=1, stock_quantity=5)
+    db.session.add(product)
+    db.session.commit()
+    return product
+
+
+def names(results):
+    return [name for _, name, _ in results]
+
+
+def test_trie_matches_any_word_prefix():
+    trie = PrefixTrie()
+    trie.insert(1, 'Pro Blender', 99.0)
+    trie.insert(2, 'iPhone 15 Pro', 999.0)
+    trie.insert(3, 'Protein Powder', 30.0)
+    trie.insert(4, 'Blue  Pen', 2.0)
+
+    assert names(trie.search('pro')) == ['iPhone 15 Pro', 'Pro Blender', 'Protein Powder']
+    assert names(trie.search('PRO B')) == ['Pro Blender']  # Multi-word, case-insensitive
+    assert names(trie.search('blue pen')) == ['Blue  Pen']  # Whitespace normalized
+    assert names(trie.search('15 pro')) == ['iPhone 15 Pro']
+    assert trie.search('hone') == []  # Not a word start
+    assert trie.search('pro', limit=1) == [(2, 'iPhone 15 Pro', 999.0)]
+
+
+def test_trie_long_prefixes_past_the_depth_limit():
+    trie = PrefixTrie()
+    trie.insert(1, 'Extraordinarily Long Product Name One', 1.0)
+    trie.insert(2, 'Extraordinarily Long Product Name Two', 2.0)
+
+    assert names(trie.search('extraordinarily long product name t')) == ['Extraordinarily Long Product Name Two']
+
+
+def test_trie_removal_repairs_top_lists():
+    trie = PrefixTrie()
+    # More matches for "item" than a node keeps
+    for i in range(PrefixTrie.MAX_RESULTS + 3):
+        trie.insert(i, f'Item {i:02d}', float(i))
+    nodes = trie.node_count
+
+    trie.remove(0)
+    trie.remove(1)
+    assert names(trie.search('item')) == [f'Item {i:02d}' for i in range(2, 2 + PrefixTrie.MAX_RESULTS)]
+
+    # Renaming re-keys the product; unused nodes are pruned
+    trie.insert(5, 'Gadget', 5.0)
+    assert 'Item 05' not in names(trie.search('item', limit=20))
+    assert names(trie.search('gad')) == ['Gadget']
+    trie.remove(5)
+    assert trie.search('gad') == []
+    assert trie.node_count < nodes
+
+    trie.set_price(6, 60.0)
+    assert trie.search('item 06') == [(6, 'Item 06', 60.0)]
+
+
+def test_endpoint_serves_from_the_database_until_the_first_build(app):
+    client = app.test_client()
+    add_product('Kettle')
+
+    response = client.get('/api/products/search/suggestions?q=ket')
+    assert response.status_code == 200
+    assert [s['name'] for s in response.json['suggestions']] == ['Kettle']
+
+    suggestion_index.rebuild_thread.join(5)
+    assert suggestion_index.stats()['built']
+    assert [s['name'] for s in client.get('/api/products/search/suggestions?q=ket').json['suggestions']] == ['Kettle']
+    assert client.get('/api/products/search/suggestions?q=k').json['suggestions'] == []
+
+
+def test_stale_index_keeps_serving_while_rebuilding_in_the_background(app):
+    add_product('Kettle')
+    suggestion_index.rebuild()
+    built_at = suggestion_index.built_at
+
+    # Written behind the index's back (e.g. by another worker), then the TTL lapses
+    add_product('Ketchup')
+    suggestion_index.built_at = time.time() - suggestion_index.ttl - 1
+
+    assert [s['name'] for s in suggestion_index.suggest('ket')] == ['Kettle']
+    suggestion_index.rebuild_thread.join(5)
+    assert suggestion_index.built_at > built_at
+    assert [s['name'] for s in suggestion_index.suggest('ket')] == ['Ketchup', 'Kettle']
+
+
+def test_changes_during_a_build_are_not_lost(app, monkeypatch):
+    kettle = add_product('Kettle')
+    toaster = add_product('Toaster')
+    suggestion_index.rebuild()
+
+    # Admin edits land while a build is scanning the table
+    original_insert = PrefixTrie.insert
+
+    def insert_during_scan(trie, *args):
+        if trie is not suggestion_index._trie and args[0] == kettle.id:
+            suggestion_index.update_prices({kettle.id: Decimal('12.50')})
+            suggestion_index.remove(toaster.id)
+        original_insert(trie, *args)
+
+    monkeypatch.setattr(PrefixTrie, 'insert', insert_during_scan)
+    suggestion_index.rebuild()
+
+    assert suggestion_index.suggest('ket') == [{'id': kettle.id, 'name': 'Kettle', 'price': 12.5}]
+    assert suggestion_index.suggest('toa') == []
@@ -0,0 +1,118 @@
+"""Tests for the bounded payment finalization queue (runs in-process against SQLite)"""
+import logging
+from decimal import Decimal
+from threading import Event, Timer
+
+import pytest
+
+from app import db
+from app.models import Category, Order, Payment, User
+from app.services.payment_simulator import PaymentSimulator
+from app.services.task_queue import BoundedExecutor, QueueFullError
+
+
+@pytest.fixture
+def executor():
+    executor = BoundedExecutor('test-worker', max_workers=1, max_queue_size=1)
+    yield executor
+    executor.shutdown(timeout=5)
+
+
+def test_full_queue_rejects_and_metrics_track_it(executor):
+    release = Event()
+    started = Event()
+
+    def blocking():
+        started.set()
+        release.wait(5)
+
+    executor.submit(blocking)
+    started.wait(5)
+    executor.submit(lambda: None)
+    with pytest.raises(QueueFullError):
+        executor.submit(lambda: None)
+
+    metrics = executor.metrics()
+    assert (metrics['active'], metrics['queued'], metrics['rejected']) == (1, 1, 1)
+
+    release.set()
+    assert executor.shutdown(timeout=5)
+    metrics = executor.metrics()
+    assert (metrics['completed'], metrics['failed'], metrics['accepting']) == (2, 0, False)
+
+    # Nothing is accepted once draining has started
+    with pytest.raises(QueueFullError):
+        executor.submit(lambda: None)
+
+
+def test_submit_waits_for_a_slot_up_to_the_timeout(executor):
+    release = Event()
+    executor.configure(max_queue_size=0, submit_timeout=5)
+    executor.submit(release.wait, 5)
+
+    # A slot frees up while the second submission waits
+    Timer(0.1, release.set).start()
+    assert executor.submit(lambda: 'ran').result(5) == 'ran'
+
+    executor.configure(submit_timeout=0.05)
+    executor.submit(Event().wait, 0.5)
+    with pytest.raises(QueueFullError):
+        executor.submit(lambda: None)
+
+
+def test_failing_tasks_are_logged_and_counted(executor, caplog):
+    def fail():
+        raise RuntimeError('gateway exploded')
+
+    with caplog.at_level(logging.ERROR, logger='app.services.task_queue'):
+        future = executor.submit(fail)
+        with pytest.raises(RuntimeError):
+            future.result(5)
+        executor.shutdown(timeout=5)
+
+    assert executor.metrics()['failed'] == 1
+    record = next(r for r in caplog.records if 'gateway exploded' in r.getMessage())
+    assert record.exc_info is not None
+
+
+def test_shutdown_timeout_reports_undrained_work(executor):
+    release = Event()
+    executor.submit(release.wait, 5)
+
+    assert executor.shutdown(timeout=0.05) is False
+    release.set()
+
+
+def test_initiate_payment_returns_503_when_the_queue_is_full(app, monkeypatch):
+    user = User(email='buyer@example.com', first_name='Buy', last_name='Er')
+    user.set_password('Password123!')
+    db.session.add_all([user, Category(name='Gadgets')])
+    db.session.flush()
+    order = Order(user_id=user.id, total_amount=Decimal('5.00'), shipping_address_id=1)
+    db.session.add(order)
+    db.session.commit()
+
+    # A pool whose only slot is taken
+    full = BoundedExecutor('payment-worker', max_workers=1, max_queue_size=0)
+    release = Event()
+    full.submit(release.wait, 5)
+    monkeypatch.setattr(PaymentSimulator, 'executor', full)
+
+    client = app.test_client()
+    token = client.post('/api/auth/login', json={'email': 'buyer@example.com', 'password': 'Password123!'}).json['access_token']
+    response = client.post('/api/payments/initiate', json={
+        'order_id': order.id,
+        'payment_method': 'credit_card',
+        'card_details': {'card_number': '4242424242424242', 'cvv': '123', 'expiry_month': '12',
+                         'expiry_year': '30', 'cardholder_name': 'Buy Er'}
+    }, headers={'Authorization': f'Bearer {token}'})
+
+    release.set()
+    full.shutdown(timeout=5)
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+    assert response.json['transaction_id']
+    # The payment stays processing so a retry can queue it again
+    assert Payment.query.one().status == 'processing'
+    assert full.metrics()['rejected'] == 1